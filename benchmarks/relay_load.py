@@ -0,0 +1,144 @@
+"""Load generator for the key event relay.
+
+Connects many clients to a relay server; some of them key random Morse at a
+given speed and all of them count what they receive. Every client runs in this
+process on one clock, so the relay latency of each frame is measured directly.
+
+Run against a local server:
+    python relay_server.py &
+    python -m benchmarks.relay_load --clients 2000 --senders 50 --duration 10
+or with the server in this process:
+    python -m benchmarks.relay_load --in-process
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from array import array
+from src.relay import (RelayServer, FRAME, KEY_DOWN, KEY_UP, WELCOME, LEFT, DEFAULT_RELAY_PORT,
+                       raise_open_file_limit)
+
+CONNECT_CONCURRENCY = 200  # Connections opened at once, to stay within the listen backlog
+
+
+class LoadClient(asyncio.Protocol):
+    def __init__(self, latencies_ns=None):
+        self.transport = None
+        self.operator_id = None
+        self.welcomed = asyncio.get_running_loop().create_future()
+        self.incoming = bytearray()
+        self.received = 0
+        self.latencies_ns = latencies_ns  # Filled by the probe clients only
+        self.lost = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        now_ns = time.perf_counter_ns()
+        self.incoming += data
+        usable = len(self.incoming) - len(self.incoming) % FRAME.size
+        for kind, operator_id, timestamp_ns in FRAME.iter_unpack(self.incoming[:usable]):
+            if kind == WELCOME:
+                self.operator_id = operator_id
+                self.welcomed.set_result(operator_id)
+            elif kind != LEFT and operator_id != self.operator_id:
+                self.received += 1
+                if self.latencies_ns is not None:
+                    self.latencies_ns.append(now_ns - timestamp_ns)
+        del self.incoming[:usable]
+
+    def connection_lost(self, exc):
+        self.lost = True
+
+
+async def connect(host, port, count, probe_every):
+    loop = asyncio.get_running_loop()
+    latencies = array('q')
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def open_one(index):
+        async with semaphore:
+            probe = latencies if index % probe_every == 0 else None
+            _, client = await loop.create_connection(lambda: LoadClient(probe), host, port)
+            await client.welcomed
+            return client
+    clients = await asyncio.gather(*(open_one(index) for index in range(count)))
+    return clients, latencies
+
+
+async def key_randomly(client, wpm, until, rng):
+    """Send random dots and dashes with Morse element and character spacing."""
+    unit_s = 1.2 / wpm
+    sent = 0
+    while time.perf_counter() < until:
+        for _ in range(rng.randint(1, 5)):
+            client.transport.write(FRAME.pack(KEY_DOWN, 0, time.perf_counter_ns()))
+            await asyncio.sleep(unit_s * rng.choice((1, 3)))
+            client.transport.write(FRAME.pack(KEY_UP, 0, time.perf_counter_ns()))
+            await asyncio.sleep(unit_s)
+            sent += 2
+        await asyncio.sleep(unit_s * 2)
+    return sent
+
+
+async def run_load(args):
+    server = None
+    host, port = args.host, args.port
+    if args.in_process:
+        server = RelayServer()
+        host, port = await server.start(host, 0)
+
+    start = time.perf_counter()
+    clients, latencies = await connect(host, port, args.clients, args.probe_every)
+    print(f"Connected {len(clients)} clients in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(args.seed)
+    until = time.perf_counter() + args.duration
+    sent = sum(await asyncio.gather(*(key_randomly(client, args.wpm, until, rng)
+                                      for client in clients[:args.senders])))
+    await asyncio.sleep(0.5)  # Let the last flushes arrive
+
+    received = sum(client.received for client in clients)
+    expected = sent * (len(clients) - 1)
+    dropped = sum(client.lost for client in clients)
+    for client in clients:
+        client.transport.close()
+    if server:
+        server.close()
+    return {"clients": len(clients), "senders": min(args.senders, len(clients)), "sent": sent,
+            "received": received, "expected": expected, "dropped": dropped, "latencies_ns": latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the key event relay.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_RELAY_PORT)
+    parser.add_argument("--in-process", action="store_true", help="run the relay server in this process")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--senders", type=int, default=20, help="clients that key, the rest only listen")
+    parser.add_argument("--wpm", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of keying")
+    parser.add_argument("--probe-every", type=int, default=10, help="measure latency on every Nth client")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    result = asyncio.run(run_load(args))
+
+    delivered = result["received"] / result["expected"] * 100 if result["expected"] else 100.0
+    print(f"{result['clients']} clients ({result['senders']} keying) for {args.duration:.0f} s: "
+          f"{result['sent']} frames sent, {result['received']:,} of {result['expected']:,} delivered "
+          f"({delivered:.1f}%), {result['dropped']} connections dropped")
+    latencies = sorted(result["latencies_ns"])
+    if latencies:
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * q))] / 1e6
+        print(f"Relay latency over {len(latencies):,} frames: mean {statistics.fmean(latencies) / 1e6:.1f} ms, "
+              f"p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, p99 {percentile(0.99):.1f} ms, "
+              f"max {latencies[-1] / 1e6:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
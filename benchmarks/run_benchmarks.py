@@ -0,0 +1,327 @@
+"""Micro-benchmarks for the game's hot paths.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --save baseline.json
+    python -m benchmarks.run_benchmarks --compare baseline.json --threshold 10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Headless: no window or audio device needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from src.band_simulator import BandSimulator
+from src.character_sampler import AdaptiveCharacterSampler
+from src.clock import FakeClock
+from src.commons import ALL_TO_MORSE, MORSE_ALL, MORSE_ALL_TREE, MORSE_COMMON_TREE
+from src.display_manager import DisplayManager, SCREEN_WIDTH, SCREEN_HEIGHT
+from src.input_handler import InputHandler
+from src.morse_synth import render_text
+from src.session_store import SessionStore
+from src.simulation import NullSoundManager, StaticConfig
+from src.sound_manager import SoundManager
+from src.state_manager import StateManager
+
+SAMPLE_TEXT = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789 " * 20
+TIMED_SECONDS = 0.2  # Target duration of one timed repeat
+REPEATS = 5
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark. The decorated function does its setup and returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def time_callable(function):
+    """Median time per call in nanoseconds, over REPEATS timed runs."""
+    # Calibrate the number of calls so one repeat takes about TIMED_SECONDS
+    calls = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed > TIMED_SECONDS * 1e9 / 10 or calls >= 1 << 20:
+            break
+        calls *= 2
+    calls = max(1, int(calls * TIMED_SECONDS * 1e9 / max(elapsed, 1)))
+
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            function()
+        samples.append((time.perf_counter_ns() - start) / calls)
+    return statistics.median(samples)
+
+
+def make_state_manager(state):
+    state_manager = StateManager(NullSoundManager(), StaticConfig(), FakeClock())
+    if state == "countdown":
+        state_manager.start_countdown("transmit_game")
+    elif state == "transmit_game":
+        state_manager.initialize_transmit_game()
+        now_ns = state_manager.clock.now_ns()
+        state_manager.complete_key_press(now_ns - 60_000_000, now_ns)  # Pending input timeout
+    elif state == "receive_game":
+        state_manager.initialize_receive_game()
+    elif state in ("result", "receive_result"):
+        state_manager.initialize_transmit_game()
+        state_manager.show_result(state)
+        state_manager.result_message = "CORRECT!"
+        state_manager.result_color = "GREEN"
+    elif state == "final_score":
+        state_manager.end_session("menu")
+    state_manager.state = state
+    return state_manager
+
+
+# --- Audio ---
+@benchmark("sound.generate_tone")
+def bench_generate_tone():
+    sound_manager = SoundManager()
+    return sound_manager.generate_tone
+
+
+@benchmark("sound.character_cached")
+def bench_character_cached():
+    sound_manager = SoundManager()
+    sound_manager.get_character_sound("Q")
+    return lambda: sound_manager.get_character_sound("Q")
+
+
+@benchmark("sound.render_text")
+def bench_render_text():
+    return lambda: render_text("CQ CQ DE OH2ABC K", 35, 800, 44100, farnsworth_wpm=18)
+
+
+@benchmark("sound.band_mix_1s.12_stations")
+def bench_band_mix():
+    band = BandSimulator.for_difficulty(4, 44100, seed=1)
+    target = np.zeros(44100, dtype=np.int16)
+    return lambda: band.mix(target)
+
+
+# --- Morse lookups ---
+@benchmark("commons.encode_text")
+def bench_encode_text():
+    return lambda: [ALL_TO_MORSE.get(character) for character in SAMPLE_TEXT]
+
+
+@benchmark("commons.decode_dict")
+def bench_decode_dict():
+    codes = [ALL_TO_MORSE[character] for character in SAMPLE_TEXT if character in ALL_TO_MORSE]
+    return lambda: [MORSE_ALL.get(code) for code in codes]
+
+
+@benchmark("commons.decode_tree")
+def bench_decode_tree():
+    codes = [ALL_TO_MORSE[character] for character in SAMPLE_TEXT if character in ALL_TO_MORSE]
+
+    def decode():
+        for code in codes:
+            node = MORSE_ALL_TREE
+            for symbol in code:
+                node = node.next(symbol)
+    return decode
+
+
+# --- Game logic ---
+for _state in ("menu", "countdown", "transmit_game", "receive_game", "result", "final_score"):
+    def bench_update(state=_state):
+        state_manager = make_state_manager(state)
+        now = state_manager.clock.now_ms()
+        return lambda: state_manager.update(now)
+    benchmark(f"state.update.{_state}")(bench_update)
+
+
+@benchmark("sampler.sample.characters")
+def bench_sample_characters():
+    sampler = AdaptiveCharacterSampler(MORSE_COMMON_TREE.candidates, random.Random(1))
+    return sampler.sample
+
+
+@benchmark("sampler.record.10k_words")
+def bench_record_words():
+    words = [f"W{index}" for index in range(10_000)]
+    sampler = AdaptiveCharacterSampler(words, random.Random(1))
+    return lambda: sampler.record("W5000", False, 700)
+
+
+@benchmark("sampler.sample.10k_words")
+def bench_sample_words():
+    sampler = AdaptiveCharacterSampler([f"W{index}" for index in range(10_000)], random.Random(1))
+    return sampler.sample
+
+
+# --- Input ---
+@benchmark("input.handle_event.menu")
+def bench_handle_event_menu():
+    state_manager = make_state_manager("menu")
+    input_handler = InputHandler(state_manager, None, state_manager.sound_manager)
+    events = [pygame.event.Event(pygame.KEYDOWN, key=key, unicode="") for key in (pygame.K_UP, pygame.K_DOWN)]
+
+    def handle():
+        for event in events:
+            input_handler.handle_event(event)
+    return handle
+
+
+@benchmark("input.handle_event.transmit_key")
+def bench_handle_event_transmit():
+    state_manager = make_state_manager("transmit_game")
+    input_handler = InputHandler(state_manager, None, state_manager.sound_manager)
+    down = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, unicode=" ")
+    up = pygame.event.Event(pygame.KEYUP, key=pygame.K_SPACE, unicode=" ")
+
+    def handle():
+        state_manager.state = "transmit_game"
+        state_manager.transmit_input_chars.clear()
+        state_manager.transmit_key_times.clear()
+        state_manager.transmit_node = MORSE_COMMON_TREE
+        input_handler.handle_event(down, 0)
+        input_handler.handle_event(up, 60_000_000)
+    return handle
+
+
+# --- Session history ---
+def make_session_store(rounds=0):
+    """Store in a temporary directory, filled with `rounds` random transmit rounds."""
+    store = SessionStore(os.path.join(tempfile.mkdtemp(), "history.db"))
+    rng = random.Random(1)
+    session = store.start_session("transmit_game")
+    targets = list(MORSE_COMMON_TREE.candidates)
+    for _ in range(rounds):
+        target = rng.choice(targets)
+        store.record_round(session, "transmit_game", target, target, rng.choice(("CORRECT!", "WRONG!")),
+                           rng.uniform(200, 900), [(0, 60_000_000), (120_000_000, 300_000_000)], ".-")
+    store.flush()
+    return store
+
+
+@benchmark("history.record_round")
+def bench_record_round():
+    store = make_session_store()
+    key_times = [(0, 60_000_000), (120_000_000, 300_000_000)]
+    return lambda: store.record_round(1, "transmit_game", "A", "A", "CORRECT!", 400, key_times, ".-")
+
+
+@benchmark("history.character_stats.50k_rounds")
+def bench_character_stats():
+    store = make_session_store(50_000)
+    return lambda: store.character_stats("transmit_game")
+
+
+# --- Rendering ---
+def make_display_manager():
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return DisplayManager(screen)
+
+
+for _state in ("menu", "countdown", "transmit_game", "receive_game", "result", "final_score"):
+    def bench_display_steady(state=_state):
+        display_manager = make_display_manager()
+        state_manager = make_state_manager(state)
+        return lambda: display_manager.display_current_state(state_manager)
+
+    def bench_display_full(state=_state):
+        display_manager = make_display_manager()
+        state_manager = make_state_manager(state)
+
+        def display():
+            display_manager.invalidate()
+            display_manager.display_current_state(state_manager)
+        return display
+
+    benchmark(f"display.steady.{_state}")(bench_display_steady)
+    benchmark(f"display.full_redraw.{_state}")(bench_display_full)
+
+
+@benchmark("display.keying_scope.frame")
+def bench_keying_scope_frame():
+    """One 60 FPS transmit frame while keying: the strip scrolls by 3 or 4 columns."""
+    display_manager = make_display_manager()
+    state_manager = make_state_manager("transmit_game")
+    clock = state_manager.clock
+
+    def display():
+        clock.advance_ns(16_666_667)
+        now_ns = clock.now_ns()
+        # A 60 ms press every 120 ms, the last few in view
+        state_manager.transmit_key_times = [(start_ns, start_ns + 60_000_000)
+                                            for start_ns in range(now_ns - now_ns % 120_000_000 - 1_200_000_000,
+                                                                  now_ns, 120_000_000)]
+        display_manager.display_current_state(state_manager)
+    return display
+
+
+def run(selected):
+    pygame.init()
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if selected and not any(part in name for part in selected):
+            continue
+        ns_per_call = time_callable(setup())
+        results[name] = {"ns_per_call": ns_per_call}
+        print(f"{name:<40} {ns_per_call / 1000:>12.2f} us")
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, threshold_percent):
+    """Print changes against a baseline and return the names of regressed benchmarks."""
+    regressions = []
+    print(f"\nCompared with baseline (regression threshold {threshold_percent:.0f}%):")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  {name:<40} new")
+            continue
+        before = baseline[name]["ns_per_call"]
+        change = (result["ns_per_call"] - before) / before * 100
+        flag = ""
+        if change > threshold_percent:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<40} {change:+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audio, lookup, input and render hot paths.")
+    parser.add_argument("filter", nargs="*", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    results = run(args.filter)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "benchmarks": results}, f, indent=4)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+import wave
+import numpy as np
+from src.morse_decoder import MorseDecoder
+from src.morse_synth import DEFAULT_WPM, DEFAULT_PITCH
+
+READ_FRAMES = 16384  # Frames decoded per step
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode Morse code from a 16-bit PCM WAV file.")
+    parser.add_argument("input", help="WAV file to decode")
+    parser.add_argument("--wpm", type=float, default=DEFAULT_WPM, help="expected speed, refined while decoding")
+    parser.add_argument("--pitch", type=float, default=DEFAULT_PITCH, help="tone frequency in Hz")
+    parser.add_argument("--envelope", action="store_true", help="detect any tone instead of a single pitch")
+    args = parser.parse_args()
+
+    with wave.open(args.input, "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            sys.exit("Only 16-bit PCM WAV files are supported.")
+        channels = wav_file.getnchannels()
+        decoder = MorseDecoder(wav_file.getframerate(), args.pitch, args.wpm,
+                               "envelope" if args.envelope else "goertzel")
+        start = time.perf_counter()
+        while True:
+            frames = wav_file.readframes(READ_FRAMES)
+            if not frames:
+                break
+            chunk = np.frombuffer(frames, dtype="<i2").reshape(-1, channels)
+            print(decoder.feed(chunk), end="", flush=True)
+        print(decoder.flush())
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    audio_seconds = decoder.blocks_processed * decoder.block_seconds
+    print(f"Decoded {audio_seconds:.1f} s of audio in {elapsed:.2f} s ({audio_seconds / elapsed:,.0f}x real time), "
+          f"estimated speed {decoder.wpm:.1f} WPM", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
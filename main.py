@@ -1,13 +1,95 @@
 #!/usr/bin/env python3
+import time
+STARTED_NS = time.perf_counter_ns()  # Before the heavy imports, for --profile-startup
+import argparse
+import os
 import pygame
 from src.morse_game import MorseGame
+from src.sound_manager import LOW_LATENCY_BUFFER
+from src.startup import StartupProfiler
+from src.relay import parse_address
+
+DEFAULT_BUFFER = 512  # pygame's default mixer buffer
+
+def print_latency_report():
+    """Run the key-to-sound loopback test for both sidetone setups and print the results."""
+    from src.latency_probe import measure_key_latency
+    setups = [("default", DEFAULT_BUFFER, 2, False), ("--low-latency", LOW_LATENCY_BUFFER, 1, True)]
+    for name, buffer_size, channels, sidetone in setups:
+        report = measure_key_latency(buffer_size, channels, sidetone)
+        if report is None:
+            print(f"{name}: no measurement")
+            continue
+        print(f"{name:<14} buffer {report['buffer_ms']:.1f} ms, key to mixer mean {report['mix_mean_ms']:.1f} ms "
+              f"(p95 {report['mix_p95_ms']:.1f}, max {report['mix_max_ms']:.1f}), "
+              f"estimated key to sound {report['estimated_ms']:.1f} ms, "
+              f"{report['tones_heard']} of {report['presses']} presses heard")
+
+def print_history():
+    """Print per-character accuracy and speed from the session history."""
+    from src.session_store import SessionStore, DEFAULT_HISTORY_PATH
+    if not os.path.exists(DEFAULT_HISTORY_PATH):
+        print("No rounds played yet")
+        return
+    store = SessionStore()
+    for mode in ("transmit_game", "receive_game"):
+        stats = store.character_stats(mode)
+        if not stats:
+            continue
+        print(f"{mode}: character, rounds, accuracy, mean reaction ms, mean send ms")
+        for character, row in sorted(stats.items(), key=lambda item: item[1]["accuracy"]):
+            send_ms = f"{row['mean_send_ms']:.0f}" if row["mean_send_ms"] is not None else "-"
+            print(f"  {character}  {row['rounds']:6d}  {row['accuracy']:6.1%}  {row['mean_reaction_ms'] or 0:7.0f}  {send_ms:>7}")
+    store.close()
 
 def main():
-    pygame.init()
-    pygame.mixer.init(frequency=44100, size=-16, channels=2)
-    
-    game = MorseGame()
-    game.run_game_loop()
+    parser = argparse.ArgumentParser(description="Morse Code Game")
+    parser.add_argument("--loop", choices=["frame", "event"], default="frame",
+                        help="frame: redraw at a fixed 60 FPS; event: wake only for input, timers and audio")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler on (F3 toggles it, F4 dumps a trace file to resources/)")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="small mono mixer buffer and a reserved channel for the key tone")
+    parser.add_argument("--latency-test", action="store_true",
+                        help="measure key-to-sound latency with the SDL disk audio driver and exit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print the time spent in each startup phase once startup is complete, and exit")
+    parser.add_argument("--relay", metavar="HOST[:PORT]",
+                        help="share keying with other players through a relay server (see relay_server.py)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save every key event to PATH on quit, for replay.py")
+    parser.add_argument("--history", action="store_true",
+                        help="print per-character accuracy and speed from the played rounds and exit")
+    parser.add_argument("--no-history", action="store_true",
+                        help="play without reading or saving the history of played rounds")
+    args = parser.parse_args()
+    startup = StartupProfiler(enabled=args.profile_startup, origin_ns=STARTED_NS)
+    startup.mark("imports")
+
+    if args.history:
+        print_history()
+        return
+
+    if args.latency_test:
+        print_latency_report()
+        return
+
+    if args.low_latency:
+        pygame.mixer.pre_init(frequency=44100, size=-16, channels=1, buffer=LOW_LATENCY_BUFFER)
+    else:
+        pygame.mixer.pre_init(frequency=44100, size=-16, channels=2)
+    # The mixer is opened on a startup thread by MorseGame, after the menu is up
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("pygame init")
+
+    relay_address = parse_address(args.relay) if args.relay else None
+    game = MorseGame(profile=args.profile, sidetone=args.low_latency, startup=startup, relay_address=relay_address,
+                     record_path=args.record, history=not args.no_history)
+    if args.loop == "event":
+        game.run_event_loop()
+    else:
+        game.run_game_loop()
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+import argparse
+import time
+import pygame
+from src.sound_manager import SoundManager
+from src.morse_synth import timing_report, DEFAULT_SAMPLE_RATE, DEFAULT_WPM, DEFAULT_PITCH
+
+def main():
+    parser = argparse.ArgumentParser(description="Play text as Morse code and report the element timing error of the rendered audio.")
+    parser.add_argument("text", help="word, letter groups or sentence to play")
+    parser.add_argument("--wpm", type=float, default=DEFAULT_WPM, help="character speed")
+    parser.add_argument("--farnsworth", type=float, default=0, help="overall speed with stretched gaps (0 = off)")
+    parser.add_argument("--pitch", type=float, default=DEFAULT_PITCH, help="tone frequency in Hz")
+    parser.add_argument("--report-only", action="store_true", help="print the timing report without playing")
+    args = parser.parse_args()
+
+    report = timing_report(args.text, args.wpm, DEFAULT_SAMPLE_RATE, args.farnsworth)
+    if report is None:
+        parser.error("no characters to play")
+    print(f"{report['edges']} key edges in the rendered audio, timing error max {report['max_error_us']:.1f} us, "
+          f"rms {report['rms_error_us']:.1f} us (fixed-unit rendering would drift {report['fixed_unit_drift_us']:.0f} us)")
+    if args.report_only:
+        return
+
+    pygame.mixer.init(DEFAULT_SAMPLE_RATE, -16, 1)
+    sound_manager = SoundManager(args.wpm, args.pitch, farnsworth_wpm=args.farnsworth)
+    sound_manager.play_morse_text(args.text)
+    while sound_manager.is_character_playing():
+        time.sleep(0.05)
+    sound_manager.cleanup()
+    pygame.mixer.quit()
+
+if __name__ == "__main__":
+    main()
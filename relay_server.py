@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+from src.relay import RelayServer, DEFAULT_RELAY_PORT, raise_open_file_limit
+
+async def serve(host, port, stats_interval):
+    server = RelayServer()
+    host, port = await server.start(host, port)
+    print(f"Relaying key events on {host}:{port}")
+    while True:
+        await asyncio.sleep(stats_interval)
+        stats = server.stats
+        print(f"{stats['connections']} connections, {stats['frames_in']} frames in, {stats['frames_out']} out, "
+              f"{stats['flushes']} flushes, {stats['dropped_slow']} slow connections dropped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay key events between networked games (python main.py --relay HOST).")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on, 0.0.0.0 for the LAN")
+    parser.add_argument("--port", type=int, default=DEFAULT_RELAY_PORT)
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="seconds between statistics lines")
+    args = parser.parse_args()
+
+    limit = raise_open_file_limit()
+    if limit is not None:
+        print(f"Open file limit {limit}")
+    try:
+        asyncio.run(serve(args.host, args.port, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
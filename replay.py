@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import argparse
+from src.key_recorder import KeyEventLog, KeyEventReplayer
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay key events recorded with main.py --record, headless.")
+    parser.add_argument("path", help="key event log written by main.py --record")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded speed instead of at once")
+    parser.add_argument("--transitions", action="store_true", help="print every state change")
+    args = parser.parse_args()
+
+    log = KeyEventLog.load(args.path)
+    stats = KeyEventReplayer(log).run(realtime=args.realtime)
+    log.close()
+
+    if args.transitions:
+        for time_ms, state, message in stats["transitions"]:
+            print(f"{time_ms - stats['transitions'][0][0]:9d} ms  {state:<15} {message}")
+    rate = stats["events"] / stats["wall_seconds"] if stats["wall_seconds"] else 0
+    print(f"{stats['events']} key events, {stats['simulated_seconds']:.1f} s of game time in "
+          f"{stats['wall_seconds']:.3f} s ({rate:,.0f} events/s), final state '{stats['final_state']}'")
+    for message, count in stats["results"].items():
+        print(f"  {message:<15} {count}")
+    if stats["extra_draws"]:
+        print(f"Warning: the replay played {stats['extra_draws']} more rounds than were recorded")
+
+if __name__ == "__main__":
+    main()
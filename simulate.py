@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import argparse
+from src.simulation import HeadlessEngine, RandomBot
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game logic headless with a simulated player.")
+    parser.add_argument("--mode", choices=["transmit_game", "receive_game"], default="transmit_game")
+    parser.add_argument("--rounds", type=int, default=100000)
+    parser.add_argument("--accuracy", type=float, default=0.9, help="probability of a correct answer")
+    parser.add_argument("--wpm", type=float, default=15, help="keying speed of the simulated player")
+    parser.add_argument("--input-timeout", type=int, default=1000, help="input timeout in ms")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    bot = RandomBot(accuracy=args.accuracy, wpm=args.wpm, seed=args.seed)
+    engine = HeadlessEngine(bot, args.mode, args.input_timeout, seed=args.seed)
+    stats = engine.run(args.rounds)
+
+    print(f"{stats['rounds']} rounds, {stats['simulated_seconds']:.0f} s of game time in {stats['wall_seconds']:.2f} s "
+          f"({stats['rounds_per_minute']:,.0f} rounds/min)")
+    for message, count in stats["results"].items():
+        print(f"  {message:<15} {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import numpy as np
+from src.commons import COMMON_TO_MORSE
+from src.morse_synth import morse_timeline, sample_edges, DEFAULT_SAMPLE_RATE, DEFAULT_PITCH, RAMP_MS
+
+CHUNK_SAMPLES = 4096  # Samples mixed per step; the noise filter FFT size follows from this
+FILTER_TAPS = 257  # Band-pass FIR length for the receiver noise
+STATION_LOOP_S = 60  # Length of the keying each interfering station repeats
+HEADROOM = 0.8  # Peak level the mix is scaled to before int16 conversion
+
+# Receive game difficulty levels; 0 is the clean tone
+DIFFICULTY_PRESETS = {
+    1: {"stations": 1, "snr_db": 20, "fading_depth": 0.2, "min_offset_hz": 300, "crash_rate_hz": 0.0},
+    2: {"stations": 3, "snr_db": 12, "fading_depth": 0.4, "min_offset_hz": 200, "crash_rate_hz": 0.2},
+    3: {"stations": 6, "snr_db": 6, "fading_depth": 0.6, "min_offset_hz": 120, "crash_rate_hz": 0.5},
+    4: {"stations": 12, "snr_db": 2, "fading_depth": 0.8, "min_offset_hz": 60, "crash_rate_hz": 1.0},
+}
+
+
+class BandSimulator:
+    """Mixes a clean Morse signal into a simulated band: interfering stations (QRM),
+    band-limited receiver noise with static crashes (QRN) and fading (QSB).
+
+    Everything is generated from the absolute sample position in fixed-size chunks
+    with NumPy, so `stream` can run in real time and `mix` is just the concatenation.
+    The tones of all stations in a chunk are one (stations x samples) array, keying is
+    looked up from each station's key edges with searchsorted, and the
+    noise is band-pass filtered by FFT overlap-add.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, pitch=DEFAULT_PITCH, stations=3, snr_db=12,
+                 fading_depth=0.4, min_offset_hz=200, crash_rate_hz=0.2, passband_hz=(300, 2700), seed=None):
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(seed)
+        self.position = 0  # Absolute sample index of the next chunk
+        self.fading_depth = fading_depth
+        self.crash_rate_hz = crash_rate_hz
+        self.crashes = np.zeros((0, 2))  # Active static crashes: (start sample, amplitude)
+        self.crash_decay = 1 / (0.05 * sample_rate)  # 50 ms time constant
+
+        # Interfering stations: pitch, keying loop, level, phase
+        rng = self.rng
+        sides = rng.choice((-1, 1), stations)
+        self.station_pitches = pitch + sides * rng.uniform(min_offset_hz, 600, stations)
+        self.station_levels = 10 ** (rng.uniform(-15, 0, stations) / 20)
+        self.station_phases = rng.uniform(0, 2 * np.pi, stations)
+        self.ramp_len = max(1, int(sample_rate * RAMP_MS / 1000))
+        self.station_keying = [self._station_keying(rng.uniform(10, 35)) for _ in range(stations)]
+
+        # QSB: per-signal fading from two slow sinusoids; row 0 is the target
+        signals = stations + 1
+        self.fading_rates = rng.uniform(0.05, 0.5, (signals, 2))
+        self.fading_phases = rng.uniform(0, 2 * np.pi, (signals, 2))
+
+        # Noise: white noise through a windowed-sinc band-pass, RMS set by the SNR
+        # against the target tone (RMS of a full-scale sine is 1/sqrt(2))
+        low, high = (f / sample_rate for f in passband_hz)
+        n = np.arange(FILTER_TAPS) - (FILTER_TAPS - 1) / 2
+        taps = (2 * high * np.sinc(2 * high * n) - 2 * low * np.sinc(2 * low * n)) * np.hamming(FILTER_TAPS)
+        taps /= np.sqrt(np.sum(taps ** 2))  # Unit gain for white noise
+        self.fft_size = 1 << int(np.ceil(np.log2(CHUNK_SAMPLES + FILTER_TAPS - 1)))
+        self.filter_response = np.fft.rfft(taps, self.fft_size)
+        self.noise_tail = np.zeros(FILTER_TAPS - 1)
+        self.noise_rms = (1 / np.sqrt(2)) / 10 ** (snr_db / 20)
+
+        self.scale = HEADROOM / (1 + self.station_levels.sum() + 3 * self.noise_rms)
+
+    @classmethod
+    def for_difficulty(cls, level, sample_rate=DEFAULT_SAMPLE_RATE, pitch=DEFAULT_PITCH, seed=None):
+        """Simulator for a receive game difficulty level, or None for a clean signal."""
+        preset = DIFFICULTY_PRESETS.get(min(int(level), max(DIFFICULTY_PRESETS)))
+        if preset is None:
+            return None
+        return cls(sample_rate, pitch, seed=seed, **preset)
+
+    def _station_keying(self, wpm):
+        """Key edges (start and end sample arrays) and loop length of an interfering
+        station sending random five-letter groups."""
+        letters = list(COMMON_TO_MORSE)
+        groups = int(wpm * STATION_LOOP_S / 60) + 1  # A five-letter group is about one PARIS word
+        text = " ".join("".join(self.rng.choice(letters, 5)) for _ in range(groups))
+        marks, total = morse_timeline(text + " ", wpm)
+        edges = np.array(sample_edges(marks, self.sample_rate))
+        return edges[:, 0], edges[:, 1], int(round(total * self.sample_rate))
+
+    def _keying_envelope(self, station, index):
+        """Raised-cosine keyed envelope of a station at absolute sample `index`es."""
+        starts, ends, period = self.station_keying[station]
+        index = index % period
+        mark = np.maximum(np.searchsorted(starts, index, side="right") - 1, 0)
+        inside = np.minimum(index - starts[mark], ends[mark] - index)  # Samples from the nearest edge
+        level = np.clip(inside / self.ramp_len, 0, 1)
+        return 0.5 - 0.5 * np.cos(np.pi * level)
+
+    def _fading(self, t):
+        """Gain of each signal (rows) at times `t` in seconds."""
+        waves = np.sin(2 * np.pi * self.fading_rates[:, :, None] * t + self.fading_phases[:, :, None]).mean(axis=1)
+        return 1 - self.fading_depth * (0.5 + 0.5 * waves)
+
+    def _noise(self, count):
+        """Band-limited noise with static crashes for the next `count` samples."""
+        white = self.rng.standard_normal(count)
+
+        # Static crashes: Poisson arrivals, exponentially decaying noise bursts
+        arrivals = self.rng.poisson(self.crash_rate_hz * count / self.sample_rate)
+        if arrivals:
+            new = np.column_stack((self.position + self.rng.uniform(0, count, arrivals),
+                                   self.rng.uniform(5, 20, arrivals)))
+            self.crashes = np.vstack((self.crashes, new))
+        if len(self.crashes):
+            index = self.position + np.arange(count)
+            age = index[None, :] - self.crashes[:, :1]
+            bursts = np.where(age >= 0, self.crashes[:, 1:] * np.exp(-np.maximum(age, 0) * self.crash_decay), 0)
+            white *= 1 + bursts.sum(axis=0)
+            self.crashes = self.crashes[self.crashes[:, 1] * np.exp(-age[:, -1] * self.crash_decay) > 0.01]
+
+        filtered = np.fft.irfft(np.fft.rfft(white, self.fft_size) * self.filter_response, self.fft_size)
+        filtered = filtered[:count + FILTER_TAPS - 1]
+        filtered[:FILTER_TAPS - 1] += self.noise_tail
+        self.noise_tail = filtered[count:].copy()
+        return filtered[:count] * self.noise_rms
+
+    def process(self, target):
+        """Mix one chunk (at most CHUNK_SAMPLES) of the float target signal, continuing from the last chunk."""
+        count = len(target)
+        index = self.position + np.arange(count)
+        t = index / self.sample_rate
+        fading = self._fading(t)
+
+        mixed = np.asarray(target, dtype=np.float64) * fading[0]
+        if len(self.station_pitches):
+            tones = np.sin(2 * np.pi * self.station_pitches[:, None] * t + self.station_phases[:, None])
+            for station in range(len(tones)):
+                tones[station] *= self._keying_envelope(station, index)
+            tones *= fading[1:] * self.station_levels[:, None]
+            mixed += tones.sum(axis=0)
+        mixed += self._noise(count)
+
+        self.position += count
+        return mixed * self.scale
+
+    def stream(self, target_chunks):
+        """Yield mixed int16 chunks for an iterable of int16 target chunks of any size."""
+        for chunk in target_chunks:
+            target = np.asarray(chunk, dtype=np.float64) / 32767
+            for start in range(0, len(target), CHUNK_SAMPLES):
+                mixed = self.process(target[start:start + CHUNK_SAMPLES])
+                yield (np.clip(mixed, -1, 1) * 32767).astype(np.int16)
+
+    def render_band(self, count):
+        """The band without the target for the next `count` samples: (start position, float
+        buffer). Mixing is linear, so `add_target` can key a target into it later,
+        e.g. when the band was rendered ahead of time on another thread."""
+        start = self.position
+        silence = np.zeros(min(CHUNK_SAMPLES, count))
+        chunks = [self.process(silence[:min(CHUNK_SAMPLES, count - offset)])
+                  for offset in range(0, count, CHUNK_SAMPLES)]
+        return start, np.concatenate(chunks) if chunks else np.zeros(0)
+
+    def add_target(self, band, start, target):
+        """Mix an int16 target into the start of a `render_band` buffer; returns int16, as `mix` would."""
+        t = (start + np.arange(len(target))) / self.sample_rate
+        fading = self._fading(t)[0]  # The target's row, as process applies it
+        mixed = band[:len(target)] + np.asarray(target, dtype=np.float64) / 32767 * fading * self.scale
+        return (np.clip(mixed, -1, 1) * 32767).astype(np.int16)
+
+    def mix(self, target):
+        """Mix a whole int16 target buffer; returns an int16 buffer of the same length."""
+        if not len(target):
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(list(self.stream([target])))
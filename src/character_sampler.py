@@ -0,0 +1,131 @@
+import random
+
+ERROR_PRIOR = 0.5  # Error rate assumed for a character before it has been played
+ERROR_ALPHA = 0.3  # Weight of the latest round in a character's error rate
+REACTION_ALPHA = 0.2  # Weight of the latest round in the reaction time averages
+MIN_WEIGHT = 0.05  # Mastered characters still come up now and then
+SLOW_WEIGHT = 0.5  # Extra weight of a character twice as slow as the average
+
+
+class WeightedSampler:
+    """Draws items with probability proportional to their weights.
+
+    The weights are kept in a Fenwick (binary indexed) tree, so changing one
+    weight and drawing an item are both O(log n): a draw picks a point in the
+    total weight and descends the tree to the item whose prefix sum covers it.
+    """
+
+    def __init__(self, items, weights=None, rng=None):
+        self.items = list(items)
+        self.index = {item: position for position, item in enumerate(self.items)}
+        self.rng = rng if rng is not None else random
+        self.weights = [0.0] * len(self.items)
+        self.tree = [0.0] * (len(self.items) + 1)  # 1-based Fenwick tree of the weights
+        self.top_bit = 1 << (len(self.items).bit_length() - 1) if self.items else 0
+        if weights is None:
+            weights = [1.0] * len(self.items)
+        for item, weight in zip(self.items, weights):
+            self.set_weight(item, weight)
+
+    def __len__(self):
+        return len(self.items)
+
+    def weight(self, item):
+        return self.weights[self.index[item]]
+
+    def set_weight(self, item, weight):
+        if weight < 0:
+            raise ValueError(f"Weight of '{item}' must not be negative.")
+        position = self.index[item]
+        delta = weight - self.weights[position]
+        self.weights[position] = weight
+        position += 1
+        tree = self.tree
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def total(self):
+        """Sum of all weights."""
+        total = 0.0
+        position = len(self.items)
+        while position:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def sample(self):
+        """Draw one item; raises ValueError if all weights are zero."""
+        total = self.total()
+        if total <= 0:
+            raise ValueError("Cannot sample: all weights are zero.")
+        target = self.rng.random() * total
+        tree = self.tree
+        position = 0
+        bit = self.top_bit
+        while bit:
+            step = position + bit
+            if step < len(tree) and tree[step] <= target:
+                position = step
+                target -= tree[step]
+            bit >>= 1
+        # Rounding can leave the target past the last non-zero weight
+        position = min(position, len(self.items) - 1)
+        while self.weights[position] == 0:
+            position -= 1
+        return self.items[position]
+
+
+class AdaptiveCharacterSampler:
+    """Chooses the next practice character, favouring the ones the player gets wrong
+    or answers slowly (a simple spaced repetition).
+
+    Each character keeps moving averages of its error rate and reaction time; its
+    weight is MIN_WEIGHT plus the error rate, plus SLOW_WEIGHT per multiple of the
+    average reaction time of all played characters it is slower. `record` updates
+    only the weight of the character just played, against the average at that time.
+    """
+
+    def __init__(self, characters, rng=None):
+        self.errors = {character: ERROR_PRIOR for character in characters}
+        self.reaction_ms = {}
+        self.reaction_sum = 0.0  # Of the values in reaction_ms, for their average in O(1)
+        self.sampler = WeightedSampler(self.errors, [self._weight(character) for character in self.errors], rng)
+
+    def _weight(self, character):
+        weight = MIN_WEIGHT + self.errors[character]
+        reaction_ms = self.reaction_ms.get(character)
+        if reaction_ms is not None and self.reaction_sum > 0:
+            mean_reaction_ms = self.reaction_sum / len(self.reaction_ms)
+            weight += SLOW_WEIGHT * max(0.0, reaction_ms / mean_reaction_ms - 1)
+        return weight
+
+    def sample(self):
+        return self.sampler.sample()
+
+    def record(self, character, correct, reaction_ms=None):
+        """Update a character's weight after a round."""
+        if character not in self.errors:
+            return
+        self.errors[character] += ERROR_ALPHA * ((0.0 if correct else 1.0) - self.errors[character])
+        if reaction_ms is not None:
+            previous = self.reaction_ms.get(character)
+            if previous is None:
+                previous = reaction_ms
+                self.reaction_sum += reaction_ms
+            else:
+                self.reaction_sum += REACTION_ALPHA * (reaction_ms - previous)
+            self.reaction_ms[character] = previous + REACTION_ALPHA * (reaction_ms - previous)
+        self.sampler.set_weight(character, self._weight(character))
+
+    def load(self, stats):
+        """Start from saved per-character stats, as returned by SessionStore.character_stats."""
+        for character, row in stats.items():
+            if character not in self.errors:
+                continue
+            self.errors[character] = 1 - row["accuracy"]
+            if row["mean_reaction_ms"] is not None:
+                self.reaction_ms[character] = row["mean_reaction_ms"]
+        self.reaction_sum = sum(self.reaction_ms.values())
+        for character in self.errors:
+            self.sampler.set_weight(character, self._weight(character))
@@ -0,0 +1,36 @@
+import time
+
+
+class MonotonicClock:
+    """Real monotonic time, shared by the game logic and input timestamps."""
+
+    def now_ns(self):
+        return time.perf_counter_ns()
+
+    def now_ms(self):
+        return time.perf_counter_ns() // 1_000_000
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class FakeClock:
+    """Manually advanced clock for headless simulation and tests; sleeping is instant."""
+
+    def __init__(self, start_ms=1):
+        self.time_ns = start_ms * 1_000_000
+
+    def now_ns(self):
+        return self.time_ns
+
+    def now_ms(self):
+        return self.time_ns // 1_000_000
+
+    def advance(self, ms):
+        self.time_ns += int(ms * 1_000_000)
+
+    def advance_ns(self, ns):
+        self.time_ns += ns
+
+    def sleep(self, seconds):
+        self.advance(seconds * 1000)
@@ -68,4 +68,49 @@ ALL_TO_MORSE = {value: key for key, value in MORSE_ALL.items()}
 
 MORSE_COMMON = {**MORSE_TO_ALPHABET, **MORSE_TO_NUMS}
 
-COMMON_TO_MORSE = {value: key for key, value in MORSE_COMMON.items()}
\ No newline at end of file
+COMMON_TO_MORSE = {value: key for key, value in MORSE_COMMON.items()}
+
+class MorseTreeNode:
+    """Node of the binary dot/dash decoding tree. The root is the empty input."""
+    __slots__ = ('dot', 'dash', 'character', 'candidates')
+
+    def __init__(self):
+        self.dot = None
+        self.dash = None
+        self.character = None  # Character spelled by the path to this node, if any
+        self.candidates = frozenset()  # Characters still reachable from this node
+
+    def next(self, symbol):
+        """Follow one element; returns None when the input is a dead end."""
+        return self.dot if symbol == '.' else self.dash
+
+    def is_leaf(self):
+        return self.dot is None and self.dash is None
+
+
+def build_morse_tree(morse_table):
+    """Build a dot/dash tree from a {morse: character} table."""
+    root = MorseTreeNode()
+    for morse, character in morse_table.items():
+        node = root
+        for symbol in morse:
+            attr = 'dot' if symbol == '.' else 'dash'
+            if getattr(node, attr) is None:
+                setattr(node, attr, MorseTreeNode())
+            node = getattr(node, attr)
+        node.character = character
+
+    def collect(node):
+        reachable = {node.character} if node.character else set()
+        for child in (node.dot, node.dash):
+            if child is not None:
+                reachable |= collect(child)
+        node.candidates = frozenset(reachable)
+        return reachable
+
+    collect(root)
+    return root
+
+MORSE_ALL_TREE = build_morse_tree(MORSE_ALL)
+
+MORSE_COMMON_TREE = build_morse_tree(MORSE_COMMON)
@@ -1,9 +1,30 @@
 import json
 import os
 import copy
+import tempfile
+import threading
+import time
+
+SAVE_DELAY_S = 0.5  # Changes within this window are collapsed into one write
+WATCH_INTERVAL_S = 1.0  # How often the config file is checked for outside changes
+
+# Allowed ranges of numeric settings, applied to values set in game and to reloaded files
+VALUE_LIMITS = {
+    "general.input_timeout_ms": (100, 5000),
+    "sound.wpm": (5, 60),
+    "sound.pitch_hz": (300, 1500),
+    "sound.farnsworth_wpm": (0, 60),  # 0 turns Farnsworth spacing off
+    "receive_game.difficulty": (0, 4),  # Band conditions, see band_simulator.DIFFICULTY_PRESETS
+    "transmit_game.keyer_wpm": (5, 60),
+}
+
+# Allowed values of settings with a fixed set of choices
+VALUE_CHOICES = {
+    "transmit_game.keyer_mode": ("straight", "iambic_a", "iambic_b"),
+}
 
 class ConfigManager:
-    def __init__(self, config_path='resources/config.json'):
+    def __init__(self, config_path='resources/config.json', save_delay=SAVE_DELAY_S):
 
     # Default configuration values, should not be modified
         self.default_config = {
@@ -11,73 +32,303 @@ class ConfigManager:
                 "input_timeout_ms": 1000
             },
             "receive_game": {
-                "character_count_placeholder": 3
+                "character_count_placeholder": 3,
+                "difficulty": 0
+            },
+            "transmit_game": {
+                "keyer_mode": "straight",
+                "keyer_wpm": 20
+            },
+            "sound": {
+                "wpm": 12,
+                "pitch_hz": 800,
+                "farnsworth_wpm": 0
             }
         }
 
         self.config_path = config_path
+        self.save_delay = save_delay
+
+        # Write-behind state: changes mark the config dirty and a background
+        # thread saves it once no change has arrived for `save_delay` seconds
+        self._lock = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._last_change = 0.0
+        self._writer = None
+        self._closed = False
+
+        # Hot reload state: a watcher thread parses outside changes to the file,
+        # the game thread applies them and notifies subscribers in dispatch_changes
+        self._file_signature = None  # (mtime_ns, size) of the file as last read or written
+        self._pending_config = None
+        self._unsaved = {}  # Key tuple -> value of in-game changes not yet on disk; () is the whole config
+        self._watcher = None
+        self._subscribers = []
+        self.on_pending_changes = None  # Called from the watcher thread, e.g. to wake the game loop
+
+        self._accessors = {}  # Dotted path -> tuple of keys
         self.config = self.load_config()
 
     def load_config(self):
         if os.path.exists(self.config_path):
             try:
+                self._file_signature = self._stat_signature()
                 with open(self.config_path, 'r') as f:
                     user_config = json.load(f)
-                return self.merge_with_defaults(user_config)
+                return self.validate_config(self.merge_with_defaults(user_config))
             except (json.JSONDecodeError, IOError):
                 return copy.deepcopy(self.default_config)
         else:
             config = copy.deepcopy(self.default_config)
             self.config = config
-            self.save_config()
+            self.schedule_save()
             return config
 
     def save_config(self):
-        with open(self.config_path, 'w') as file:
-            json.dump(self.config, file, indent=4)
+        """Write the config to disk now, atomically (temp file + rename)."""
+        with self._write_lock:
+            with self._lock:
+                text = json.dumps(self.config, indent=4)
+                self._dirty = False
+                if self._pending_config is None:
+                    # Otherwise dispatch_changes still has to merge them into the reload
+                    self._unsaved.clear()
+            self._write_atomic(text)
+            self._file_signature = self._stat_signature()
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _write_atomic(self, text):
+        directory = os.path.dirname(self.config_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.config-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.config_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def schedule_save(self):
+        """Mark the config as changed; it is saved in the background after a quiet period."""
+        with self._lock:
+            self._dirty = True
+            self._last_change = time.monotonic()
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._write_behind, name="config-writer", daemon=True)
+                self._writer.start()
+            self._lock.notify()
+
+    def _write_behind(self):
+        """Background writer: waits for a burst of changes to settle, then saves once."""
+        while True:
+            with self._lock:
+                while not self._dirty and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                remaining = self._last_change + self.save_delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+            try:
+                self.save_config()
+            except OSError as e:
+                print(f"Warning: could not save config to '{self.config_path}': {e}")
+
+    def flush(self):
+        """Write pending changes now, e.g. before the game exits."""
+        if self._dirty:
+            self.save_config()
+
+    def close(self):
+        """Flush pending changes and stop the background writer and watcher."""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        for thread in (self._writer, self._watcher):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+
+    # --- Hot reload ---
+    def subscribe(self, callback):
+        """Call `callback(changed_paths)` on the game thread when a reload changes values.
+        `changed_paths` is a set of dotted paths, e.g. {'sound.wpm'}."""
+        self._subscribers.append(callback)
+
+    def start_watching(self, interval=WATCH_INTERVAL_S):
+        """Start checking the config file for outside changes in a background thread."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="config-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._lock.wait(interval)
+                if self._closed:
+                    return
+            self.check_for_changes()
+
+    def check_for_changes(self):
+        """Read the file if it changed since it was last read or written. Parsing and
+        validation happen here (off the game thread); dispatch_changes applies the result."""
+        with self._write_lock:  # Not in the middle of our own save
+            signature = self._stat_signature()
+            if signature is None or signature == self._file_signature:
+                return False
+            self._file_signature = signature
+
+            try:
+                with open(self.config_path, 'r') as f:
+                    user_config = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: ignoring invalid config file '{self.config_path}': {e}")
+                return False
+        if not isinstance(user_config, dict):
+            return False
+
+        with self._lock:
+            self._pending_config = self.validate_config(self.merge_with_defaults(user_config))
+        if self.on_pending_changes:
+            self.on_pending_changes()
+        return True
+
+    def dispatch_changes(self):
+        """Apply a reloaded config and notify subscribers. Cheap when nothing changed;
+        meant to be called once per frame from the game loop. In-game changes that
+        are not saved yet are kept over the reloaded values and saved with them."""
+        if self._pending_config is None:
+            return set()
+        with self._lock:
+            new_config, self._pending_config = self._pending_config, None
+            for keys, value in self._unsaved.items():
+                new_config = self._apply(new_config, keys, copy.deepcopy(value))
+            changed = self._changed_paths(self.config, new_config)
+            self.config = new_config
+        if self._unsaved:
+            self.schedule_save()
+
+        if changed:
+            for callback in self._subscribers:
+                callback(changed)
+        return changed
+
+    @staticmethod
+    def _apply(config, keys, value):
+        """Set `value` at `keys` in `config`, creating missing sections; returns the config."""
+        if not keys:
+            return value
+        section = config
+        for key in keys[:-1]:
+            if not isinstance(section.get(key), dict):
+                section[key] = {}
+            section = section[key]
+        section[keys[-1]] = value
+        return config
+
+    def _changed_paths(self, old, new, prefix=""):
+        changed = set()
+        for key in set(old) | set(new):
+            path = f"{prefix}{key}"
+            old_value, new_value = old.get(key), new.get(key)
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                changed |= self._changed_paths(old_value, new_value, path + ".")
+            elif old_value != new_value:
+                changed.add(path)
+        return changed
+
+    def validate_config(self, config):
+        """Clamp numeric settings to their allowed range and check settings with a fixed
+        set of choices; values of the wrong type or unknown choices fall back to defaults."""
+        for path in list(VALUE_LIMITS) + list(VALUE_CHOICES):
+            *parents, last = self._keys(path)
+            section, default = config, self.default_config
+            for key in parents:
+                section, default = section.get(key), default[key]
+                if not isinstance(section, dict):
+                    break
+            else:
+                value = section.get(last)
+                if path in VALUE_CHOICES:
+                    if value not in VALUE_CHOICES[path]:
+                        section[last] = default[last]
+                elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                    section[last] = default[last]
+                else:
+                    low, high = VALUE_LIMITS[path]
+                    section[last] = max(low, min(high, value))
+        return config
+
+    def _keys(self, path):
+        """Split a dotted path once and reuse the key tuple on later calls."""
+        keys = self._accessors.get(path)
+        if keys is None:
+            keys = self._accessors[path] = tuple(path.split('.'))
+        return keys
 
     def get_config_value(self, path, default=None):
         """Get a config value using dot notation path (e.g., 'receive_game.character_count')"""
-        keys = path.split('.')
         value = self.config
         try:
-            for key in keys:
+            for key in self._keys(path):
                 value = value[key]
             return value
         except (KeyError, TypeError):
             return default
     
     def set_config_value(self, path, value):
-        """Set a config value using dot notation path (e.g., 'receive_game.character_count')"""
-        keys = path.split('.')
-        config = self.config
-
-        for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
+        """Set a config value using dot notation path (e.g., 'receive_game.character_count').
+        The change is saved in the background, see schedule_save."""
+        keys = self._keys(path)
+        with self._lock:
+            config = self.config
+            for key in keys[:-1]:
+                if key not in config:
+                    config[key] = {}
+                config = config[key]
 
-        config[keys[-1]] = value
-        self.save_config()
+            config[keys[-1]] = value
+            self._unsaved.pop(keys, None)  # Keep the latest change last
+            self._unsaved[keys] = value
+        self.schedule_save()
     
     def get_input_timeout(self):
         return self.get_config_value('general.input_timeout_ms', 1000)
     
     def set_input_timeout(self, timeout_ms):
-        timeout_ms = max(100, min(5000, timeout_ms))
+        low, high = VALUE_LIMITS['general.input_timeout_ms']
+        timeout_ms = max(low, min(high, timeout_ms))
         self.set_config_value('general.input_timeout_ms', timeout_ms)
 
     def reset_to_default(self, section=None):
         """Reset entire config or a specific section to default values"""
         defaults = copy.deepcopy(self.default_config)
-        if section:
-            if section in defaults:
-                self.config[section] = defaults[section]
+        with self._lock:
+            if section:
+                if section in defaults:
+                    self.config[section] = defaults[section]
+                    self._unsaved.pop((section,), None)
+                    self._unsaved[(section,)] = defaults[section]
+                else:
+                    raise ValueError(f"Section '{section}' not found in default config.")
             else:
-                raise ValueError(f"Section '{section}' not found in default config.")
-        else:
-            self.config = defaults
-        self.save_config()
+                self.config = defaults
+                self._unsaved = {(): defaults}
+        self.schedule_save()
         return True
 
     def merge_with_defaults(self, user_config):
@@ -1,6 +1,7 @@
 import pygame
-import time
+from collections import OrderedDict
 from src.commons import COMMON_TO_MORSE as ALL_CHARS_TO_MORSE
+from src.keying_scope import KeyingScope
 
 # Constants
 SCREEN_WIDTH = 400
@@ -8,6 +9,10 @@ SCREEN_HEIGHT = 300
 FONT_SIZE = 24
 LARGE_FONT_SIZE = 48
 SMALL_FONT_SIZE = 18
+COUNTDOWN_FONT_SIZE = 72
+KEYING_SCOPE_RECT = (20, 175, 360, 48)
+TEXT_CACHE_SIZE = 256  # Max number of rendered text surfaces kept
+FONT_SIZES = {"normal": FONT_SIZE, "large": LARGE_FONT_SIZE, "small": SMALL_FONT_SIZE, "countdown": COUNTDOWN_FONT_SIZE}
 
 GAME_COLORS = {
     "WHITE": (255, 255, 255),
@@ -23,26 +28,167 @@ class DisplayManager:
     def __init__(self, screen):
         """Initialize the display manager."""
         self.screen = screen
-        self.font = pygame.font.Font(None, FONT_SIZE)
-        self.large_font = pygame.font.Font(None, LARGE_FONT_SIZE)
-        self.instructions_font = pygame.font.Font(None, SMALL_FONT_SIZE)
+
+        # Font registry, every font is created once on first use so the menu
+        # does not wait for fonts only the games need
+        self.fonts = {}
+
+        # LRU cache of rendered text surfaces, keyed by (text, font, color, antialias)
+        self.text_cache = OrderedDict()
+        self.text_cache_hits = 0
+        self.text_cache_misses = 0
         
-        # Track if the static parts of the game screen have been drawn
-        self.displayed_game_state = False
+        # Retained rendering: the static layer of the current screen is drawn once into
+        # `background`; dynamic items are redrawn only when their content changes.
+        self.background = None
+        self.static_key = None
+        self.dynamic_items = {}  # name -> (content, rect on screen)
+        self.full_redraw = False
+        self.dirty_rects = []
+        self.overlay_lines = None  # Debug overlay drawn on top of every frame, e.g. profiler stats
+        self.keying_scope = None  # Created on the first transmit frame
+        self.animating = False  # The last frame will change with time alone, e.g. a scrolling keying scope
+
+        # Pixels sent to the display, for measuring the saving of partial updates
+        self.frame_pixels_pushed = 0
+        self.total_pixels_pushed = 0
+        self.frames_drawn = 0
         
+    def get_font(self, name):
+        font = self.fonts.get(name)
+        if font is None:
+            font = self.fonts[name] = pygame.font.Font(None, FONT_SIZES[name])
+        return font
+
+    def preload_fonts(self):
+        """Create the fonts not used yet, e.g. while the menu waits for input."""
+        for name in FONT_SIZES:
+            self.get_font(name)
+
+    @property
+    def font(self):
+        return self.get_font("normal")
+
+    @property
+    def large_font(self):
+        return self.get_font("large")
+
+    @property
+    def instructions_font(self):
+        return self.get_font("small")
+
+    @property
+    def countdown_font(self):
+        return self.get_font("countdown")
+
+    def render_text(self, text, font, color, antialias=True):
+        """Return a rendered text surface, reusing a cached one when possible."""
+        key = (text, font, color, antialias)
+        surface = self.text_cache.get(key)
+        if surface is not None:
+            self.text_cache.move_to_end(key)
+            self.text_cache_hits += 1
+            return surface
+
+        self.text_cache_misses += 1
+        surface = font.render(text, antialias, color)
+        self.text_cache[key] = surface
+        if len(self.text_cache) > TEXT_CACHE_SIZE:
+            self.text_cache.popitem(last=False)
+        return surface
+
+    def text_cache_hit_rate(self):
+        lookups = self.text_cache_hits + self.text_cache_misses
+        return self.text_cache_hits / lookups if lookups else 0.0
+
     def display_text(self, text, pos, font, color=GAME_COLORS["WHITE"], center=False):
-        """Helper function to render and blit text."""
+        """Helper function to render and blit text. Returns the bounding rect of the text."""
         lines = text.split("\n")
         y_offset = 0
+        bounds = None
         for line in lines:
-            text_surface = font.render(line, True, color)
+            text_surface = self.render_text(line, font, color)
             text_rect = text_surface.get_rect()
             if center:
                 text_rect.center = (pos[0], pos[1] + y_offset)
             else:
                 text_rect.topleft = (pos[0], pos[1] + y_offset)
             self.screen.blit(text_surface, text_rect)
+            bounds = text_rect if bounds is None else bounds.union(text_rect)
             y_offset += font.get_linesize()
+        return bounds
+
+    # --- Retained rendering ---
+    def begin_frame(self, static_key):
+        """Start a frame. Returns True if the static layer must be drawn again,
+        i.e. the screen changed since the last frame (new state, new round...)."""
+        self.dirty_rects = []
+        self.animating = False
+        if static_key == self.static_key and self.background is not None:
+            return False
+
+        self.static_key = static_key
+        self.background = None
+        self.dynamic_items = {}
+        self.full_redraw = True
+        self.screen.fill(GAME_COLORS["BLACK"])
+        return True
+
+    def _capture_background(self):
+        if self.background is None:
+            self.background = self.screen.copy()
+
+    def display_dynamic_text(self, name, text, pos, font, color=GAME_COLORS["WHITE"], center=False):
+        """Draw a text item that may change between frames; redrawn only when its content changes."""
+        self._capture_background()
+        content = (text, pos, font, color, center)
+        previous = self.dynamic_items.get(name)
+        if previous is not None and previous[0] == content:
+            return
+
+        if previous is not None and previous[1] is not None:
+            self.screen.blit(self.background, previous[1], previous[1])
+            self.dirty_rects.append(previous[1])
+        rect = self.display_text(text, pos, font, color, center) if text else None
+        if rect is not None:
+            self.dirty_rects.append(rect)
+        self.dynamic_items[name] = (content, rect)
+
+    def end_frame(self):
+        """Push the changed parts of the screen to the display."""
+        self._capture_background()
+        if self.overlay_lines:
+            self._draw_overlay()
+        if self.full_redraw:
+            pygame.display.flip()
+            self.frame_pixels_pushed = self.screen.get_width() * self.screen.get_height()
+            self.full_redraw = False
+        elif self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+            self.frame_pixels_pushed = sum(rect.width * rect.height for rect in self.dirty_rects)
+        else:
+            self.frame_pixels_pushed = 0
+        self.total_pixels_pushed += self.frame_pixels_pushed
+        self.frames_drawn += 1
+
+    def set_overlay(self, lines):
+        """Show text lines in a box on top of the screen, or remove the box with None."""
+        if self.overlay_lines and not lines:
+            self.invalidate()
+        self.overlay_lines = lines
+
+    def _draw_overlay(self):
+        line_height = self.instructions_font.get_linesize()
+        surfaces = [self.render_text(line, self.instructions_font, GAME_COLORS["GREEN"]) for line in self.overlay_lines]
+        box = pygame.Rect(0, 0, max(surface.get_width() for surface in surfaces) + 8, line_height * len(surfaces) + 8)
+        self.screen.fill(GAME_COLORS["BLACK"], box)
+        for i, surface in enumerate(surfaces):
+            self.screen.blit(surface, (4, 4 + i * line_height))
+        self.dirty_rects.append(box)
+
+    def invalidate(self):
+        """Force a full redraw on the next frame, e.g. after the window was exposed."""
+        self.static_key = None
     
     def display_common_elements(self, state):
         """Displays elements common to most screens (like exit instructions)."""
@@ -81,71 +227,73 @@ class DisplayManager:
     
     def display_menu_common(self, title, options, selection, current_state, y_start=120):
         """Generic function to display a menu."""
-        self.screen.fill(GAME_COLORS["BLACK"])
-        self.display_text(title, (SCREEN_WIDTH // 2, 50), self.font, GAME_COLORS["WHITE"], center=True)
+        if self.begin_frame((current_state,)):
+            self.display_text(title, (SCREEN_WIDTH // 2, 50), self.font, GAME_COLORS["WHITE"], center=True)
+            instructions = "UP/DOWN arrows to select\nENTER to confirm"
+            self.display_text(instructions, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 70), self.instructions_font, GAME_COLORS["GREY"], center=True)
+            self.display_common_elements(current_state)
 
+        # Options are dynamic so that moving the selection only redraws the highlight
         for i, option in enumerate(options):
             color = GAME_COLORS["YELLOW"] if i == selection else GAME_COLORS["WHITE"]
-            self.display_text(option, (SCREEN_WIDTH // 2, y_start + i * 40), self.font, color, center=True)
-
-        instructions = "UP/DOWN arrows to select\nENTER to confirm"
-        self.display_text(instructions, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 70), self.instructions_font, GAME_COLORS["GREY"], center=True)
-        self.display_common_elements(current_state)
-        pygame.display.flip()
+            self.display_dynamic_text(f"option_{i}", option, (SCREEN_WIDTH // 2, y_start + i * 40), self.font, color, center=True)
+        self.end_frame()
     
     def display_not_implemented(self, state_manager):
         """Display a message if a state does not exist."""
-        self.screen.fill(GAME_COLORS["BLACK"])
-        mode_name = state_manager.state.upper().replace("_", " ")
-        self.display_text(mode_name, 
-                     (SCREEN_WIDTH // 2, 80), self.font, GAME_COLORS["WHITE"], center=True)
-        self.display_text("To be implemented soon!", 
-                     (SCREEN_WIDTH // 2, 150), self.font, GAME_COLORS["WHITE"], center=True)
-        self.display_common_elements(state_manager.state)
-        pygame.display.flip()
+        if self.begin_frame((state_manager.state,)):
+            mode_name = state_manager.state.upper().replace("_", " ")
+            self.display_text(mode_name, 
+                         (SCREEN_WIDTH // 2, 80), self.font, GAME_COLORS["WHITE"], center=True)
+            self.display_text("To be implemented soon!", 
+                         (SCREEN_WIDTH // 2, 150), self.font, GAME_COLORS["WHITE"], center=True)
+            self.display_common_elements(state_manager.state)
+        self.end_frame()
         
     def display_countdown(self, state_manager):
         """Display the countdown before starting a game."""
-        self.screen.fill(GAME_COLORS["BLACK"])
-        current_time = time.time()
-        elapsed = current_time - state_manager.countdown_start_time
+        self.begin_frame(("countdown", state_manager.countdown_start_time))
+        elapsed = (state_manager.clock.now_ms() - state_manager.countdown_start_time) / 1000
 
         if elapsed < 1: display_text = "3"
         elif elapsed < 2: display_text = "2"
         elif elapsed < 3: display_text = "1"
         else: display_text = "GO!"
 
-        self.display_text(display_text, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), 
-                     pygame.font.Font(None, 72), GAME_COLORS["YELLOW"], center=True)
-        pygame.display.flip()
+        self.display_dynamic_text("countdown", display_text, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), 
+                     self.countdown_font, GAME_COLORS["YELLOW"], center=True)
+        self.end_frame()
         
     def display_transmit_game(self, state_manager):
         """Displays the main transmit game screen."""
-        
-        # FIXME: draw only once per round
-        self.screen.fill(GAME_COLORS["BLACK"])
-        self.display_text(f"Transmit: {state_manager.char_to_be_guessed}", (20, 50), self.font)
-        self.display_text("Your input:", (20, 100), self.font)
-        self.display_text(f"Score: {state_manager.score}", (SCREEN_WIDTH - 100, 20), self.font, GAME_COLORS["YELLOW"])
-        self.display_common_elements(state_manager.state)
-
-        # Clear previous dynamic input area
-        input_rect = pygame.Rect(20, 130, SCREEN_WIDTH - 40, FONT_SIZE * 2)
-        self.screen.fill(GAME_COLORS["BLACK"], input_rect)
-        # Draw current input
-        self.display_text("".join(state_manager.transmit_input_chars), (20, 130), self.font)
-        # Clear previous status area
-        status_rect = pygame.Rect(SCREEN_WIDTH - 150, SCREEN_HEIGHT - 50, 130, FONT_SIZE)
-        self.screen.fill(GAME_COLORS["BLACK"], status_rect)
-
-        pygame.display.flip()
+        # Static layer is drawn once per round
+        if self.begin_frame(("transmit_game", state_manager.char_to_be_guessed)):
+            self.display_text(f"Transmit: {state_manager.char_to_be_guessed}", (20, 50), self.font)
+            self.display_text("Your input:", (20, 100), self.font)
+            self.display_common_elements(state_manager.state)
+
+        self.display_dynamic_text("score", f"Score: {state_manager.score}", (SCREEN_WIDTH - 100, 20), self.font, GAME_COLORS["YELLOW"])
+        self.display_dynamic_text("input", "".join(state_manager.transmit_input_chars), (20, 130), self.font)
+        self.display_keying_scope(state_manager)
+        self.end_frame()
+
+    def display_keying_scope(self, state_manager):
+        """Draw the scrolling key state strip; only the time since the last frame is new."""
+        if self.keying_scope is None:
+            self.keying_scope = KeyingScope(KEYING_SCOPE_RECT)
+        now_ns = state_manager.clock.now_ns()
+        new_columns = self.keying_scope.update(now_ns, state_manager.transmit_key_times, state_manager.key_down_ns)
+        if new_columns or self.full_redraw:
+            self.dirty_rects.append(self.keying_scope.draw(self.screen))
+        self.animating = self.keying_scope.scrolling(now_ns)
 
     def display_receive_game(self, state_manager):
-        self.screen.fill(GAME_COLORS["BLACK"])
-        self.display_text(f"Listen and type the character", (20, 50), self.font)
-        self.display_text(f"Score: {state_manager.score}", (SCREEN_WIDTH - 100, 20), self.font, GAME_COLORS["YELLOW"])
-        self.display_common_elements(state_manager.state)
-        pygame.display.flip()
+        if self.begin_frame(("receive_game", state_manager.char_to_receive)):
+            self.display_text(f"Listen and type the character", (20, 50), self.font)
+            self.display_common_elements(state_manager.state)
+
+        self.display_dynamic_text("score", f"Score: {state_manager.score}", (SCREEN_WIDTH - 100, 20), self.font, GAME_COLORS["YELLOW"])
+        self.end_frame()
 
     def display_result(self, state_manager):
         """Displays result after a transmit round."""
@@ -161,7 +309,10 @@ class DisplayManager:
 
     def display_result_common(self, result_msg, result_clr, score, correct_ans_text, user_guess_text=""):
         """Common display logic for result screens."""
-        self.screen.fill(GAME_COLORS["BLACK"])
+        # Results don't change while displayed, so the whole screen is static
+        if not self.begin_frame(("result", result_msg, result_clr, score, correct_ans_text, user_guess_text)):
+            self.end_frame()
+            return
 
         # Display result message (CORRECT/WRONG/INVALID)
         self.display_text(result_msg, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40), self.large_font, result_clr, center=True)
@@ -177,13 +328,13 @@ class DisplayManager:
         score_text = f"Score: {score}"
         self.display_text(score_text, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50), self.font, GAME_COLORS["YELLOW"], center=True)
 
-        pygame.display.flip()    
+        self.end_frame()
     
     def display_final_score(self, state_manager):
         """Display the final score before exiting or returning to menu."""
-        self.screen.fill(GAME_COLORS["BLACK"])
-        message = f"Final score: {state_manager.score}"
-        self.display_text(message, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), self.large_font, GAME_COLORS["YELLOW"], center=True)
-        pygame.display.flip()
+        if self.begin_frame(("final_score", state_manager.score)):
+            message = f"Final score: {state_manager.score}"
+            self.display_text(message, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), self.large_font, GAME_COLORS["YELLOW"], center=True)
+        self.end_frame()
 
 
@@ -0,0 +1,83 @@
+import json
+import time
+from collections import deque
+
+HISTORY_SIZE = 600  # Frames kept per (state, phase) for the rolling percentiles, 10 s at 60 FPS
+TRACE_SIZE = 200_000  # Phase events kept for the trace dump
+
+
+class FrameProfiler:
+    """Per-phase frame timers for the game loop.
+
+    The loop calls `begin_frame` at the start of a frame, `mark(phase)` at the end
+    of each phase and `end_frame` when the frame is done; a phase lasts from the
+    previous mark, and a phase marked several times in one frame is summed. Frame
+    totals are kept in fixed-size rings per game state for p50/p95/p99, and every
+    mark as a complete event for a Chrome/Perfetto trace ("traceEvents" JSON).
+    When disabled the loop skips the calls.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin_ns = time.perf_counter_ns()
+        self.samples = {}  # (state, phase) -> deque of durations in ns
+        self.trace_events = deque(maxlen=TRACE_SIZE)  # (phase, state, start_ns, duration_ns)
+        self.frame_state = None
+        self.frame_totals = {}  # phase -> ns spent in it this frame
+        self.last_mark_ns = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def begin_frame(self, state):
+        self.frame_state = state
+        self.frame_totals = {}
+        self.last_mark_ns = time.perf_counter_ns()
+
+    def mark(self, phase):
+        """End `phase` of the current frame."""
+        now = time.perf_counter_ns()
+        duration = now - self.last_mark_ns
+        self.frame_totals[phase] = self.frame_totals.get(phase, 0) + duration
+        self.trace_events.append((phase, self.frame_state, self.last_mark_ns, duration))
+        self.last_mark_ns = now
+
+    def end_frame(self):
+        """Add the phase totals of the current frame to the rolling history."""
+        for phase, duration in self.frame_totals.items():
+            key = (self.frame_state, phase)
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=HISTORY_SIZE)
+            samples.append(duration)
+        self.frame_totals = {}
+
+    def percentiles(self, state, phase):
+        """(p50, p95, p99) of a phase in the given state, in milliseconds."""
+        samples = self.samples.get((state, phase))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[int(last * q)] / 1e6 for q in (0.50, 0.95, 0.99))
+
+    def summary_lines(self, state):
+        """Overlay text for the given game state."""
+        lines = [f"{state}  p50 / p95 / p99 ms"]
+        for (sample_state, phase) in self.samples:
+            if sample_state == state:
+                p50, p95, p99 = self.percentiles(state, phase)
+                lines.append(f"{phase:<8} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        return lines
+
+    def dump_trace(self, path):
+        """Write the recorded phases as a Chrome trace file (chrome://tracing, Perfetto)."""
+        events = [
+            {"name": phase, "cat": state, "ph": "X", "pid": 1, "tid": 1,
+             "ts": (start_ns - self.origin_ns) / 1000, "dur": duration_ns / 1000}
+            for phase, state, start_ns, duration_ns in self.trace_events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
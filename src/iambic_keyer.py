@@ -0,0 +1,174 @@
+import threading
+import time
+
+DEFAULT_KEYER_WPM = 20
+SPIN_NS = 500_000  # The keyer thread sleeps until this close to an edge, then spins for the exact time
+KEYER_MODES = ("A", "B")
+
+
+class IambicKeyer:
+    """Iambic paddle keyer, Mode A or B, with dot and dash memory.
+
+    A pure state machine on nanosecond timestamps: `set_paddles` reports paddle
+    changes, and `step(now_ns)` advances to `now_ns` and returns the elements started
+    on the way as (symbol, start_ns, end_ns). Element and space lengths come from the
+    speed alone, so the timing is exact however late `step` is called; `on_key(down)`
+    is called on every key edge to drive the sidetone.
+
+    Pressing the opposite paddle while an element is sent, or any paddle during a
+    space or while idle, is remembered and sent next (memory). In Mode B a paddle
+    already held when an element starts counts as well, so releasing a squeeze sends
+    one more alternate element; in Mode A it stops.
+    """
+
+    def __init__(self, wpm=DEFAULT_KEYER_WPM, mode="B", on_key=None):
+        if mode not in KEYER_MODES:
+            raise ValueError(f"Unknown keyer mode '{mode}'.")
+        self.mode = mode
+        self.on_key = on_key
+        self.set_wpm(wpm)
+
+        self.paddles = {'.': False, '-': False}
+        self.memory = {'.': False, '-': False}
+        self.element = None  # Symbol being sent or followed by its space; None when idle
+        self.key_down = False
+        self.element_end_ns = 0  # Key up of the current element
+        self.space_end_ns = 0  # Earliest start of the next element
+        self.press_ns = None  # When a paddle was pressed while idle
+        self.press_symbol = None  # Which paddle it was
+
+    def set_wpm(self, wpm):
+        self.unit_ns = int(round(1.2 / wpm * 1e9))
+
+    def set_paddles(self, dot, dash, now_ns):
+        """Report the paddle state at `now_ns`."""
+        pressed = {'.': dot, '-': dash}
+        for symbol, down in pressed.items():
+            if down and not self.paddles[symbol]:
+                # A tap is remembered even if released before the keyer gets to it,
+                # except a tap of the paddle whose element is being keyed
+                if not self.key_down or symbol != self.element:
+                    self.memory[symbol] = True
+                if self.element is None and self.press_ns is None:
+                    self.press_ns = now_ns
+                    self.press_symbol = symbol
+        self.paddles = pressed
+
+    def next_event_ns(self):
+        """Time of the next key edge or decision, or None when waiting for the paddles."""
+        if self.key_down:
+            return self.element_end_ns
+        if self.element is not None:
+            return self.space_end_ns
+        if self.press_ns is not None:
+            return self.press_ns
+        return None
+
+    def step(self, now_ns):
+        """Advance to `now_ns` and return the elements started, as (symbol, start_ns, end_ns)."""
+        started = []
+        while True:
+            if self.key_down:
+                if now_ns < self.element_end_ns:
+                    return started
+                self.key_down = False
+                if self.on_key:
+                    self.on_key(False)
+
+            if self.element is not None:
+                if now_ns < self.space_end_ns:
+                    return started
+                start_ns = self.space_end_ns
+                symbol = self._next_symbol()
+            else:
+                if self.press_ns is None:
+                    return started
+                start_ns = self.press_ns
+                symbol = self.press_symbol
+
+            self.press_ns = None
+            if symbol is None:
+                self.element = None
+                return started
+            started.append(self._start(symbol, start_ns))
+
+    def _next_symbol(self):
+        """Symbol to send after the current element's space: the other one if it is
+        held or remembered, the same one if it is still held, else nothing."""
+        other = '-' if self.element == '.' else '.'
+        if self.memory[other] or self.paddles[other]:
+            return other
+        if self.paddles[self.element] or self.memory[self.element]:
+            return self.element
+        return None
+
+    def _start(self, symbol, start_ns):
+        other = '-' if symbol == '.' else '.'
+        self.memory[symbol] = False
+        if self.mode == "B" and self.paddles[other]:
+            self.memory[other] = True
+        self.element = symbol
+        self.key_down = True
+        self.element_end_ns = start_ns + self.unit_ns * (1 if symbol == '.' else 3)
+        self.space_end_ns = self.element_end_ns + self.unit_ns
+        if self.on_key:
+            self.on_key(True)
+        return symbol, start_ns, self.element_end_ns
+
+
+class KeyerThread:
+    """Runs an IambicKeyer on its own thread, independent of the frame rate.
+
+    The thread sleeps until the keyer's next edge (spinning for the last SPIN_NS) or
+    a paddle change, and calls `on_element(symbol, start_ns, end_ns)` for each element
+    started. Timestamps are `clock.now_ns()` time, like the input event timestamps.
+    """
+
+    def __init__(self, keyer, clock, on_element):
+        self.keyer = keyer
+        self.clock = clock
+        self.on_element = on_element
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="iambic-keyer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join()
+
+    def set_paddles(self, dot, dash, timestamp_ns):
+        with self.condition:
+            self.keyer.set_paddles(dot, dash, timestamp_ns)
+            self.condition.notify()
+
+    def set_wpm(self, wpm):
+        with self.condition:
+            self.keyer.set_wpm(wpm)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                now = self.clock.now_ns()
+                for element in self.keyer.step(now):
+                    self.on_element(*element)
+
+                next_ns = self.keyer.next_event_ns()
+                if next_ns is None:
+                    self.condition.wait()
+                    continue
+                if next_ns - now > SPIN_NS:
+                    self.condition.wait((next_ns - now - SPIN_NS) / 1e9)
+                    continue
+            # Spin without the lock, so paddle changes are not held up until the edge
+            while self.clock.now_ns() < next_ns:
+                time.sleep(0)
@@ -1,21 +1,65 @@
 import pygame
-import time
 from src.commons import ALL_TO_MORSE as ALL_CHARS_TO_MORSE
 
-# TODO: should be modifiable?
-THRESHOLD = 0.2  # Time threshold for dot vs dash
+KEYER_ELEMENT_EVENT = pygame.USEREVENT + 4  # Posted by the keyer thread for each element it starts
+KEYER_KEY_EVENT = pygame.USEREVENT + 6  # Posted by the keyer thread on each key edge, to key the sidetone
+REMOTE_KEY_EVENT = pygame.USEREVENT + 7  # Posted by the relay client thread on each remote operator's key edge
+DOT_PADDLE_KEY = pygame.K_LCTRL
+DASH_PADDLE_KEY = pygame.K_RCTRL
+PADDLE_KEYS = (DOT_PADDLE_KEY, DASH_PADDLE_KEY)
 
 class InputHandler:
-    def __init__(self, state_manager, display_manager, sound_manager):
+    def __init__(self, state_manager, display_manager, sound_manager, keyer=None, relay=None):
+        """`keyer` is an iambic_keyer.KeyerThread for paddles, or None for the straight key only.
+        Straight key edges are also sent to `relay` (a relay.RelayClient) in the networked mode."""
         self.state_manager = state_manager
         self.display_manager = display_manager
         self.sound_manager = sound_manager
+        self.keyer = keyer
+        self.relay = relay
+        self.paddles = {DOT_PADDLE_KEY: False, DASH_PADDLE_KEY: False}
+        self.straight_key_down = False  # Space is held, as far as the sidetone is concerned
+        self.keyer_key_down = False
+        self.event_time_ns = 0  # Capture time of the event being handled, state_manager.clock.now_ns() time
         
-    def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
+    def handle_event(self, event, timestamp_ns=None):
+        """Handle a pygame event; `timestamp_ns` is when it was captured (defaults to now)."""
+        self.event_time_ns = timestamp_ns if timestamp_ns is not None else self.state_manager.clock.now_ns()
+        if self.keyer and event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in PADDLE_KEYS:
+            self._handle_paddle(event)
+        elif event.type == pygame.KEYDOWN:
             self.handle_keydown(event)
         elif event.type == pygame.KEYUP:
             self.handle_keyup(event)
+        elif event.type == KEYER_ELEMENT_EVENT and self.state_manager.state == "transmit_game":
+            self.state_manager.add_keyer_element(event.symbol, event.start_ns, event.end_ns, event.unit_ns)
+        elif event.type == KEYER_KEY_EVENT:
+            self._handle_keyer_key(event.down, event.timestamp_ns)
+        elif event.type == REMOTE_KEY_EVENT:
+            self.sound_manager.set_remote_key(event.operator_id, event.down)
+
+    def _handle_keyer_key(self, down, timestamp_ns):
+        """Key the sidetone for the paddle keyer, on the game thread and only in the transmit game."""
+        if down and self.state_manager.state != "transmit_game":
+            return
+        if down != self.keyer_key_down:
+            self.keyer_key_down = down
+            if self.relay:
+                self.relay.send_key(down, timestamp_ns)
+        self._update_sidetone()
+
+    def _update_sidetone(self):
+        """The tone sounds while either the straight key or the keyer is down."""
+        down = self.straight_key_down or self.keyer_key_down
+        if down and not self.sound_manager.sound_playing:
+            self.sound_manager.start_tone()
+        elif not down and self.sound_manager.sound_playing:
+            self.sound_manager.stop_tone()
+
+    def _handle_paddle(self, event):
+        """Pass paddle changes to the keyer; it keys the sidetone and sends the elements back."""
+        self.paddles[event.key] = event.type == pygame.KEYDOWN
+        self.keyer.set_paddles(self.paddles[DOT_PADDLE_KEY], self.paddles[DASH_PADDLE_KEY], self.event_time_ns)
     
     def handle_keydown(self, event):
         """Handle key press events. State-specific handlers are called based on the
@@ -38,8 +82,9 @@ class InputHandler:
     
     def handle_keyup(self, event):
         """Handle key release events."""
-        # Handle specific key releases for states
-        if self.state_manager.state == "transmit_game" and event.key == pygame.K_SPACE:
+        # The release of a press made in a transmit round is handled in any state,
+        # so the tone stops even if the round ended while Space was held
+        if event.key == pygame.K_SPACE and self.straight_key_down:
             self._handle_keyup_transmit_game()
     
     # --- Global key handlers ---
@@ -47,18 +92,14 @@ class InputHandler:
     def _handle_escape(self):
         """Handle escape key globally."""
         if self.state_manager.state in ["transmit_game", "receive_game"]:
-            self.state_manager.exiting_to = "quit"
-            self.state_manager.state = "final_score"
-            self.state_manager.result_display_time = pygame.time.get_ticks()
+            self.state_manager.end_session("quit")
         else:
             self.state_manager.state = "quit"
     
     def _handle_backspace(self):
         """Handle backspace key globally."""
         if self.state_manager.state in ["transmit_game", "receive_game", "result", "receive_result"]:
-            self.state_manager.exiting_to = "menu"
-            self.state_manager.state = "final_score"
-            self.state_manager.result_display_time = pygame.time.get_ticks()
+            self.state_manager.end_session("menu")
         elif self.state_manager.state in ["play_menu", "practice_sub_menu", "settings"]:
             self.state_manager.state = "menu"
             # Reset selections
@@ -67,7 +108,7 @@ class InputHandler:
         elif self.state_manager.state in ["practice_char_to_morse", "practice_morse_to_char"]:
             self.state_manager.state = "practice_sub_menu"
         elif self.state_manager.state == "countdown":
-            self.state_manager.state = "menu"
+            self.state_manager.cancel_countdown()
     
     # --- State-specific key handlers ---
     def _handle_keydown_menu(self, event):
@@ -91,12 +132,10 @@ class InputHandler:
         elif event.key == pygame.K_DOWN:
             self.state_manager.play_menu_selection = (self.state_manager.play_menu_selection + 1) % 2
         elif event.key == pygame.K_RETURN:
-            self.state_manager.state = "countdown"
-            self.state_manager.countdown_start_time = time.time()
             if self.state_manager.play_menu_selection == 0:  # Receive
-                self.state_manager.next_state_after_countdown = "receive_game"
+                self.state_manager.start_countdown("receive_game")
             else:
-                self.state_manager.next_state_after_countdown = "transmit_game"
+                self.state_manager.start_countdown("transmit_game")
     
     def _handle_keydown_practice_sub_menu(self, event):
         """Handle key presses in practice submenu."""
@@ -112,24 +151,27 @@ class InputHandler:
     
     def _handle_keydown_transmit_game(self, event):
         """Handle key presses in transmit game."""
-        if event.key == pygame.K_SPACE and not self.sound_manager.sound_playing:
-            self.state_manager.transmit_start_time = time.time()
-            self.sound_manager.start_tone()
-            self.state_manager.transmit_last_input_time = 0
+        if event.key == pygame.K_SPACE and not self.straight_key_down:
+            self.straight_key_down = True
+            self.state_manager.begin_key_press(self.event_time_ns)
+            self._update_sidetone()
+            if self.relay:
+                self.relay.send_key(True, self.event_time_ns)
 
     def _handle_keyup_transmit_game(self):
         """Handle space key release in transmit game."""
-        if self.sound_manager.sound_playing:
-            self.sound_manager.stop_tone()
-            time_pressed = time.time() - self.state_manager.transmit_start_time
-            self.state_manager.transmit_input_chars.append("-" if time_pressed > THRESHOLD else ".")
-            self.state_manager.transmit_last_input_time = pygame.time.get_ticks()
+        self.straight_key_down = False
+        self._update_sidetone()
+        if self.relay:
+            self.relay.send_key(False, self.event_time_ns)
+        # A press from an earlier round (key_down_ns was reset) is not part of this round's input
+        if self.state_manager.state == "transmit_game" and self.state_manager.key_down_ns is not None:
+            self.state_manager.complete_key_press(self.state_manager.key_down_ns, self.event_time_ns)
 
     def _handle_keydown_receive_game(self, event):
         """Handle key presses in receive game."""
-        if not self.sound_manager.is_sound_thread_active():
+        if not self.sound_manager.is_character_playing():
             if event.unicode.upper() in ALL_CHARS_TO_MORSE:
                 self.state_manager.receive_input_char = event.unicode.upper()
-            self.state_manager.result_display_time = pygame.time.get_ticks()
 
     
\ No newline at end of file
@@ -0,0 +1,331 @@
+import mmap
+import random
+import struct
+import sys
+import time
+from array import array
+import pygame
+from src.clock import FakeClock
+from src.iambic_keyer import IambicKeyer
+from src.input_handler import InputHandler, KEYER_ELEMENT_EVENT
+from src.simulation import NullSoundManager, StaticConfig
+from src.state_manager import StateManager
+
+MAGIC = b"MKEY"
+VERSION = 3  # Version 2 added CONFIG records, version 3 PLAYING records; older logs read the same
+# Magic, version, keyer mode, start time ns, input timeout ms, keyer wpm; 24 bytes keeps the records 8-byte aligned
+HEADER = struct.Struct("<4sHHqII")
+FIELDS = 4  # int64 values per record: timestamp ns, kind, key, value
+# Record kinds; TARGET is a practice character drawn for a round, CONFIG a setting reloaded mid-session,
+# PLAYING follows a key press that was ignored because the round's character was still playing
+KEY_DOWN, KEY_UP, TARGET, CONFIG, PLAYING = 1, 2, 3, 4, 5
+GAME_MODES = ("transmit_game", "receive_game")  # Key of TARGET records
+KEYER_MODES = ("straight", "iambic_a", "iambic_b")
+# Key of CONFIG records: the settings a replay depends on. Keyer modes are logged as KEYER_MODES indices.
+RECORDED_SETTINGS = ("general.input_timeout_ms", "transmit_game.keyer_mode", "transmit_game.keyer_wpm")
+REPLAY_TAIL_MS = 60_000  # Timers still run this long after the last record
+
+
+class KeyEventLog:
+    """Compact binary log of key events, for replaying a session exactly.
+
+    Records are four int64 values in one `array('q')`: the capture timestamp in ns,
+    the kind, the pygame key and the typed character's code point. The characters
+    drawn for each round are logged too (TARGET records), so a replay gets the
+    same rounds whatever the character weights, and so are the RECORDED_SETTINGS
+    reloaded during the session (CONFIG records); the HEADER holds their values at
+    the start. Receive answers typed while the character was still playing are
+    ignored by the game, so those key presses are marked (PLAYING records) and
+    a replay ignores the same ones, whatever the audio timing. Saved files are a HEADER and
+    the raw little-endian records; `load` maps the file and reads the records in
+    place through a memoryview, so even long sessions open instantly.
+    """
+
+    def __init__(self, start_ns=0, input_timeout_ms=1000, keyer_mode="straight", keyer_wpm=20, records=None):
+        self.start_ns = start_ns
+        self.input_timeout_ms = input_timeout_ms
+        self.keyer_mode = keyer_mode
+        self.keyer_wpm = keyer_wpm
+        self.records = records if records is not None else array('q')
+        self._mapping = None
+
+    def __len__(self):
+        return len(self.records) // FIELDS
+
+    def __iter__(self):
+        records = self.records
+        for index in range(0, len(records), FIELDS):
+            yield records[index], records[index + 1], records[index + 2], records[index + 3]
+
+    def record_event(self, event, timestamp_ns):
+        """Log a KEYDOWN or KEYUP pygame event; other events are ignored."""
+        if event.type == pygame.KEYDOWN:
+            kind = KEY_DOWN
+        elif event.type == pygame.KEYUP:
+            kind = KEY_UP
+        else:
+            return
+        text = getattr(event, "unicode", "")
+        self.records.extend((timestamp_ns, kind, event.key, ord(text[0]) if text else 0))
+
+    def record_target(self, mode, character, timestamp_ns):
+        self.records.extend((timestamp_ns, TARGET, GAME_MODES.index(mode), ord(character)))
+
+    def record_config(self, path, value, timestamp_ns):
+        """Log a reloaded setting; settings not in RECORDED_SETTINGS are ignored."""
+        if path not in RECORDED_SETTINGS:
+            return
+        if path == "transmit_game.keyer_mode":
+            value = KEYER_MODES.index(value)
+        self.records.extend((timestamp_ns, CONFIG, RECORDED_SETTINGS.index(path), int(value)))
+
+    def record_playing(self, timestamp_ns):
+        self.records.extend((timestamp_ns, PLAYING, 0, 0))
+
+    def key_event_count(self):
+        """The number of KEY_DOWN and KEY_UP records."""
+        records = self.records
+        return sum(1 for index in range(1, len(records), FIELDS) if records[index] in (KEY_DOWN, KEY_UP))
+
+    def save(self, path):
+        records = array('q', self.records)
+        if sys.byteorder == "big":
+            records.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, KEYER_MODES.index(self.keyer_mode), self.start_ns,
+                                self.input_timeout_ms, self.keyer_wpm))
+            records.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or header[:4] != MAGIC:
+                raise ValueError(f"'{path}' is not a key event log.")
+            _, version, keyer_mode, start_ns, input_timeout_ms, keyer_wpm = HEADER.unpack(header)
+            if not 1 <= version <= VERSION:
+                raise ValueError(f"Unsupported key event log version {version} in '{path}'.")
+            size = f.seek(0, 2)
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > HEADER.size else None
+
+        if mapping is None:
+            records = array('q')
+        elif sys.byteorder == "little":
+            records = memoryview(mapping)[HEADER.size:].cast('q')
+        else:
+            records = array('q', mapping[HEADER.size:])
+            records.byteswap()
+        log = cls(start_ns, input_timeout_ms, KEYER_MODES[keyer_mode], keyer_wpm, records)
+        log._mapping = mapping
+        return log
+
+    def close(self):
+        if self._mapping is not None:
+            if isinstance(self.records, memoryview):
+                self.records.release()
+            self._mapping.close()
+            self._mapping = None
+
+
+class RecordingSampler:
+    """Logs every character a game mode's sampler draws."""
+
+    def __init__(self, sampler, log, mode, clock):
+        self.sampler = sampler
+        self.log = log
+        self.mode = mode
+        self.clock = clock
+
+    def sample(self):
+        character = self.sampler.sample()
+        self.log.record_target(self.mode, character, self.clock.now_ns())
+        return character
+
+    def __getattr__(self, name):
+        return getattr(self.sampler, name)
+
+
+class ReplaySampler:
+    """Gives back the characters of a log in order; draws new ones if the replay runs past them."""
+
+    def __init__(self, sampler, characters):
+        self.sampler = sampler
+        self.characters = list(reversed(characters))
+        self.extra_draws = 0
+
+    def sample(self):
+        if self.characters:
+            return self.characters.pop()
+        self.extra_draws += 1
+        return self.sampler.sample()
+
+    def __getattr__(self, name):
+        return getattr(self.sampler, name)
+
+
+class RecordingSoundManager:
+    """Logs every time the input handler finds the receive character still playing."""
+
+    def __init__(self, sound_manager, log, clock):
+        self.sound_manager = sound_manager
+        self.log = log
+        self.clock = clock
+
+    def is_character_playing(self):
+        playing = self.sound_manager.is_character_playing()
+        if playing:
+            self.log.record_playing(self.clock.now_ns())
+        return playing
+
+    def __getattr__(self, name):
+        return getattr(self.sound_manager, name)
+
+
+class ReplaySoundManager(NullSoundManager):
+    """Reports the character as playing exactly where the log says the live game found it playing."""
+
+    def __init__(self, replayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def is_character_playing(self):
+        return self.replayer.take_playing()
+
+
+def record_targets(state_manager, log):
+    """Log the characters `state_manager` draws from now on."""
+    for mode, sampler in state_manager.character_samplers.items():
+        state_manager.character_samplers[mode] = RecordingSampler(sampler, log, mode, state_manager.clock)
+
+
+def record_playback(input_handler, log):
+    """Log the key presses `input_handler` ignores from now on because a character is playing."""
+    input_handler.sound_manager = RecordingSoundManager(input_handler.sound_manager, log,
+                                                        input_handler.state_manager.clock)
+
+
+class KeyEventReplayer:
+    """Feeds a KeyEventLog through InputHandler.handle_event with the original timestamps.
+
+    The game runs on a FakeClock from the log's start time, without pygame display
+    or audio. Between events the clock jumps to each state timer and keyer edge in
+    order, as the game loop would have handled them, so a replay is deterministic
+    and, unless `realtime`, runs as fast as the game logic allows. `seed` only
+    matters for characters drawn after the logged ones run out.
+    """
+
+    def __init__(self, log, seed=None):
+        self.log = log
+        self.clock = FakeClock()
+        self.clock.time_ns = log.start_ns
+        self.state_manager = StateManager(ReplaySoundManager(self), StaticConfig(log.input_timeout_ms), self.clock,
+                                          rng=random.Random(seed))
+        self.upcoming = None  # The record after the key event being handled
+        self.keyer_wpm = log.keyer_wpm
+        self.keyer = self._make_keyer(log.keyer_mode)
+        # The keyer is stepped on the replay clock here rather than by a KeyerThread
+        self.input_handler = InputHandler(self.state_manager, None, self.state_manager.sound_manager, keyer=self.keyer)
+
+        targets = {mode: [] for mode in GAME_MODES}
+        for _, kind, key, value in log:
+            if kind == TARGET:
+                targets[GAME_MODES[key]].append(chr(value))
+        for mode, sampler in self.state_manager.character_samplers.items():
+            self.state_manager.character_samplers[mode] = ReplaySampler(sampler, targets[mode])
+
+        self.transitions = []  # (clock ms, new state, result message)
+        self.results = {"CORRECT!": 0, "WRONG!": 0, "INVALID MORSE!": 0}
+
+    def _make_keyer(self, keyer_mode):
+        if keyer_mode == "straight":
+            return None
+        return IambicKeyer(self.keyer_wpm, keyer_mode[-1].upper())
+
+    def apply_config(self, path, value):
+        """Change a setting as a config reload in the live game did."""
+        if path == "general.input_timeout_ms":
+            self.state_manager.config_manager.input_timeout_ms = value
+        elif path == "transmit_game.keyer_wpm":
+            self.keyer_wpm = value
+            if self.keyer:
+                self.keyer.set_wpm(value)
+        else:
+            self.keyer = self.input_handler.keyer = self._make_keyer(KEYER_MODES[value])
+        self.state_manager.on_config_changed({path})
+
+    def take_playing(self):
+        """True if the live game found the character playing while handling this key event."""
+        if self.upcoming is not None and self.upcoming[1] == PLAYING:
+            self.upcoming = next(self.remaining, None)
+            return True
+        return False
+
+    def run(self, realtime=False):
+        """Replay the whole log and return statistics and the state transitions."""
+        state_manager = self.state_manager
+        clock = self.clock
+        wall_start_ns = time.perf_counter_ns()
+        events = 0
+        records = self.remaining = iter(self.log)
+        record = next(records, None)
+        last_state = state_manager.state
+        end_ns = None
+
+        while True:
+            now_ns = clock.now_ns()
+            candidates = []
+            if record is not None:
+                candidates.append(record[0])
+            deadline_ms = state_manager.next_deadline_ms(clock.now_ms())
+            if deadline_ms is not None:
+                candidates.append((clock.now_ms() + deadline_ms) * 1_000_000)
+            if self.keyer and self.keyer.next_event_ns() is not None:
+                candidates.append(self.keyer.next_event_ns())
+            if record is None:
+                end_ns = end_ns or now_ns + REPLAY_TAIL_MS * 1_000_000
+                candidates = [t for t in candidates if t <= end_ns]
+            if not candidates:
+                break
+
+            target_ns = max(min(candidates), now_ns)
+            if realtime:
+                lag_ns = (target_ns - self.log.start_ns) - (time.perf_counter_ns() - wall_start_ns)
+                if lag_ns > 0:
+                    time.sleep(lag_ns / 1e9)
+            clock.time_ns = target_ns
+
+            if self.keyer:
+                for symbol, start_ns, end in self.keyer.step(target_ns):
+                    self.input_handler.handle_event(pygame.event.Event(
+                        KEYER_ELEMENT_EVENT, symbol=symbol, start_ns=start_ns, end_ns=end, unit_ns=self.keyer.unit_ns))
+            state_manager.update(clock.now_ms())
+            if record is not None and record[0] <= target_ns:
+                timestamp_ns, kind, key, value = record
+                self.upcoming = next(records, None)
+                if kind == CONFIG:
+                    self.apply_config(RECORDED_SETTINGS[key], value)
+                elif kind != TARGET:
+                    event_type = pygame.KEYDOWN if kind == KEY_DOWN else pygame.KEYUP
+                    self.input_handler.handle_event(
+                        pygame.event.Event(event_type, key=key, unicode=chr(value) if value else ""), timestamp_ns)
+                    state_manager.update(clock.now_ms())
+                    events += 1
+                record, self.upcoming = self.upcoming, None
+
+            if state_manager.state != last_state:
+                last_state = state_manager.state
+                message = state_manager.result_message if last_state in ("result", "receive_result") else ""
+                self.transitions.append((clock.now_ms(), last_state, message))
+                if message:
+                    self.results[message] += 1
+
+        wall_seconds = (time.perf_counter_ns() - wall_start_ns) / 1e9
+        return {
+            "events": events,
+            "results": dict(self.results),
+            "final_state": state_manager.state,
+            "simulated_seconds": (clock.now_ns() - self.log.start_ns) / 1e9,
+            "wall_seconds": wall_seconds,
+            "extra_draws": sum(sampler.extra_draws for sampler in state_manager.character_samplers.values()),
+            "transitions": self.transitions,
+        }
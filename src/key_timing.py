@@ -0,0 +1,59 @@
+import time
+from collections import deque
+import pygame
+
+JITTER_WINDOW = 1024  # Number of recent key events kept for the jitter report
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+
+
+class KeyTimingCapture:
+    """Stamps pygame events with time.perf_counter_ns as soon as they leave the queue.
+
+    pygame does not expose SDL event timestamps, so the capture error of a key event
+    is bounded by how long ago the queue was last checked. Waiting in `wait_events`
+    instead of sleeping between frames keeps that bound below a millisecond; the
+    bounds of recent key events are kept for `jitter_report`.
+    """
+
+    def __init__(self):
+        self.last_check_ns = time.perf_counter_ns()
+        self.key_event_bounds_ns = deque(maxlen=JITTER_WINDOW)
+
+    def poll_events(self):
+        """Return all queued events as (event, timestamp_ns) pairs without blocking."""
+        now = time.perf_counter_ns()
+        events = pygame.event.get()
+        self._record(events, now - self.last_check_ns)
+        self.last_check_ns = now
+        return [(event, now) for event in events]
+
+    def wait_events(self, timeout_ms):
+        """Block until an event arrives or `timeout_ms` passes (0 waits forever).
+
+        The event that ends the wait is stamped the moment it wakes us up.
+        """
+        event = pygame.event.wait(timeout_ms)
+        now = time.perf_counter_ns()
+        self.last_check_ns = now
+        if event.type == pygame.NOEVENT:
+            return []
+
+        self._record([event], 0)
+        return [(event, now)] + self.poll_events()
+
+    def _record(self, events, bound_ns):
+        for event in events:
+            if event.type in KEY_EVENTS:
+                self.key_event_bounds_ns.append(bound_ns)
+
+    def jitter_report(self):
+        """Summary of the capture error bound of recent key events, in milliseconds."""
+        if not self.key_event_bounds_ns:
+            return None
+        bounds = sorted(self.key_event_bounds_ns)
+        return {
+            "samples": len(bounds),
+            "mean_ms": sum(bounds) / len(bounds) / 1e6,
+            "p95_ms": bounds[min(len(bounds) - 1, int(len(bounds) * 0.95))] / 1e6,
+            "max_ms": bounds[-1] / 1e6,
+        }
@@ -0,0 +1,59 @@
+DEFAULT_DOT_SECONDS = 0.1  # 12 WPM, puts the initial dot/dash boundary at the old 0.2 s threshold
+CLUSTER_ALPHA = 0.25  # EWMA weight of a new element in the dot/dash estimates
+OUTLIER_ALPHA = 0.5  # Faster weight for elements outside the two clusters, to catch up with speed changes
+CHARACTER_GAP_UNITS = 5  # Gap that ends a character: between the 3-unit letter gap and 7-unit word gap
+MIN_CHARACTER_GAP_MS = 150
+WARMUP_ELEMENTS = 4  # Elements needed before the learned timing replaces the configured timeout
+
+
+class AdaptiveKeyingClassifier:
+    """Online two-cluster classifier for dot and dash lengths.
+
+    Keeps an EWMA of dot lengths and of dash lengths and classifies each element by
+    the midpoint between them, in O(1) time and memory per element. Elements shorter
+    than the dot estimate or longer than the dash estimate are learned faster, and each
+    element may pull the other cluster closer (never further) to the standard 1:3 ratio,
+    so a wrong initial speed is corrected even while the clusters are still mixed up.
+    Lengths can be in any unit (seconds, detector blocks...) as long as it is consistent.
+    """
+
+    def __init__(self, dot_length=DEFAULT_DOT_SECONDS, alpha=CLUSTER_ALPHA):
+        self.dot_length = dot_length
+        self.dash_length = 3 * dot_length
+        self.alpha = alpha
+        self.elements_seen = 0
+
+    @property
+    def threshold(self):
+        """Element length above which an element is a dash."""
+        return (self.dot_length + self.dash_length) / 2
+
+    @property
+    def unit(self):
+        """Estimated length of one dot unit, taking both clusters into account."""
+        return (self.dot_length + self.dash_length / 3) / 2
+
+    def classify(self, length):
+        """Classify an element as '.' or '-' and learn from it."""
+        self.elements_seen += 1
+        alpha = max(self.alpha, 1 / (self.elements_seen + 1))  # Learn quickly from the first elements
+        if length < self.threshold:
+            own_alpha = alpha if length >= self.dot_length else max(alpha, OUTLIER_ALPHA)
+            self.dot_length += own_alpha * (length - self.dot_length)
+            self.dash_length += alpha / 2 * min(3 * length - self.dash_length, 0)
+            return '.'
+        own_alpha = alpha if length <= self.dash_length else max(alpha, OUTLIER_ALPHA)
+        self.dash_length += own_alpha * (length - self.dash_length)
+        self.dot_length += alpha / 2 * max(length / 3 - self.dot_length, 0)
+        return '-'
+
+    def wpm(self, seconds_per_length=1.0):
+        """Estimated speed in words per minute (PARIS standard)."""
+        return 1.2 / (self.unit * seconds_per_length)
+
+    def character_gap_ms(self, max_ms, seconds_per_length=1.0):
+        """Silence after which the current character is complete, capped at `max_ms`."""
+        if self.elements_seen < WARMUP_ELEMENTS:
+            return max_ms
+        gap_ms = CHARACTER_GAP_UNITS * self.unit * seconds_per_length * 1000
+        return int(min(max(gap_ms, MIN_CHARACTER_GAP_MS), max_ms))
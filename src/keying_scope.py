@@ -0,0 +1,108 @@
+import numpy as np
+import pygame
+
+SCOPE_MS_PER_COLUMN = 5  # A 360 pixel strip shows the last 1.8 seconds
+TRACE_COLOR = (0, 255, 0)
+FILL_COLOR = (0, 80, 0)
+BACKGROUND_COLOR = (0, 0, 0)
+TRACE_MARGIN = 4  # Pixels between the trace and the top and bottom of the strip
+UP, DOWN, EDGE = 0, 1, 2  # Column kinds
+
+
+class KeyingScope:
+    """Scrolling strip of the key state, like an oscilloscope trace: high while the
+    key is down, low while it is up, newest at the right.
+
+    Every column stands for `ms_per_column` of clock time. The strip is a ring
+    buffer: `update` writes only the columns for the time passed since the last
+    frame, at the ring's head, into an offscreen surface through
+    `pygame.surfarray`, and `draw` blits the surface in two parts so the oldest
+    column is on the left. Column pixels come from three precomputed templates
+    (up, down, edge), so a frame costs a few NumPy operations, whatever its length.
+    """
+
+    def __init__(self, rect, ms_per_column=SCOPE_MS_PER_COLUMN):
+        self.rect = pygame.Rect(rect)
+        self.column_ns = int(ms_per_column * 1_000_000)
+        self.surface = pygame.Surface(self.rect.size, 0, 32)
+        self.surface.fill(BACKGROUND_COLOR)
+        self.templates = self._column_templates()
+        self.levels = np.zeros(self.rect.width, dtype=bool)  # Key state of each column, ring buffer order
+        self.head = 0  # Ring index of the next column
+        self.last_column_ns = None  # Clock time of the newest column
+        self.intervals = set()  # (down_ns, up_ns) key presses not yet scrolled past
+        self.last_activity_ns = None
+
+    def _column_templates(self):
+        height = self.rect.height
+        high, low = TRACE_MARGIN, height - 1 - TRACE_MARGIN
+        background, trace, fill = (self.surface.map_rgb(color) for color in
+                                   (BACKGROUND_COLOR, TRACE_COLOR, FILL_COLOR))
+        templates = np.full((3, height), background, dtype=np.uint32)
+        templates[UP, low] = trace
+        templates[DOWN, high + 1:low + 1] = fill
+        templates[DOWN, high] = trace
+        templates[EDGE, high:low + 1] = trace
+        return templates
+
+    @property
+    def span_ns(self):
+        return self.rect.width * self.column_ns
+
+    def update(self, now_ns, key_times=(), key_down_ns=None):
+        """Add the columns up to `now_ns`. `key_times` are the (down_ns, up_ns) times of
+        the presses so far, `key_down_ns` when the key went down if it is down now.
+        Returns the number of new columns."""
+        for interval in key_times:
+            if interval is not None:
+                self.intervals.add(interval)
+                self.last_activity_ns = max(self.last_activity_ns or 0, interval[1])
+        if key_down_ns is not None:
+            self.last_activity_ns = now_ns
+
+        if self.last_column_ns is None:
+            self.last_column_ns = now_ns
+            return 0
+        count = (now_ns - self.last_column_ns) // self.column_ns
+        if count <= 0:
+            return 0
+        width = self.rect.width
+        if count > width:
+            # Away longer than the strip shows: only the last `width` columns are needed
+            self.last_column_ns += (count - width) * self.column_ns
+            count = width
+
+        times = self.last_column_ns + self.column_ns * np.arange(1, count + 1, dtype=np.int64)
+        down = np.zeros(count, dtype=bool)
+        for start_ns, end_ns in self.intervals:
+            down |= (times >= start_ns) & (times < end_ns)
+        if key_down_ns is not None:
+            down |= times >= key_down_ns
+
+        kinds = down.astype(np.intp)
+        previous = np.empty(count, dtype=bool)
+        previous[0] = self.levels[self.head - 1]
+        previous[1:] = down[:-1]
+        kinds[down != previous] = EDGE
+
+        columns = (self.head + np.arange(count)) % width
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        pixels[columns] = self.templates[kinds]
+        del pixels  # Unlocks the surface for blitting
+        self.levels[columns] = down
+        self.head = (self.head + count) % width
+        self.last_column_ns += count * self.column_ns
+        self.intervals = {interval for interval in self.intervals if interval[1] >= self.last_column_ns}
+        return count
+
+    def scrolling(self, now_ns):
+        """True while there is keying in view, i.e. the strip changes visibly from frame to frame."""
+        return self.last_activity_ns is not None and now_ns - self.last_activity_ns < self.span_ns
+
+    def draw(self, screen):
+        """Blit the strip, oldest column first; returns its rect."""
+        width, height = self.rect.size
+        screen.blit(self.surface, self.rect.topleft, (self.head, 0, width - self.head, height))
+        if self.head:
+            screen.blit(self.surface, (self.rect.x + width - self.head, self.rect.y), (0, 0, self.head, height))
+        return self.rect
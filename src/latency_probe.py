@@ -0,0 +1,97 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pygame
+from src.sound_manager import SoundManager, SIDETONE_CHANNEL
+from src.morse_synth import DEFAULT_SAMPLE_RATE
+
+MARKER_CHANNEL = SIDETONE_CHANNEL + 1
+MARKER_EVENT = pygame.USEREVENT + 3  # USEREVENT + 1 and + 2 are the sound finished and config reload events
+HOLD_S = 0.05  # Key-down time of each probe press
+GAP_S = 0.05  # Minimum key-up time between presses, plus up to 50% random spread
+ONSET_LEVEL = 1000  # Sample level that counts as the tone being audible
+
+
+def measure_key_latency(buffer_size, channels=1, sidetone=True, presses=20, driver="disk", seed=None):
+    """Loopback test of key-to-sound latency on the SDL "disk" or "dummy" audio driver.
+
+    Each probe press starts the key tone together with a one-frame silent marker sound
+    on its own channel. The mixer posts the marker's end event from the audio callback
+    that mixes it, which is the same callback that mixes the first tone samples, so the
+    time from the press to the event is how long the key waited for the mixer. A sound
+    card plays a mixed buffer out after about one more buffer, which is added for the
+    estimated key-to-sound latency. With the disk driver the mixer output is also read
+    back to check that every press was heard.
+
+    Initializes and quits pygame.mixer itself, so call it while the mixer is not in use.
+    """
+    descriptor, raw_path = tempfile.mkstemp(suffix=".raw")
+    os.close(descriptor)
+    saved_env = {name: os.environ.get(name) for name in ("SDL_AUDIODRIVER", "SDL_DISKAUDIOFILE")}
+    os.environ["SDL_AUDIODRIVER"] = driver
+    os.environ["SDL_DISKAUDIOFILE"] = raw_path
+    rng = np.random.default_rng(seed)
+    latencies = []
+
+    try:
+        if not pygame.display.get_init():
+            pygame.display.init()  # Needed for the event queue
+        pygame.mixer.quit()
+        pygame.mixer.init(DEFAULT_SAMPLE_RATE, -16, channels, buffer_size)
+        sample_rate, _, channels = pygame.mixer.get_init()
+
+        sound_manager = SoundManager(sidetone=sidetone)
+        pygame.mixer.set_reserved(MARKER_CHANNEL + 1)
+        marker_channel = pygame.mixer.Channel(MARKER_CHANNEL)
+        marker_channel.set_endevent(MARKER_EVENT)
+        marker = pygame.sndarray.make_sound(np.zeros((1, channels) if channels > 1 else 1, dtype=np.int16))
+        time.sleep(0.1)  # Let the output settle before the first press
+
+        for _ in range(presses):
+            pygame.event.clear(MARKER_EVENT)
+            press = time.perf_counter()
+            sound_manager.start_tone()
+            marker_channel.play(marker)
+            deadline = press + 1.0
+            while time.perf_counter() < deadline:
+                event = pygame.event.wait(int((deadline - time.perf_counter()) * 1000) + 1)
+                if event.type == MARKER_EVENT:
+                    latencies.append(time.perf_counter() - press)
+                    break
+            time.sleep(HOLD_S)
+            sound_manager.stop_tone()
+            time.sleep(GAP_S * (1 + rng.uniform(0, 0.5)))
+        time.sleep(0.05)
+
+        sound_manager.cleanup()
+        pygame.mixer.quit()
+        output = np.fromfile(raw_path, dtype=np.int16) if driver == "disk" else None
+    finally:
+        pygame.mixer.quit()
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        os.unlink(raw_path)
+
+    if not latencies:
+        return None
+    tones_heard = None
+    if output is not None and len(output):
+        # Count tone bursts: loud samples closer than 5 ms belong to one burst, bridging zero crossings
+        loud = np.flatnonzero(np.abs(output.reshape(-1, channels)).max(axis=1) > ONSET_LEVEL)
+        tones_heard = int(np.count_nonzero(np.diff(loud) > sample_rate // 200) + 1) if len(loud) else 0
+
+    latencies = np.sort(latencies) * 1000
+    buffer_ms = buffer_size / sample_rate * 1000
+    return {
+        "presses": len(latencies),
+        "tones_heard": tones_heard,
+        "buffer_ms": buffer_ms,
+        "mix_mean_ms": float(latencies.mean()),
+        "mix_p95_ms": float(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]),
+        "mix_max_ms": float(latencies[-1]),
+        "estimated_ms": float(latencies.mean() + buffer_ms),
+    }
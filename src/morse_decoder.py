@@ -0,0 +1,127 @@
+import numpy as np
+from src.commons import MORSE_ALL
+from src.morse_synth import DEFAULT_SAMPLE_RATE, DEFAULT_WPM, DEFAULT_PITCH
+from src.keying_classifier import AdaptiveKeyingClassifier
+
+BLOCK_MS = 4  # Detector resolution; a 40 WPM dot still spans ~7 blocks
+THRESHOLD_RATIO = 0.1  # Key-down when block power exceeds this fraction of the tracked peak (-10 dB)
+MIN_POWER = 1e-4  # Absolute floor so silence and faint noise never key the decoder
+PEAK_HALF_LIFE_S = 5.0  # How fast the tracked peak forgets a louder, earlier signal
+UNKNOWN_CHARACTER = '*'
+
+
+class MorseDecoder:
+    """Streaming Morse audio decoder.
+
+    Feed int16 or float PCM chunks of any size; `feed` returns the characters completed so far.
+    A character is emitted as soon as the gap after it exceeds a character gap, so decoding
+    latency is bounded to one character gap plus one chunk.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, pitch=DEFAULT_PITCH, wpm=DEFAULT_WPM, detector="goertzel"):
+        self.sample_rate = sample_rate
+        self.block_size = max(1, int(sample_rate * BLOCK_MS / 1000))
+        self.block_seconds = self.block_size / sample_rate
+        self.peak_decay = 0.5 ** (self.block_seconds / PEAK_HALF_LIFE_S)
+
+        if detector == "goertzel":
+            n = np.arange(self.block_size)
+            self.kernel = np.exp(-2j * np.pi * pitch * n / sample_rate) * (2 / self.block_size)
+        elif detector == "envelope":
+            self.kernel = None
+        else:
+            raise ValueError(f"Unknown detector '{detector}'.")
+
+        # Adaptive dot/dash classification, lengths in blocks
+        self.classifier = AdaptiveKeyingClassifier(1.2 / wpm / self.block_seconds)
+
+        self.remainder = np.zeros(0, dtype=np.float32)
+        self.peak = 0.0
+        self.key_down = False
+        self.run_blocks = 0
+        self.symbols = []
+        self.word_gap_sent = True  # No leading space before the first character
+        self.blocks_processed = 0
+
+    def _to_float_mono(self, chunk):
+        samples = np.asarray(chunk)
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) / 32768
+        return samples.astype(np.float32, copy=False)
+
+    def _block_power(self, blocks):
+        """Tone power per block, normalized so a full-scale tone is ~1.0."""
+        if self.kernel is None:
+            return 2 * np.mean(blocks * blocks, axis=1)
+        return np.abs(blocks @ self.kernel) ** 2
+
+    def feed(self, chunk):
+        """Decode one chunk of PCM audio and return the newly completed characters."""
+        samples = self._to_float_mono(chunk)
+        if len(self.remainder):
+            samples = np.concatenate((self.remainder, samples))
+        block_count = len(samples) // self.block_size
+        self.remainder = samples[block_count * self.block_size:]
+        if block_count == 0:
+            return ""
+
+        power = self._block_power(samples[:block_count * self.block_size].reshape(block_count, self.block_size))
+        self.peak = max(self.peak * self.peak_decay ** block_count, float(power.max()))
+        keyed = power > max(self.peak * THRESHOLD_RATIO, MIN_POWER)
+        self.blocks_processed += block_count
+
+        # Run-length segmentation: each change point ends the run before it
+        output = []
+        changes = np.flatnonzero(keyed[1:] != keyed[:-1]) + 1
+        start = 0
+        if keyed[0] != self.key_down:
+            self._end_run(output)
+        for change in changes:
+            self.run_blocks += change - start
+            self._end_run(output)
+            start = change
+        self.run_blocks += block_count - start
+        self.key_down = bool(keyed[-1])
+
+        if not self.key_down:
+            self._check_gap(output)
+        return "".join(output)
+
+    def flush(self):
+        """Emit any character still being received, e.g. at the end of a file."""
+        output = []
+        if self.key_down:
+            self._end_run(output)
+        if self.symbols:
+            self._emit_character(output)
+        return "".join(output)
+
+    def _end_run(self, output):
+        """Close the current key-down or key-up run and start the opposite one."""
+        if self.key_down:
+            self.symbols.append(self.classifier.classify(self.run_blocks))
+        else:
+            self._check_gap(output)
+        self.key_down = not self.key_down
+        self.run_blocks = 0
+
+    def _check_gap(self, output):
+        """Emit a character or word space once the current key-up run is long enough."""
+        unit = self.classifier.unit
+        if self.symbols and self.run_blocks >= 2 * unit:
+            self._emit_character(output)
+        if not self.word_gap_sent and self.run_blocks >= 5 * unit:
+            output.append(' ')
+            self.word_gap_sent = True
+
+    def _emit_character(self, output):
+        output.append(MORSE_ALL.get("".join(self.symbols), UNKNOWN_CHARACTER))
+        self.symbols = []
+        self.word_gap_sent = False
+
+    @property
+    def wpm(self):
+        """Current estimate of the sender's speed."""
+        return self.classifier.wpm(self.block_seconds)
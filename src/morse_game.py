@@ -1,51 +1,326 @@
+import os
 import pygame
 import sys
+import time
 from src.display_manager import DisplayManager
 from src.state_manager import StateManager
-from src.input_handler import InputHandler
+from src.input_handler import InputHandler, KEYER_ELEMENT_EVENT, KEYER_KEY_EVENT, REMOTE_KEY_EVENT
 from src.sound_manager import SoundManager
 from src.config_manager import ConfigManager
+from src.key_timing import KeyTimingCapture
+from src.frame_profiler import FrameProfiler
+from src.iambic_keyer import IambicKeyer, KeyerThread
+from src.session_store import SessionStore
+from src.startup import StartupProfiler, BackgroundTask
+from src.relay import RelayClient
+from src.key_recorder import KeyEventLog, record_targets, record_playback
+
+FPS = 60
+FRAME_NS = 1_000_000_000 // FPS
+OVERLAY_REFRESH_NS = 250_000_000  # Profiler overlay numbers are refreshed 4 times a second
+PROFILER_TOGGLE_KEY = pygame.K_F3
+TRACE_DUMP_KEY = pygame.K_F4
+TRACE_DIRECTORY = 'resources'  # Next to the other runtime data, ignored by git
+CONFIG_RELOADED_EVENT = pygame.USEREVENT + 2  # SOUND_FINISHED_EVENT is USEREVENT + 1
+STARTUP_TASK_DONE_EVENT = pygame.USEREVENT + 5  # Wakes the event loop to take over background startup work
+KEYER_MODES = {"iambic_a": "A", "iambic_b": "B"}  # transmit_game.keyer_mode -> IambicKeyer mode
 
 class MorseGame:
-    def __init__(self):
+    def __init__(self, profile=False, sidetone=False, startup=None, relay_address=None, record_path=None,
+                 history=True):
+        """Set up what the menu needs and start the rest in the background: the audio
+        device and key tone, and the session history. `startup` times the phases.
+        With `relay_address` (host, port), keying is shared through a relay server.
+        With `record_path`, key events are saved there on quit for replay.py.
+        Without `history`, played rounds are not saved and nothing is read from
+        the history database."""
+        self.startup = startup if startup is not None else StartupProfiler()
         self.screen = pygame.display.set_mode((400, 300))
         pygame.display.set_caption("Morse Code Game")
-        
+        self.startup.mark("window")
+
         self.config_manager = ConfigManager()
-        self.sound_manager = SoundManager()
+        self.sound_manager = SoundManager(config_manager=self.config_manager, sidetone=sidetone, defer=True)
+        self.session_store = None
+        self.startup_tasks = [BackgroundTask("audio", self.init_audio, self.startup, self.wake_event_loop).start()]
+        if history:
+            self.startup_tasks.append(
+                BackgroundTask("history", SessionStore, self.startup, self.wake_event_loop).start())
+        self.startup_pending = True
+        self.first_frame_shown = False
+
         self.display_manager = DisplayManager(self.screen)
         self.state_manager = StateManager(self.sound_manager, self.config_manager)
-        self.input_handler = InputHandler(self.state_manager, self.display_manager, self.sound_manager)
+        self.relay = None
+        if relay_address:
+            self.relay = RelayClient(*relay_address, on_remote_key=self.post_remote_key,
+                                     clock=self.state_manager.clock).start()
+        self.input_handler = InputHandler(self.state_manager, self.display_manager, self.sound_manager,
+                                          relay=self.relay)
+        self.key_timing = KeyTimingCapture()
+        self.profiler = FrameProfiler(enabled=profile)
+        self.overlay_refreshed_ns = 0
+
+        self.record_path = record_path
+        self.key_log = None
+        if record_path:
+            self.key_log = KeyEventLog(self.state_manager.clock.now_ns(), self.config_manager.get_input_timeout(),
+                                       self.config_manager.get_config_value('transmit_game.keyer_mode'),
+                                       self.config_manager.get_config_value('transmit_game.keyer_wpm'))
+            record_targets(self.state_manager, self.key_log)
+            record_playback(self.input_handler, self.key_log)
+
+        self.keyer = None
+        self.start_keyer()
+        self.config_manager.subscribe(self.on_config_changed)
 
         self.running = True
 
+        # Reloads are parsed off the frame thread; the event posted here wakes
+        # the event loop so they are applied without waiting for input
+        self.config_manager.on_pending_changes = lambda: pygame.event.post(pygame.event.Event(CONFIG_RELOADED_EVENT))
+        self.config_manager.start_watching()
+        self.startup.mark("game setup")
+
+    def init_audio(self):
+        """Open the audio device and prepare the key tone; runs on a startup thread.
+        If the device fails to open, finish_startup raises the error again."""
+        try:
+            pygame.mixer.init()
+            self.sound_manager.prepare()
+        finally:
+            self.sound_manager.ready.set()  # Nothing waiting for the sound manager hangs
+
+    def wake_event_loop(self):
+        pygame.event.post(pygame.event.Event(STARTUP_TASK_DONE_EVENT))
+
+    def finish_startup(self, wait=False):
+        """Called after each frame until startup is complete. After the first menu frame
+        the remaining fonts are loaded; finished background work is taken over, and
+        leaving the menu (or quitting, `wait`) waits for the rest, so the first round
+        has sound and is recorded."""
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            self.startup.mark("first menu frame")
+            self.display_manager.preload_fonts()
+            self.startup.mark("remaining fonts")
+
+        leaving_menu = wait or self.state_manager.state != "menu"
+        for task in list(self.startup_tasks):
+            if not (leaving_menu or task.done()):
+                continue
+            result = task.wait()
+            if task.name == "history":
+                self.session_store = result
+                self.state_manager.attach_session_store(result)
+            elif task.name == "audio":
+                self.sound_manager.apply_deferred_changes()
+                self.sound_manager.prefetch_band()  # The first receive round's band
+            self.startup_tasks.remove(task)
+        if self.startup_tasks:
+            return
+
+        self.startup_pending = False
+        if self.startup.enabled and not wait:
+            print("\n".join(self.startup.report_lines()))
+            self.quit_game()
+
     def run_game_loop(self):
         """Main game loop."""
-        clock = pygame.time.Clock()
-        
         while self.running:
-            current_time_ms = pygame.time.get_ticks()
+            frame_start_ns = time.perf_counter_ns()
+            current_time_ms = self.state_manager.clock.now_ms()
+            profiler = self.profiler if self.profiler.enabled else None
+            if profiler:
+                profiler.begin_frame(self.state_manager.state)
             
             # Update state logic
+            self.config_manager.dispatch_changes()
             self.state_manager.update(current_time_ms)
+            if profiler:
+                profiler.mark("update")
+                self.refresh_profiler_overlay()
             
             # Display current state
             self.display_manager.display_current_state(self.state_manager)
+            if self.startup_pending:
+                self.finish_startup()
+            if profiler:
+                profiler.mark("display")
             
             # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.quit_game()
-                else:
-                    self.input_handler.handle_event(event)
+            for event, timestamp_ns in self.key_timing.poll_events():
+                self.handle_event(event, timestamp_ns)
+            if profiler:
+                profiler.mark("events")
             
             # FIXME: needless duplication with event handling?
             if self.state_manager.state == "quit":
                 self.quit_game()
 
-            clock.tick(60)  # Limit FPS
+            self.wait_for_next_frame(frame_start_ns + FRAME_NS, profiler)
+            if profiler:
+                profiler.end_frame()
+
+    def wait_for_next_frame(self, deadline_ns, profiler=None):
+        """Limit FPS by waiting on the event queue instead of sleeping, so key
+        presses are timestamped and handled the moment they arrive. Handling the
+        events that end a wait is charged to the "events" phase, not to "wait"."""
+        while True:
+            remaining_ms = (deadline_ns - time.perf_counter_ns()) // 1_000_000
+            if remaining_ms <= 0:
+                return
+            events = self.key_timing.wait_events(remaining_ms)
+            if profiler:
+                profiler.mark("wait")
+            for event, timestamp_ns in events:
+                self.handle_event(event, timestamp_ns)
+            if profiler and events:
+                profiler.mark("events")
+
+    def run_event_loop(self):
+        """Event-driven game loop. Sleeps in pygame.event.wait until there is input,
+        a state timer (countdown, result display, input timeout) is due or a sound
+        finishes, so an idle game uses next to no CPU. Frames are drawn at the
+        full rate only while the keying scope has keying in view."""
+        while self.running:
+            current_time_ms = self.state_manager.clock.now_ms()
+            profiler = self.profiler if self.profiler.enabled else None
+            if profiler:
+                profiler.begin_frame(self.state_manager.state)
+
+            self.config_manager.dispatch_changes()
+            self.state_manager.update(current_time_ms)
+            if profiler:
+                profiler.mark("update")
+                self.refresh_profiler_overlay()
+            self.display_manager.display_current_state(self.state_manager)
+            if self.startup_pending:
+                self.finish_startup()
+            if profiler:
+                profiler.mark("display")
+
+            if self.state_manager.state == "quit":
+                self.quit_game()
+
+            timeout_ms = self.state_manager.next_deadline_ms(self.state_manager.clock.now_ms())
+            if profiler and timeout_ms is None:
+                timeout_ms = OVERLAY_REFRESH_NS // 1_000_000  # Keep the overlay numbers moving
+            if self.display_manager.animating:
+                frame_ms = FRAME_NS // 1_000_000  # Keep the keying scope scrolling
+                timeout_ms = frame_ms if timeout_ms is None else min(timeout_ms, frame_ms)
+            if timeout_ms == 0:
+                events = self.key_timing.poll_events()
+            else:
+                # wait(0) blocks until an event arrives
+                events = self.key_timing.wait_events(timeout_ms or 0)
+            if profiler:
+                profiler.mark("wait")
+
+            for event, timestamp_ns in events:
+                self.handle_event(event, timestamp_ns)
+            if profiler:
+                profiler.mark("events")
+                profiler.end_frame()
+
+    def refresh_profiler_overlay(self):
+        now = time.perf_counter_ns()
+        if now - self.overlay_refreshed_ns >= OVERLAY_REFRESH_NS:
+            self.overlay_refreshed_ns = now
+            self.display_manager.set_overlay(self.profiler.summary_lines(self.state_manager.state))
+
+    def toggle_profiler(self):
+        """Turn the frame profiler and its overlay on or off."""
+        if not self.profiler.toggle():
+            self.display_manager.set_overlay(None)
+        self.overlay_refreshed_ns = 0
+
+    def dump_profiler_trace(self):
+        os.makedirs(TRACE_DIRECTORY, exist_ok=True)
+        path = os.path.join(TRACE_DIRECTORY, time.strftime("frame_trace_%Y%m%d_%H%M%S.json"))
+        count = self.profiler.dump_trace(path)
+        print(f"Wrote {count} trace events to {path}")
+
+    def handle_event(self, event, timestamp_ns=None):
+        """Dispatch one pygame event."""
+        if self.key_log is not None and event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            self.key_log.record_event(event, timestamp_ns if timestamp_ns is not None else
+                                      self.state_manager.clock.now_ns())
+        if event.type == pygame.QUIT:
+            self.quit_game()
+        elif event.type == STARTUP_TASK_DONE_EVENT:
+            pass  # Only wakes the loop; finish_startup runs after the next frame
+        elif event.type == pygame.WINDOWEXPOSED:
+            self.display_manager.invalidate()
+        elif event.type == pygame.KEYDOWN and event.key == PROFILER_TOGGLE_KEY:
+            self.toggle_profiler()
+        elif event.type == pygame.KEYDOWN and event.key == TRACE_DUMP_KEY:
+            self.dump_profiler_trace()
+        else:
+            self.input_handler.handle_event(event, timestamp_ns)
     
+    def start_keyer(self):
+        """Start the paddle keyer thread if an iambic keyer mode is configured. The
+        keyer posts each key edge and element to the event loop."""
+        mode = KEYER_MODES.get(self.config_manager.get_config_value('transmit_game.keyer_mode'))
+        if mode is None:
+            return
+        wpm = self.config_manager.get_config_value('transmit_game.keyer_wpm')
+        keyer = IambicKeyer(wpm, mode, on_key=self.key_sidetone)
+        self.keyer = KeyerThread(keyer, self.state_manager.clock, self.post_keyer_element)
+        self.keyer.start()
+        self.input_handler.keyer = self.keyer
+
+    def stop_keyer(self):
+        if self.keyer:
+            self.keyer.stop()
+            self.keyer = self.input_handler.keyer = None
+            self.input_handler.handle_event(pygame.event.Event(
+                KEYER_KEY_EVENT, down=False, timestamp_ns=self.state_manager.clock.now_ns()))
+
+    def key_sidetone(self, down):
+        """Called on the keyer thread; the tone is keyed on the game thread, which owns the sound manager."""
+        pygame.event.post(pygame.event.Event(KEYER_KEY_EVENT, down=down,
+                                             timestamp_ns=self.state_manager.clock.now_ns()))
+
+    def post_remote_key(self, operator_id, down):
+        """Called on the relay client thread; the remote tone is keyed on the game thread."""
+        pygame.event.post(pygame.event.Event(REMOTE_KEY_EVENT, operator_id=operator_id, down=down))
+
+    def post_keyer_element(self, symbol, start_ns, end_ns):
+        pygame.event.post(pygame.event.Event(KEYER_ELEMENT_EVENT, symbol=symbol, start_ns=start_ns,
+                                             end_ns=end_ns, unit_ns=self.keyer.keyer.unit_ns))
+
+    def on_config_changed(self, changed_paths):
+        if self.key_log is not None:
+            for path in sorted(changed_paths):
+                self.key_log.record_config(path, self.config_manager.get_config_value(path),
+                                           self.state_manager.clock.now_ns())
+        if 'transmit_game.keyer_mode' in changed_paths:
+            self.stop_keyer()
+            self.start_keyer()
+        elif 'transmit_game.keyer_wpm' in changed_paths and self.keyer:
+            self.keyer.set_wpm(self.config_manager.get_config_value('transmit_game.keyer_wpm'))
+
     def quit_game(self):
+        jitter = self.key_timing.jitter_report()
+        if jitter:
+            print(f"Key timing: {jitter['samples']} events, capture error mean {jitter['mean_ms']:.2f} ms, "
+                  f"p95 {jitter['p95_ms']:.2f} ms, max {jitter['max_ms']:.2f} ms")
+        for name, lateness in self.state_manager.timers.lateness_report().items():
+            print(f"Timer '{name}': fired {lateness['fired']} times, late by mean {lateness['mean_ms']:.1f} ms, "
+                  f"p95 {lateness['p95_ms']} ms, max {lateness['max_ms']} ms")
+        if self.startup_pending:
+            self.finish_startup(wait=True)
+        if self.key_log is not None:
+            self.key_log.save(self.record_path)
+            print(f"Recorded {self.key_log.key_event_count()} key events to {self.record_path}")
+        self.stop_keyer()
+        if self.relay:
+            self.relay.stop()
+        if self.session_store:
+            self.session_store.close()
+        self.config_manager.close()
         self.sound_manager.cleanup()
         pygame.mixer.quit()
         pygame.quit()
@@ -0,0 +1,185 @@
+import numpy as np
+from src.commons import ALL_TO_MORSE
+
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_WPM = 12
+DEFAULT_PITCH = 800  # Standard Morse frequency
+RAMP_MS = 5  # Rise/fall time that keeps the keying click-free
+
+# Gap lengths in dot units
+SYMBOL_GAP_UNITS = 1
+LETTER_GAP_UNITS = 3
+WORD_GAP_UNITS = 7
+
+
+def dot_samples(wpm, sample_rate=DEFAULT_SAMPLE_RATE):
+    """Length of one dot in samples (PARIS standard: dot = 1.2 / WPM seconds)."""
+    return int(round(1.2 / wpm * sample_rate))
+
+
+def keyed_tone(length, pitch, sample_rate=DEFAULT_SAMPLE_RATE, ramp_ms=RAMP_MS):
+    """Float tone of `length` samples with raised-cosine on/off ramps."""
+    t = np.arange(length) / sample_rate
+    tone = np.sin(2 * np.pi * pitch * t)
+    ramp_len = min(int(sample_rate * ramp_ms / 1000), length // 2)
+    if ramp_len > 0:
+        ramp = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, ramp_len))
+        tone[:ramp_len] *= ramp
+        tone[-ramp_len:] *= ramp[::-1]
+    return tone
+
+
+def render_morse(morse, wpm=DEFAULT_WPM, pitch=DEFAULT_PITCH, sample_rate=DEFAULT_SAMPLE_RATE,
+                 trailing_units=LETTER_GAP_UNITS, amplitude=1.0):
+    """Render a dot/dash string as one mono int16 buffer, gaps included."""
+    unit = dot_samples(wpm, sample_rate)
+    dot = keyed_tone(unit, pitch, sample_rate)
+    dash = keyed_tone(3 * unit, pitch, sample_rate)
+
+    length = sum(unit if symbol == '.' else 3 * unit for symbol in morse)
+    length += unit * SYMBOL_GAP_UNITS * max(len(morse) - 1, 0)
+    length += unit * trailing_units
+
+    buffer = np.zeros(length)
+    position = 0
+    for symbol in morse:
+        element = dot if symbol == '.' else dash
+        buffer[position:position + len(element)] = element
+        position += len(element) + unit * SYMBOL_GAP_UNITS
+
+    return (buffer * amplitude * 32767).astype(np.int16)
+
+
+def iter_text_samples(text_chunks, wpm=DEFAULT_WPM, pitch=DEFAULT_PITCH, sample_rate=DEFAULT_SAMPLE_RATE,
+                      table=ALL_TO_MORSE):
+    """Yield one mono int16 buffer per character (or word gap) for an iterable of text chunks.
+
+    Characters missing from the table are skipped. Each character's buffer is rendered
+    once and reused, so memory stays flat regardless of the input length.
+    """
+    rendered = {}
+    word_gap = np.zeros(dot_samples(wpm, sample_rate) * (WORD_GAP_UNITS - LETTER_GAP_UNITS), dtype=np.int16)
+    pending_gap = False
+    sent_any = False
+
+    for text in text_chunks:
+        for character in text.upper():
+            if character.isspace():
+                pending_gap = sent_any
+                continue
+
+            buffer = rendered.get(character)
+            if buffer is None:
+                morse = table.get(character)
+                if morse is None:
+                    continue
+                buffer = rendered[character] = render_morse(morse, wpm, pitch, sample_rate)
+
+            if pending_gap:
+                yield word_gap
+                pending_gap = False
+            yield buffer
+            sent_any = True
+
+
+def gap_unit_seconds(wpm, farnsworth_wpm=None):
+    """Length of one gap unit between characters and words, in seconds.
+
+    With Farnsworth spacing, characters keep their `wpm` element timing and the
+    letter and word gaps are stretched so the overall speed is `farnsworth_wpm`
+    (ARRL timing: the extra time per PARIS word is spread over its 19 gap units).
+    """
+    if not farnsworth_wpm or farnsworth_wpm >= wpm:
+        return 1.2 / wpm
+    extra_seconds = (60 * wpm - 37.2 * farnsworth_wpm) / (wpm * farnsworth_wpm)
+    return extra_seconds / 19
+
+
+def morse_timeline(text, wpm=DEFAULT_WPM, farnsworth_wpm=None, table=ALL_TO_MORSE):
+    """Ideal key-down intervals of a text as (start, duration) pairs in seconds, and
+    the total length including a trailing letter gap. Whitespace collapses to one
+    word gap and characters missing from the table are skipped."""
+    dot = 1.2 / wpm
+    gap_unit = gap_unit_seconds(wpm, farnsworth_wpm)
+    marks = []
+    position = 0.0
+    pending_gap = None
+    for character in text.upper():
+        if character.isspace():
+            pending_gap = WORD_GAP_UNITS if marks else None
+            continue
+        morse = table.get(character)
+        if morse is None:
+            continue
+        if marks:
+            position += gap_unit * (pending_gap or LETTER_GAP_UNITS)
+        pending_gap = None
+        for index, symbol in enumerate(morse):
+            if index:
+                position += dot * SYMBOL_GAP_UNITS
+            length = dot if symbol == '.' else 3 * dot
+            marks.append((position, length))
+            position += length
+    return marks, position + gap_unit * LETTER_GAP_UNITS if marks else 0.0
+
+
+def sample_edges(marks, sample_rate=DEFAULT_SAMPLE_RATE):
+    """Key-down and key-up sample index of each mark. Every edge is rounded from the
+    ideal time on its own, so errors stay within half a sample and never accumulate."""
+    return [(int(round(start * sample_rate)), int(round((start + length) * sample_rate)))
+            for start, length in marks]
+
+
+def render_text(text, wpm=DEFAULT_WPM, pitch=DEFAULT_PITCH, sample_rate=DEFAULT_SAMPLE_RATE,
+                farnsworth_wpm=None, table=ALL_TO_MORSE, amplitude=1.0):
+    """Render a word, group or sentence as one continuous mono int16 buffer."""
+    marks, total = morse_timeline(text, wpm, farnsworth_wpm, table)
+    buffer = np.zeros(int(round(total * sample_rate)))
+    tones = {}  # Element length in samples -> keyed tone; lengths differ by at most one sample
+    for start, end in sample_edges(marks, sample_rate):
+        tone = tones.get(end - start)
+        if tone is None:
+            tone = tones[end - start] = keyed_tone(end - start, pitch, sample_rate)
+        buffer[start:end] = tone
+    return (buffer * amplitude * 32767).astype(np.int16)
+
+
+def timing_report(text, wpm=DEFAULT_WPM, sample_rate=DEFAULT_SAMPLE_RATE, farnsworth_wpm=None, table=ALL_TO_MORSE):
+    """Timing error of the key edges `render_text` puts in its buffer against the ideal
+    timeline, in microseconds. This is the sample quantization of the rendered audio, computed
+    from the timeline; it does not measure playback, whose timing is the audio device's clock.
+
+    For comparison, `fixed_unit_drift_us` is how far the last edge would be off if every
+    element were a whole number of fixed-length dot units, as in `render_morse`.
+    """
+    marks, _ = morse_timeline(text, wpm, farnsworth_wpm, table)
+    if not marks:
+        return None
+    ideal = np.array([(start, start + length) for start, length in marks]).ravel()
+    errors = np.array(sample_edges(marks, sample_rate)).ravel() / sample_rate - ideal
+    unit_error = dot_samples(wpm, sample_rate) / sample_rate * wpm / 1.2  # Relative speed error of a rounded unit
+    return {
+        "edges": len(errors),
+        "max_error_us": float(np.abs(errors).max() * 1e6),
+        "rms_error_us": float(np.sqrt(np.mean(errors ** 2)) * 1e6),
+        "fixed_unit_drift_us": float(abs(unit_error - 1) * ideal[-1] * 1e6),
+    }
+
+
+def chunk_samples(buffers, chunk_size=65536):
+    """Repack an iterable of int16 buffers into chunks of `chunk_size` samples (last one may be shorter)."""
+    chunk = np.empty(chunk_size, dtype=np.int16)
+    filled = 0
+    for buffer in buffers:
+        position = 0
+        while position < len(buffer):
+            count = min(chunk_size - filled, len(buffer) - position)
+            chunk[filled:filled + count] = buffer[position:position + count]
+            filled += count
+            position += count
+            if filled == chunk_size:
+                yield chunk
+                chunk = np.empty(chunk_size, dtype=np.int16)
+                filled = 0
+    if filled:
+        yield chunk[:filled]
@@ -0,0 +1,317 @@
+import asyncio
+import struct
+import threading
+from src.clock import MonotonicClock
+
+DEFAULT_RELAY_PORT = 7373
+FRAME = struct.Struct("!BxxxIq")  # Kind, operator id, timestamp in ns on the sender's clock
+KEY_UP, KEY_DOWN, WELCOME, LEFT = 0, 1, 2, 3
+FLUSH_INTERVAL_S = 0.01  # Frames received within this window are written to every connection at once
+MAX_FRAMES_PER_FLUSH = 64  # A sender over this is not read from until the next flush
+HIGH_WATER = 64 * 1024  # Unsent bytes at which a connection's transport pauses writing
+MAX_PENDING = 256 * 1024  # Bytes held back for a paused connection before it is dropped
+PLAYBACK_DELAY_MS = 150  # Remote keying is played this long after it arrives, to absorb network jitter
+RESYNC_GAP_MS = 2000  # After this long without events a sender's clock is mapped again
+
+
+class RelayConnection(asyncio.Protocol):
+    """One game instance connected to the relay server."""
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.operator_id = None
+        self.incoming = bytearray()
+        self.pending = bytearray()  # Frames held back while the transport is paused
+        self.paused = False
+        self.reading_paused = False
+        self.frames_since_flush = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.server.high_water)
+        self.operator_id = self.server.add(self)
+        transport.write(FRAME.pack(WELCOME, self.operator_id, 0))
+
+    def data_received(self, data):
+        self.incoming += data
+        usable = len(self.incoming) - len(self.incoming) % FRAME.size
+        if not usable:
+            return
+        # The operator id is always the server's, whatever the client sent
+        frames = [FRAME.pack(kind, self.operator_id, timestamp_ns)
+                  for kind, _, timestamp_ns in FRAME.iter_unpack(self.incoming[:usable])
+                  if kind in (KEY_UP, KEY_DOWN)]
+        del self.incoming[:usable]
+        self.server.broadcast(b"".join(frames), len(frames))
+
+        self.frames_since_flush += len(frames)
+        if self.frames_since_flush > MAX_FRAMES_PER_FLUSH and not self.reading_paused:
+            self.reading_paused = True
+            self.transport.pause_reading()
+
+    def send(self, data):
+        if not self.paused:
+            self.transport.write(data)
+            return
+        self.pending += data
+        if len(self.pending) > self.server.max_pending:
+            self.server.stats["dropped_slow"] += 1
+            self.transport.abort()
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        if self.pending:
+            self.transport.write(bytes(self.pending))
+            self.pending.clear()
+
+    def connection_lost(self, exc):
+        self.server.remove(self)
+
+
+class RelayServer:
+    """Relays key events between game instances over TCP.
+
+    Clients send fixed-size FRAMEs with their key-down and key-up events,
+    timestamped on their own clock. The server puts the sender's operator id in each
+    frame and broadcasts it to every connection, the sender included; clients skip
+    their own frames. All frames received within `flush_interval` are joined and
+    written to each connection once, so the cost grows with connections times
+    flushes rather than connections times events.
+
+    Backpressure both ways: a connection whose transport has `high_water` unsent
+    bytes is paused and its frames wait in its own buffer, and it is dropped when
+    that buffer passes `max_pending`, so a stalled client cannot hold the server's
+    memory. A sender of more than MAX_FRAMES_PER_FLUSH frames is not read from
+    until the next flush.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL_S, high_water=HIGH_WATER, max_pending=MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.high_water = high_water
+        self.max_pending = max_pending
+        self.connections = set()
+        self.outgoing = bytearray()
+        self.next_operator_id = 1
+        self.flush_handle = None
+        self.loop = None
+        self.server = None
+        self.stats = {"connections": 0, "frames_in": 0, "frames_out": 0, "flushes": 0, "dropped_slow": 0}
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_RELAY_PORT):
+        """Start listening; returns the bound (host, port), e.g. for port 0."""
+        self.loop = asyncio.get_running_loop()
+        self.server = await self.loop.create_server(lambda: RelayConnection(self), host, port, backlog=4096)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+        for connection in list(self.connections):
+            connection.transport.abort()
+
+    def add(self, connection):
+        operator_id = self.next_operator_id
+        self.next_operator_id += 1
+        self.connections.add(connection)
+        self.stats["connections"] = len(self.connections)
+        return operator_id
+
+    def remove(self, connection):
+        self.connections.discard(connection)
+        self.stats["connections"] = len(self.connections)
+        # Release the key of an operator who left while keying
+        self.broadcast(FRAME.pack(LEFT, connection.operator_id, 0), 0)
+
+    def broadcast(self, frames, count):
+        self.outgoing += frames
+        self.stats["frames_in"] += count
+        if self.flush_handle is None and self.loop is not None:
+            self.flush_handle = self.loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """Write the frames collected since the last flush to every connection."""
+        self.flush_handle = None
+        data = bytes(self.outgoing)
+        self.outgoing.clear()
+        for connection in list(self.connections):
+            connection.send(data)
+            connection.frames_since_flush = 0
+            if connection.reading_paused:
+                connection.reading_paused = False
+                connection.transport.resume_reading()
+        self.stats["flushes"] += 1
+        self.stats["frames_out"] += len(data) // FRAME.size * len(self.connections)
+
+
+class RelayClientProtocol(asyncio.Protocol):
+    def __init__(self, client):
+        self.client = client
+        self.incoming = bytearray()
+
+    def connection_made(self, transport):
+        self.client.transport = transport
+
+    def data_received(self, data):
+        self.incoming += data
+        usable = len(self.incoming) - len(self.incoming) % FRAME.size
+        for frame in FRAME.iter_unpack(self.incoming[:usable]):
+            self.client.frame_received(*frame)
+        del self.incoming[:usable]
+
+    def connection_lost(self, exc):
+        self.client.transport = None
+        self.client.release_all()
+
+
+class RelayClient:
+    """Connects the game to a relay server, on its own thread with an asyncio loop.
+
+    `send_key(down, timestamp_ns)` may be called from any thread. Other operators'
+    keying is played back with its original timing: the first event from a sender
+    maps its clock to ours (arrival plus `playback_delay_ms`), and each key edge is
+    scheduled at its mapped time, when `on_remote_key(operator_id, down)` is called
+    from the client thread. A sender silent for RESYNC_GAP_MS is mapped again, so
+    clock drift never builds up over a session.
+    """
+
+    def __init__(self, host, port=DEFAULT_RELAY_PORT, on_remote_key=None, clock=None,
+                 playback_delay_ms=PLAYBACK_DELAY_MS):
+        self.host = host
+        self.port = port
+        self.on_remote_key = on_remote_key
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.playback_delay_ns = int(playback_delay_ms * 1_000_000)
+        self.loop = None
+        self.thread = None
+        self.transport = None
+        self.operator_id = None
+        self.connected = threading.Event()
+        self.error = None
+        self.clock_offsets = {}  # Operator id -> (offset to our clock, last timestamp), ns
+        self.keys_down = set()  # Operators whose key is down in the playback
+        self.scheduled = {}  # Operator id -> handles of key edges not played yet
+
+    def start(self, timeout=5.0):
+        """Connect and start the client thread; raises OSError if the server cannot be reached."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="relay-client", daemon=True)
+        self.thread.start()
+        if not self.connected.wait(timeout):
+            self.stop()
+            raise OSError(f"Timed out connecting to relay {self.host}:{self.port}")
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(
+                self.loop.create_connection(lambda: RelayClientProtocol(self), self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self.connected.set()
+            self.loop.close()
+            return
+        self.loop.run_forever()
+        self.loop.close()
+
+    def stop(self):
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._close)
+        self.thread.join()
+
+    def _close(self):
+        if self.transport:
+            self.transport.close()
+        self.loop.stop()
+
+    def send_key(self, down, timestamp_ns):
+        """Send a local key edge; `timestamp_ns` is on this client's clock."""
+        if self.transport is None or self.loop.is_closed():
+            return
+        frame = FRAME.pack(KEY_DOWN if down else KEY_UP, 0, timestamp_ns)
+        self.loop.call_soon_threadsafe(self._write, frame)
+
+    def _write(self, frame):
+        if self.transport:
+            self.transport.write(frame)
+
+    def frame_received(self, kind, operator_id, timestamp_ns):
+        if kind == WELCOME:
+            self.operator_id = operator_id
+            self.connected.set()
+            return
+        if operator_id == self.operator_id:
+            return
+        if kind == LEFT:
+            # Edges still waiting for their playback time would key the tone after the release
+            for handle in self.scheduled.pop(operator_id, ()):
+                handle.cancel()
+            self.clock_offsets.pop(operator_id, None)
+            self._play(operator_id, False)
+            return
+
+        now_ns = self.clock.now_ns()
+        offset, last_ns = self.clock_offsets.get(operator_id, (None, None))
+        if offset is None or timestamp_ns - last_ns > RESYNC_GAP_MS * 1_000_000:
+            offset = now_ns + self.playback_delay_ns - timestamp_ns
+        self.clock_offsets[operator_id] = (offset, timestamp_ns)
+        delay_s = max(0, timestamp_ns + offset - now_ns) / 1e9
+        handle = self.loop.call_later(delay_s, self._play_scheduled, operator_id, kind == KEY_DOWN)
+        self.scheduled.setdefault(operator_id, []).append(handle)
+
+    def _play_scheduled(self, operator_id, down):
+        handles = self.scheduled.get(operator_id)
+        if handles:
+            now = self.loop.time()
+            handles[:] = [handle for handle in handles if handle.when() > now]
+        self._play(operator_id, down)
+
+    def _play(self, operator_id, down):
+        if down == (operator_id in self.keys_down):
+            return
+        if down:
+            self.keys_down.add(operator_id)
+        else:
+            self.keys_down.discard(operator_id)
+        if self.on_remote_key:
+            self.on_remote_key(operator_id, down)
+
+    def release_all(self):
+        for operator_id in list(self.keys_down):
+            self._play(operator_id, False)
+
+
+def parse_address(address):
+    """'host' or 'host:port' -> (host, port)."""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, DEFAULT_RELAY_PORT
+    return host, int(port)
+
+
+def raise_open_file_limit():
+    """Raise the soft limit of open files to the hard limit, for thousands of
+    connections; returns the limit, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (ValueError, OSError):
+            pass
+    return soft
@@ -0,0 +1,236 @@
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = 'resources/history.db'
+BATCH_SIZE = 256  # Rounds written per transaction at most
+FLUSH_INTERVAL_S = 1.0  # Longest time a recorded round waits for its batch
+
+ADD_TO_TOTALS = """
+INSERT INTO character_totals VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (mode, target) DO UPDATE SET
+    rounds = rounds + excluded.rounds, correct = correct + excluded.correct,
+    reaction_ms_sum = reaction_ms_sum + excluded.reaction_ms_sum,
+    reaction_count = reaction_count + excluded.reaction_count,
+    send_ms_sum = send_ms_sum + excluded.send_ms_sum, send_count = send_count + excluded.send_count
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER,
+    mode TEXT NOT NULL,
+    played_at REAL NOT NULL,
+    target TEXT NOT NULL,
+    answer TEXT,
+    morse TEXT,
+    result TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    reaction_ms REAL,
+    send_ms REAL
+);
+CREATE TABLE IF NOT EXISTS elements (
+    round_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    duration_ms REAL NOT NULL,
+    gap_ms REAL,
+    PRIMARY KEY (round_id, position)
+) WITHOUT ROWID;
+-- Running totals per character, kept up to date by the writer, so the overall
+-- summary does not scan the history
+CREATE TABLE IF NOT EXISTS character_totals (
+    mode TEXT NOT NULL,
+    target TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    reaction_ms_sum REAL NOT NULL,
+    reaction_count INTEGER NOT NULL,
+    send_ms_sum REAL NOT NULL,
+    send_count INTEGER NOT NULL,
+    PRIMARY KEY (mode, target)
+) WITHOUT ROWID;
+-- Covering index for the per-character queries: they never touch the table rows
+CREATE INDEX IF NOT EXISTS rounds_by_target ON rounds (mode, target, played_at, correct, reaction_ms, send_ms);
+CREATE INDEX IF NOT EXISTS rounds_by_session ON rounds (session_id);
+"""
+
+
+class SessionStore:
+    """Append-only history of played rounds in an SQLite database.
+
+    `record_round` only puts the round on a queue, so it is safe to call from the
+    frame thread. A writer thread with its own connection takes the rounds off the
+    queue and inserts up to BATCH_SIZE of them per transaction with executemany.
+    The database is in WAL mode, so the queries below read on the caller's
+    connection while the writer appends; that connection may be used from any
+    one thread at a time. Row ids are handed out here, which is why only one
+    SessionStore may write to a database at a time.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL_S):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The store may be opened on a startup thread and then used from the game thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        # next() on an itertools.count is atomic, so ids are unique whatever thread records
+        self.session_ids = itertools.count(self._max_id("sessions") + 1)
+        self.round_ids = itertools.count(self._max_id("rounds") + 1)
+
+        self.queue = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self._write_batches, name="session-writer", daemon=True)
+        self.writer.start()
+
+    def _max_id(self, table):
+        return self.connection.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    # --- Recording, any thread ---
+    def start_session(self, mode):
+        """Start a session of `mode` ("transmit_game" or "receive_game") and return its id."""
+        session_id = next(self.session_ids)
+        self.queue.put(("session", (session_id, mode, time.time())))
+        return session_id
+
+    def record_round(self, session_id, mode, target, answer, result, reaction_ms=None, key_times=(), morse=None):
+        """Queue one round. `key_times` are the (press_ns, release_ns) of the keyed
+        elements; their durations and the gaps between them are stored per element."""
+        round_id = next(self.round_ids)
+        key_times = [times for times in key_times if times is not None]
+        elements = []
+        for position, (press_ns, release_ns) in enumerate(key_times):
+            gap_ms = (press_ns - key_times[position - 1][1]) / 1e6 if position else None
+            symbol = morse[position] if morse and position < len(morse) else '?'
+            elements.append((round_id, position, symbol, (release_ns - press_ns) / 1e6, gap_ms))
+        send_ms = (key_times[-1][1] - key_times[0][0]) / 1e6 if key_times else None
+        row = (round_id, session_id, mode, time.time(), target, answer, morse, result,
+               int(result == "CORRECT!"), reaction_ms, send_ms)
+        self.queue.put(("round", (row, elements)))
+        return round_id
+
+    def flush(self):
+        """Wait until everything recorded so far is committed."""
+        if not self.writer.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        """Commit the queued rounds and stop the writer."""
+        if self.writer.is_alive():
+            self.queue.put(("close", None))
+            self.writer.join()
+        self.connection.close()
+
+    # --- Writer thread ---
+    def _write_batches(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits can be lost
+        running = True
+        while running:
+            sessions, rounds, elements, waiters = [], [], [], []
+            try:
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    kind, payload = item
+                    if kind == "session":
+                        sessions.append(payload)
+                    elif kind == "round":
+                        rounds.append(payload[0])
+                        elements.extend(payload[1])
+                    elif kind == "flush":
+                        waiters.append(payload)
+                        break
+                    else:
+                        running = False
+                        break
+                    if len(rounds) >= self.batch_size:
+                        break
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
+
+            if sessions or rounds:
+                try:
+                    with connection:
+                        connection.executemany("INSERT INTO sessions VALUES (?, ?, ?)", sessions)
+                        connection.executemany("INSERT INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rounds)
+                        connection.executemany("INSERT INTO elements VALUES (?, ?, ?, ?, ?)", elements)
+                        connection.executemany(ADD_TO_TOTALS, self._batch_totals(rounds))
+                except sqlite3.Error as e:
+                    print(f"Warning: could not save {len(rounds)} rounds to '{self.path}': {e}")
+            for done in waiters:
+                done.set()
+        connection.close()
+
+    @staticmethod
+    def _batch_totals(rounds):
+        """character_totals rows adding up a batch of round rows."""
+        totals = {}
+        for _, _, mode, _, target, _, _, _, correct, reaction_ms, send_ms in rounds:
+            row = totals.get((mode, target))
+            if row is None:
+                row = totals[(mode, target)] = [mode, target, 0, 0, 0.0, 0, 0.0, 0]
+            row[2] += 1
+            row[3] += correct
+            if reaction_ms is not None:
+                row[4] += reaction_ms
+                row[5] += 1
+            if send_ms is not None:
+                row[6] += send_ms
+                row[7] += 1
+        return list(totals.values())
+
+    # --- Queries, on the caller's connection ---
+    def character_stats(self, mode, since=None):
+        """Per-character totals for `mode`: {character: {"rounds", "accuracy",
+        "mean_reaction_ms", "mean_send_ms"}}. All-time totals come from the running
+        totals; with `since` (Unix time) only later rounds are counted, from the index."""
+        if since is None:
+            rows = self.connection.execute(
+                "SELECT target, rounds, CAST(correct AS REAL) / rounds, reaction_ms_sum / NULLIF(reaction_count, 0), "
+                "send_ms_sum / NULLIF(send_count, 0) FROM character_totals WHERE mode = ?", (mode,))
+        else:
+            rows = self.connection.execute(
+                "SELECT target, COUNT(*), AVG(correct), AVG(reaction_ms), AVG(send_ms) "
+                "FROM rounds INDEXED BY rounds_by_target WHERE mode = ? AND played_at >= ? GROUP BY target",
+                (mode, since))
+        return {
+            target: {"rounds": count, "accuracy": accuracy, "mean_reaction_ms": reaction_ms, "mean_send_ms": send_ms}
+            for target, count, accuracy, reaction_ms, send_ms in rows
+        }
+
+    def character_trend(self, mode, target, bucket_s=86400):
+        """Accuracy and speed of one character over time, in `bucket_s` buckets (days
+        by default): a list of (bucket start Unix time, rounds, accuracy,
+        mean reaction ms, mean send ms), oldest first."""
+        return self.connection.execute(
+            "SELECT CAST(played_at / :bucket AS INTEGER) * :bucket AS start, COUNT(*), AVG(correct), "
+            "AVG(reaction_ms), AVG(send_ms) FROM rounds INDEXED BY rounds_by_target "
+            "WHERE mode = :mode AND target = :target GROUP BY start ORDER BY start",
+            {"bucket": bucket_s, "mode": mode, "target": target}).fetchall()
+
+    def element_stats(self, mode, target):
+        """Mean keyed duration of each element of `target` over its transmit rounds:
+        a list of (position, symbol, rounds, mean duration ms, mean gap ms before it)."""
+        return self.connection.execute(
+            "SELECT e.position, e.symbol, COUNT(*), AVG(e.duration_ms), AVG(e.gap_ms) "
+            "FROM rounds r INDEXED BY rounds_by_target JOIN elements e ON e.round_id = r.id "
+            "WHERE r.mode = ? AND r.target = ? GROUP BY e.position, e.symbol ORDER BY e.position, e.symbol",
+            (mode, target)).fetchall()
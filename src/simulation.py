@@ -0,0 +1,160 @@
+import random
+import time
+from src.clock import FakeClock
+from src.commons import MORSE_COMMON, COMMON_TO_MORSE
+from src.state_manager import StateManager
+
+RESULT_STATES = ("result", "receive_result")
+
+
+class NullSoundManager:
+    """Sound manager stand-in for running without an audio device."""
+
+    def __init__(self):
+        self.sound_playing = False
+
+    def start_tone(self):
+        self.sound_playing = True
+
+    def stop_tone(self):
+        self.sound_playing = False
+
+    def play_morse_character(self, character):
+        pass
+
+    def is_character_playing(self):
+        return False
+
+
+class StaticConfig:
+    """In-memory config for simulations, so nothing is read from or written to disk."""
+
+    def __init__(self, input_timeout_ms=1000):
+        self.input_timeout_ms = input_timeout_ms
+
+    def get_input_timeout(self):
+        return self.input_timeout_ms
+
+    def subscribe(self, callback):
+        pass  # Never changes during a simulation
+
+
+class RandomBot:
+    """Simulated player that answers correctly with probability `accuracy`.
+
+    Transmitted elements follow `wpm` with a relative timing spread, and every
+    action waits a random reaction time first.
+    """
+
+    def __init__(self, accuracy=0.9, wpm=15, timing_spread=0.15, reaction_ms=(200, 800), seed=None):
+        self.accuracy = accuracy
+        self.dot_ms = 1200 / wpm
+        self.timing_spread = timing_spread
+        self.reaction_ms = reaction_ms
+        self.rng = random.Random(seed)
+        self.characters = list(MORSE_COMMON.values())
+
+    def reaction_time_ms(self):
+        return self.rng.uniform(*self.reaction_ms)
+
+    def choose_answer(self, target):
+        if self.rng.random() < self.accuracy:
+            return target
+        return self.rng.choice(self.characters)
+
+    def element_ms(self, symbol):
+        length = self.dot_ms if symbol == '.' else 3 * self.dot_ms
+        return length * (1 + self.rng.uniform(-self.timing_spread, self.timing_spread))
+
+    def gap_ms(self):
+        return self.dot_ms * (1 + self.rng.uniform(-self.timing_spread, self.timing_spread))
+
+
+class ScriptedBot(RandomBot):
+    """Simulated player that gives the answers from a list, in order, with exact timing.
+
+    Transmit answers may also be raw dot/dash strings, e.g. to send invalid Morse.
+    """
+
+    def __init__(self, answers, wpm=15, reaction_ms=(300, 300)):
+        super().__init__(wpm=wpm, timing_spread=0.0, reaction_ms=reaction_ms)
+        self.answers = list(answers)
+        self.position = 0
+
+    def choose_answer(self, target):
+        answer = self.answers[self.position % len(self.answers)]
+        self.position += 1
+        return answer
+
+
+class HeadlessEngine:
+    """Runs the game state machine without pygame, a display or an audio device.
+
+    Time is a FakeClock that jumps straight to the next timer deadline, so rounds
+    run as fast as the game logic allows.
+    """
+
+    def __init__(self, bot, mode="transmit_game", input_timeout_ms=1000, seed=None):
+        self.bot = bot
+        self.mode = mode
+        self.clock = FakeClock()
+        self.rng = random.Random(seed)  # Practice characters, independent of the global random
+        self.state_manager = StateManager(NullSoundManager(), StaticConfig(input_timeout_ms), self.clock, rng=self.rng)
+        self.results = {"CORRECT!": 0, "WRONG!": 0, "INVALID MORSE!": 0}
+        self.rounds = 0
+
+    def run(self, rounds):
+        """Play `rounds` rounds from countdown to final score and return statistics."""
+        state_manager = self.state_manager
+        start_rounds = self.rounds
+        start_results = dict(self.results)
+        wall_start = time.perf_counter()
+        sim_start_ms = self.clock.now_ms()
+        acted = False
+
+        state_manager.start_countdown(self.mode)
+        while state_manager.state != "quit":
+            state = state_manager.state
+            if state == "transmit_game" and not acted:
+                self.transmit(state_manager.char_to_be_guessed)
+                acted = True
+            elif state == "receive_game" and not acted:
+                self.clock.advance(self.bot.reaction_time_ms())
+                state_manager.receive_input_char = self.bot.choose_answer(state_manager.char_to_receive)
+                acted = True
+            elif state in RESULT_STATES and acted:
+                self.results[state_manager.result_message] += 1
+                self.rounds += 1
+                acted = False
+                if self.rounds - start_rounds >= rounds:
+                    state_manager.end_session("quit")
+
+            if state_manager.state == state:
+                deadline = state_manager.next_deadline_ms(self.clock.now_ms())
+                if deadline:
+                    self.clock.advance(deadline)
+            state_manager.update(self.clock.now_ms())
+
+        wall_seconds = time.perf_counter() - wall_start
+        played = self.rounds - start_rounds
+        return {
+            "rounds": played,
+            "results": {message: count - start_results[message] for message, count in self.results.items()},
+            "simulated_seconds": (self.clock.now_ms() - sim_start_ms) / 1000,
+            "wall_seconds": wall_seconds,
+            "rounds_per_minute": played / wall_seconds * 60 if wall_seconds > 0 else float("inf"),
+        }
+
+    def transmit(self, target):
+        """Key the bot's answer with the straight key, element by element."""
+        state_manager = self.state_manager
+        clock = self.clock
+        clock.advance(self.bot.reaction_time_ms())
+        answer = self.bot.choose_answer(target)
+        for symbol in COMMON_TO_MORSE.get(answer, answer):
+            if state_manager.state != "transmit_game":
+                break  # Round already decided by the decoding tree
+            press_ns = clock.now_ns()
+            clock.advance(self.bot.element_ms(symbol))
+            state_manager.complete_key_press(press_ns, clock.now_ns())
+            clock.advance(self.bot.gap_ms())
@@ -1,95 +1,363 @@
+import threading
+import time
 import pygame
 import numpy as np
-import threading
+from collections import OrderedDict
 from src.commons import ALL_TO_MORSE as ALL_CHARS_TO_MORSE
+from src.morse_synth import (render_morse, render_text, morse_timeline, DEFAULT_SAMPLE_RATE, DEFAULT_WPM, DEFAULT_PITCH,
+                              SYMBOL_GAP_UNITS)
+from src.band_simulator import BandSimulator
+from src.startup import BackgroundTask
+
+CHARACTER_CACHE_SIZE = 128  # Max number of pre-synthesized character buffers
+SOUND_FINISHED_EVENT = pygame.USEREVENT + 1  # Posted when a Morse character finishes playing
+BAND_LEAD_IN_S = 0.4  # Band noise heard before a character at difficulty > 0
+LOW_LATENCY_BUFFER = 256  # Mixer buffer in samples for the low-latency sidetone, ~6 ms at 44.1 kHz
+SIDETONE_CHANNEL = 0  # Reserved so character playback never takes it
+KEY_FADE_MS = 10  # The sidetone's volume ramps up and down this fast, so key edges do not click
+KEY_FADE_STEPS = 10  # Volume steps of a ramp
+REMOTE_PITCH_OFFSET_HZ = -150  # Other operators' keying sounds lower than your own key
+# Character with the most dot units; gaps scale alike, so it is the longest at any speed
+LONGEST_CHARACTER = max((character for character in ALL_CHARS_TO_MORSE if len(character) == 1),
+                        key=lambda character: sum(1 if symbol == '.' else 3 for symbol in ALL_CHARS_TO_MORSE[character])
+                        + SYMBOL_GAP_UNITS * len(ALL_CHARS_TO_MORSE[character]))
+
+class GainRamp:
+    """Moves a channel's volume to a target in KEY_FADE_STEPS steps over KEY_FADE_MS.
+
+    A volume jumping from 0 to 1 in the middle of a wave cycle clicks. The steps
+    are taken on a small thread of its own; it only ever changes the volume of
+    the channel, the playback itself stays with the game thread.
+    """
+
+    def __init__(self, channel, fade_ms=KEY_FADE_MS, steps=KEY_FADE_STEPS):
+        self.channel = channel
+        self.step = 1.0 / steps
+        self.interval = fade_ms / 1000 / steps
+        self.volume = 0.0
+        self.target = 0.0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="sidetone-ramp", daemon=True)
+        self.thread.start()
+
+    def set(self, target):
+        with self.condition:
+            self.target = target
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.volume == self.target and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                if self.target > self.volume:
+                    self.volume = min(self.target, self.volume + self.step)
+                else:
+                    self.volume = max(self.target, self.volume - self.step)
+                self.channel.set_volume(self.volume)
+            time.sleep(self.interval)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
 
 class SoundManager:
-    def __init__(self):
-        """Initialize the sound manager."""
+    def __init__(self, wpm=DEFAULT_WPM, pitch=DEFAULT_PITCH, config_manager=None, farnsworth_wpm=0, difficulty=0,
+                 sidetone=False, defer=False):
+        """Initialize the sound manager. With a `config_manager`, speed, pitch and
+        Farnsworth speed come from the 'sound' settings and follow reloads of the config file.
+
+        With `sidetone`, the key tone loops silently on a reserved channel from the start
+        and key presses only ramp its volume (see GainRamp), so the tone starts with the
+        next mixer buffer instead of waiting for a channel to be set up.
+
+        With `defer`, nothing touches the mixer until `prepare` is called, e.g. from a
+        startup thread once the mixer is initialized; playing waits for it to finish.
+        """
         self.sound_playing = False
-        self.tone = self.generate_tone()
-        self.receive_sound_thread = None
+        self.config_manager = config_manager
+        if config_manager:
+            wpm = config_manager.get_config_value('sound.wpm', wpm)
+            pitch = config_manager.get_config_value('sound.pitch_hz', pitch)
+            farnsworth_wpm = config_manager.get_config_value('sound.farnsworth_wpm', farnsworth_wpm)
+            difficulty = config_manager.get_config_value('receive_game.difficulty', difficulty)
+            config_manager.subscribe(self.on_config_changed)
+        self.wpm = wpm
+        self.pitch = pitch
+        self.farnsworth_wpm = farnsworth_wpm  # Overall speed of text playback, 0 for none
+        self.difficulty = difficulty  # Receive game band conditions, 0 for a clean tone
+        self.band = None  # BandSimulator for the current difficulty and pitch, created on first use
+        self.band_key = None  # (difficulty, pitch, sample rate) of `band`
+        self.band_prefetch = None  # (task, band key) rendering the band for the next receive round
+        self.sidetone = sidetone
+        self.sample_rate, self.mixer_channels = DEFAULT_SAMPLE_RATE, 2
+        self.tone = None
+        self.tone_stale = False  # Pitch changed while the tone was playing
+        self.character_channel = None
+        self.sidetone_channel = None
+        self.remote_tone = None  # Other operators' key tone in the networked mode, made on first use
+        self.remote_keys_down = set()
+        self.ready = threading.Event()
+        self.deferred_changes = set()  # Config changes that arrived before `prepare` finished
+
+        # LRU cache of whole-character sounds, keyed by (character, wpm, Farnsworth wpm, pitch, sample rate)
+        self.character_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        if not defer:
+            self.prepare()
+
+    def prepare(self):
+        """Read the mixer format, synthesize the key tone and set up the sidetone channel."""
+        try:
+            self.sample_rate, self.mixer_channels = self._mixer_format()
+            self.tone = self.generate_tone()
+            if self.sidetone:
+                pygame.mixer.set_reserved(SIDETONE_CHANNEL + 1)
+                self.sidetone_channel = pygame.mixer.Channel(SIDETONE_CHANNEL)
+                self.sidetone_ramp = GainRamp(self.sidetone_channel)
+                self._loop_sidetone()
+        finally:
+            self.ready.set()
+
+    def apply_deferred_changes(self):
+        """Apply the config changes that arrived while the audio device was still being set up."""
+        changes, self.deferred_changes = self.deferred_changes, set()
+        if changes:
+            self.on_config_changed(changes)
+
+    def _loop_sidetone(self):
+        """(Re)start the muted sidetone loop with the current tone."""
+        if self.sidetone_channel:
+            self.sidetone_channel.set_volume(0)
+            self.sidetone_channel.play(self.tone, loops=-1)
+
+    def _mixer_format(self):
+        """Return (sample rate, channel count) of the initialized mixer."""
+        mixer_init = pygame.mixer.get_init()
+        if mixer_init:
+            return mixer_init[0], mixer_init[2]
+        return DEFAULT_SAMPLE_RATE, 2
+
+    def _make_sound(self, mono_wave):
+        """Create a pygame Sound from a mono int16 buffer, matching the mixer channels."""
+        if self.mixer_channels == 1:
+            return pygame.sndarray.make_sound(mono_wave)
+        return pygame.sndarray.make_sound(np.column_stack([mono_wave] * self.mixer_channels))
     
-    def generate_tone(self):
-        """Generate the 800 Hz sine wave tone for morse code."""
-        sample_rate = 44100
+    def on_config_changed(self, changed_paths):
+        """Apply reloaded speed and pitch. Cached characters are keyed by both, so
+        new ones are synthesized on demand; the key tone is swapped when it is silent.
+        Called on the game thread, which does not wait for a deferred `prepare`: until
+        then the changes are kept for apply_deferred_changes."""
+        if not self.ready.is_set():
+            self.deferred_changes |= changed_paths
+            return
+        self.wpm = self.config_manager.get_config_value('sound.wpm', self.wpm)
+        self.farnsworth_wpm = self.config_manager.get_config_value('sound.farnsworth_wpm', self.farnsworth_wpm)
+        difficulty = self.config_manager.get_config_value('receive_game.difficulty', self.difficulty)
+        pitch = self.config_manager.get_config_value('sound.pitch_hz', self.pitch)
+        self.difficulty = difficulty  # The band follows on the next render, see _render_band
+        if pitch != self.pitch:
+            self.pitch = pitch
+            if not self.remote_keys_down:
+                self.remote_tone = None
+            if self.sound_playing:
+                self.tone_stale = True
+            else:
+                self._swap_tone()
+        self.prefetch_band()
+
+    def generate_tone(self, frequency=None):
+        """Generate the sine wave tone for morse code at the current pitch, or at `frequency`."""
+        sample_rate = self.sample_rate
         duration = 1.0  # Buffer length in seconds
-        frequency = 800  # Standard Morse frequency
+        frequency = frequency or self.pitch
         t = np.arange(0, duration, 1/sample_rate)
         sine_wave = np.sin(2 * np.pi * frequency * t)
         sine_wave = (sine_wave * 32767).astype(np.int16)
-        stereo_wave = np.column_stack((sine_wave, sine_wave))
-        return pygame.sndarray.make_sound(stereo_wave)
+        return self._make_sound(sine_wave)
     
     def start_tone(self):
         """Start playing the tone."""
-        self.tone.play(-1)
+        self.ready.wait()
+        if self.sidetone_channel:
+            if self.tone_stale:
+                self._swap_tone()  # The loop is silent since the last key release
+            self.sidetone_ramp.set(1.0)
+        else:
+            self.tone.play(-1)
         self.sound_playing = True
     
     def stop_tone(self):
         """Stop playing the tone."""
-        self.tone.stop()
+        self.ready.wait()
+        if self.sidetone_channel:
+            self.sidetone_ramp.set(0.0)
+        else:
+            self.tone.stop()
         self.sound_playing = False
+        if self.tone_stale and not self.sidetone_channel:  # The sidetone is still ramping down
+            self._swap_tone()
+
+    def _swap_tone(self):
+        """Replace the key tone with one at the current pitch; only while it is silent."""
+        self.tone = self.generate_tone()
+        self.tone_stale = False
+        self._loop_sidetone()
+
+    def set_remote_key(self, operator_id, down):
+        """Key another operator's tone in the networked mode; called on the game thread,
+        see REMOTE_KEY_EVENT. The tone sounds while any remote operator's key is down.
+        Edges that arrive before the audio device is open are not played."""
+        if not self.ready.is_set():
+            return
+        if self.remote_tone is None:
+            self.remote_tone = self.generate_tone(self.pitch + REMOTE_PITCH_OFFSET_HZ)
+        was_sounding = bool(self.remote_keys_down)
+        if down:
+            self.remote_keys_down.add(operator_id)
+        else:
+            self.remote_keys_down.discard(operator_id)
+        if self.remote_keys_down and not was_sounding:
+            self.remote_tone.play(-1)
+        elif was_sounding and not self.remote_keys_down:
+            self.remote_tone.stop()
+
+    def render_character(self, character):
+        """A receive round's character, rendered like play_morse_text renders text: every
+        key edge on its exact sample at any speed, followed by a letter gap stretched
+        to the Farnsworth speed if one is set. Prosigns (e.g. SOS) are keyed as one run."""
+        if len(character) > 1:
+            return render_morse(ALL_CHARS_TO_MORSE[character], self.wpm, self.pitch, self.sample_rate)
+        return render_text(character, self.wpm, self.pitch, self.sample_rate, self.farnsworth_wpm,
+                           ALL_CHARS_TO_MORSE)
+
+    def get_character_sound(self, character):
+        """Return the pre-synthesized sound for a character, synthesizing it on a cache miss."""
+        self.ready.wait()
+        key = (character, self.wpm, self.farnsworth_wpm, self.pitch, self.sample_rate)
+        sound = self.character_cache.get(key)
+        if sound is not None:
+            self.character_cache.move_to_end(key)
+            self.cache_hits += 1
+            return sound
+
+        self.cache_misses += 1
+        sound = self._make_sound(self.render_character(character))
+        self.character_cache[key] = sound
+        if len(self.character_cache) > CHARACTER_CACHE_SIZE:
+            self.character_cache.popitem(last=False)
+        return sound
     
     def play_morse_character(self, character):
         """Plays the Morse code sound for a given character without blocking."""
-        # Stop any existing sound thread
-        if self.receive_sound_thread and self.receive_sound_thread.is_alive():
-            self.receive_sound_thread.join()
-        
-        # Create and start new sound thread
-        self.receive_sound_thread = threading.Thread(
-            target=self._play_morse_character_thread, 
-            args=(character,)
-        )
-        self.receive_sound_thread.start()
-    
-    def _play_morse_character_thread(self, character):
-        """Thread function to play morse character."""
         if character not in ALL_CHARS_TO_MORSE:
             print(f"Warning: Character '{character}' not found in Morse dictionary.")
             return
-        
-        char_in_morse = ALL_CHARS_TO_MORSE[character]
-        # --- Timing (WPM approx 12-15 based on 100ms dot) ---
-        dot_duration = 100  # ms
-        dash_duration = 3 * dot_duration  # ms
-        symbol_gap = dot_duration  # ms
-        letter_gap = 3 * dot_duration  # ms
-        # ---
-        
-        try:
-            for i, symbol in enumerate(char_in_morse):
-                if symbol == '.':
-                    self.tone.play(-1)
-                    pygame.time.delay(dot_duration)
-                    self.tone.stop()
-                elif symbol == '-':
-                    self.tone.play(-1)
-                    pygame.time.delay(dash_duration)
-                    self.tone.stop()
-                
-                # Gap between symbols within the same character
-                if i < len(char_in_morse) - 1:
-                    pygame.time.delay(symbol_gap)
-            
-            # Gap after the character (important for sequences later)
-            pygame.time.delay(letter_gap)
-        
-        except Exception as e:
-            print(f"Error playing sound: {e}")
-        finally:
-            self.tone.stop()  # Ensure tone is stopped
+
+        if self.difficulty:
+            self._play_on_character_channel(self.get_band_sound(character))
+        else:
+            self._play_on_character_channel(self.get_character_sound(character))
+
+    def get_band_sound(self, character):
+        """Sound of a character copied through the simulated band of the current difficulty.
+        The band keeps running between characters, so every round sounds different.
+
+        Mixing the band takes tens of milliseconds at the higher difficulties, so the
+        band for the next round is rendered on a background thread after each round
+        and only the character is keyed into it here."""
+        self.ready.wait()
+        wave = self.render_character(character)
+        target = np.concatenate((np.zeros(int(BAND_LEAD_IN_S * self.sample_rate), dtype=np.int16), wave))
+        band, start, background = self._take_band(len(target))
+        sound = self._make_sound(band.add_target(background, start, target))
+        self.prefetch_band()
+        return sound
+
+    def _band_key(self):
+        return self.difficulty, self.pitch, self.sample_rate
+
+    def _band_samples(self):
+        """Band length that fits the lead-in and any character at the current speed."""
+        _, longest_s = morse_timeline(LONGEST_CHARACTER, self.wpm, self.farnsworth_wpm, ALL_CHARS_TO_MORSE)
+        return int(BAND_LEAD_IN_S * self.sample_rate) + int(round(longest_s * self.sample_rate))
+
+    def _render_band(self, key, count):
+        """Render `count` samples of band for `key`, continuing the current band if
+        the key is unchanged. Only one render runs at a time, see prefetch_band."""
+        if self.band is None or self.band_key != key:
+            self.band = BandSimulator.for_difficulty(key[0], key[2], key[1])
+            self.band_key = key
+        start, background = self.band.render_band(count)
+        return self.band, start, background
+
+    def prefetch_band(self):
+        """Start rendering the band for the next receive round in the background."""
+        if not self.difficulty or not self.ready.is_set():
+            return
+        key, count = self._band_key(), self._band_samples()
+        if self.band_prefetch is not None:
+            task, prefetch_key = self.band_prefetch
+            if prefetch_key == key and not (task.done() and len(task.wait()[2]) < count):
+                return
+            task.wait()  # One render at a time on a simulator
+        self.band_prefetch = (BackgroundTask("band", lambda: self._render_band(key, count)).start(), key)
+
+    def _take_band(self, count):
+        """The prefetched band if it fits, else a band rendered now (e.g. the first round)."""
+        prefetch, self.band_prefetch = self.band_prefetch, None
+        key = self._band_key()
+        if prefetch is not None:
+            task, prefetch_key = prefetch
+            band, start, background = task.wait()
+            if prefetch_key == key and len(background) >= count:
+                return band, start, background
+        return self._render_band(key, count)
+
+    def play_morse_text(self, text):
+        """Play a word, letter group or sentence without blocking. The whole text is
+        rendered into one buffer, so every element lands on its exact sample and
+        nothing depends on when the game loop gets to queue the next character."""
+        self.ready.wait()
+        wave = render_text(text, self.wpm, self.pitch, self.sample_rate, self.farnsworth_wpm,
+                           ALL_CHARS_TO_MORSE)
+        if not len(wave):
+            print(f"Warning: Nothing to play in '{text}'.")
+            return
+        self._play_on_character_channel(self._make_sound(wave))
+
+    def _play_on_character_channel(self, sound):
+        """Play a sound in place of whatever is playing and post SOUND_FINISHED_EVENT at its end."""
+        if self.character_channel:
+            self.character_channel.stop()
+        self.character_channel = sound.play()
+        if self.character_channel:
+            self.character_channel.set_endevent(SOUND_FINISHED_EVENT)
     
-    def is_sound_thread_active(self):
-        """Check if sound thread is currently active."""
-        return self.receive_sound_thread and self.receive_sound_thread.is_alive()
+    def is_character_playing(self):
+        """Check if a Morse character is currently being played."""
+        return bool(self.character_channel and self.character_channel.get_busy())
     
     def cleanup(self):
         """Clean up sound resources."""
-        if self.sound_playing:
+        self.ready.wait()
+        if self.sound_playing or self.sidetone_channel:
             self.tone.stop()
+        if self.sidetone_channel:
+            self.sidetone_ramp.close()
+            pygame.mixer.set_reserved(0)
         
-        if self.receive_sound_thread and self.receive_sound_thread.is_alive():
-            print("Waiting for sound thread to finish...")
-            self.tone.stop()
\ No newline at end of file
+        if self.remote_tone:
+            self.remote_tone.stop()
+        if self.character_channel:
+            self.character_channel.stop()
+        self.character_cache.clear()
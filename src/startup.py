@@ -0,0 +1,81 @@
+import threading
+import time
+
+
+class StartupProfiler:
+    """Wall time of each startup phase, for `main.py --profile-startup`.
+
+    `mark(phase)` ends a phase that started at the previous mark on the main
+    thread. Background work is recorded with `record` from its own thread,
+    measured from the origin, since it overlaps the main thread phases.
+    """
+
+    def __init__(self, enabled=False, origin_ns=None):
+        self.enabled = enabled
+        self.origin_ns = origin_ns if origin_ns is not None else time.perf_counter_ns()
+        self.last_mark_ns = self.origin_ns
+        self.phases = []  # (name, start_ns, duration_ns, background)
+        self.lock = threading.Lock()
+
+    def mark(self, phase):
+        now = time.perf_counter_ns()
+        with self.lock:
+            self.phases.append((phase, self.last_mark_ns, now - self.last_mark_ns, False))
+        self.last_mark_ns = now
+
+    def record(self, phase, start_ns, end_ns):
+        with self.lock:
+            self.phases.append((phase, start_ns, end_ns - start_ns, True))
+
+    def report_lines(self):
+        lines = ["Startup phase              start ms  duration ms"]
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        for name, start_ns, duration_ns, background in phases:
+            label = f"{name} (background)" if background else name
+            lines.append(f"{label:<26} {(start_ns - self.origin_ns) / 1e6:8.1f} {duration_ns / 1e6:12.1f}")
+        return lines
+
+
+class BackgroundTask:
+    """Runs `function` once on a daemon thread, so the first frame does not wait for it.
+
+    `wait()` returns its result, waiting if it is still running; an exception
+    raised by the function is raised again from `wait()`. `on_done` is called from
+    the thread when the function has finished, e.g. to wake the game loop.
+    """
+
+    def __init__(self, name, function, profiler=None, on_done=None):
+        self.name = name
+        self.function = function
+        self.profiler = profiler
+        self.on_done = on_done
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"startup-{name}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        start_ns = time.perf_counter_ns()
+        try:
+            self.result = self.function()
+        except Exception as e:
+            self.error = e
+        if self.profiler and self.profiler.enabled:
+            self.profiler.record(self.name, start_ns, time.perf_counter_ns())
+        self.finished.set()
+        if self.on_done:
+            self.on_done()
+
+    def done(self):
+        return self.finished.is_set()
+
+    def wait(self):
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
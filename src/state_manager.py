@@ -1,20 +1,33 @@
-import pygame
-import time
-import random
-from src.commons import MORSE_COMMON as ALL_MORSE_CHARACTERS, COMMON_TO_MORSE as ALL_CHARS_TO_MORSE
+from src.commons import MORSE_COMMON as ALL_MORSE_CHARACTERS, COMMON_TO_MORSE as ALL_CHARS_TO_MORSE, MORSE_COMMON_TREE
+from src.keying_classifier import AdaptiveKeyingClassifier, CHARACTER_GAP_UNITS, MIN_CHARACTER_GAP_MS
+from src.clock import MonotonicClock
+from src.timer_scheduler import TimerScheduler
+from src.character_sampler import AdaptiveCharacterSampler
+
+RECEIVE_FEEDBACK_MS = 200
 
 
 class StateManager:
-    def __init__(self, sound_manager, config_manager):
-        """Initialize the game state manager."""
+    def __init__(self, sound_manager, config_manager, clock=None, session_store=None, rng=None):
+        """Initialize the game state manager. All timing goes through `clock`
+        (real monotonic time by default), so the game logic runs without pygame.
+        Played rounds are recorded in `session_store` if one is given. Practice
+        characters are drawn with `rng` (the global random by default)."""
         self.sound_manager = sound_manager
         self.config_manager = config_manager
+        self.session_store = None
+        self.session_id = None
+        self.clock = clock if clock is not None else MonotonicClock()
+        # Every timed state transition is a timer here, fired from update()
+        self.timers = TimerScheduler(self.clock)
+        self.state_timer = None
 
         # Main state
         self.state = "menu"
         
         # Game state variables
         self.score = 0
+        self.round_start_ns = 0  # clock.now_ns() time the current round started
         self.exiting_to = None
         
         # Menu selections
@@ -24,14 +37,19 @@ class StateManager:
         
         # Transmit game variables
         self.transmit_input_chars = []
+        self.transmit_key_times = []  # (press_ns, release_ns) for each element, clock.now_ns() time
+        self.transmit_node = MORSE_COMMON_TREE  # Position of the input in the decoding tree
         self.char_to_be_guessed = None
-        self.transmit_start_time = None
+        self.transmit_start_time = None  # clock.now_ns() time of the current key press
+        self.key_down_ns = None  # Same, but only while the straight key is held down
         self.transmit_last_input_time = 0
         self.transmit_input_complete = False
+        # Learns the operator's dot/dash lengths across rounds
+        self.keying_classifier = AdaptiveKeyingClassifier()
         
         # Countdown variables
         self.countdown_value = 3
-        self.countdown_start_time = 0
+        self.countdown_start_time = 0  # clock.now_ms() time
         self.next_state_after_countdown = "transmit_game"
         
         # Result display variables
@@ -43,105 +61,221 @@ class StateManager:
         self.char_to_receive = None
         self.receive_input_char = ""
 
+        # Practice characters are drawn per game mode, favouring the weak ones
+        self.character_samplers = {mode: AdaptiveCharacterSampler(ALL_MORSE_CHARACTERS.values(), rng)
+                                   for mode in ("transmit_game", "receive_game")}
+        if session_store is not None:
+            self.attach_session_store(session_store)
+
         # Game configurations
         self.input_timeout_ms = self.config_manager.get_input_timeout()
+        self.config_manager.subscribe(self.on_config_changed)
+
+    def attach_session_store(self, session_store):
+        """Record rounds from now on, and weight the practice characters by the saved history."""
+        self.session_store = session_store
+        for mode, sampler in self.character_samplers.items():
+            sampler.load(session_store.character_stats(mode))
+
+    def on_config_changed(self, changed_paths):
+        """Pick up a reloaded input timeout; it applies from the next character gap."""
+        if 'general.input_timeout_ms' in changed_paths:
+            self.input_timeout_ms = self.config_manager.get_input_timeout()
 
     def update(self, current_time_ms):
-        """Update game state based on timers and input state."""
-        # TODO: Should be possible to skip countdown
-        if self.state == "countdown":
-            current_time = time.time()
-            elapsed = current_time - self.countdown_start_time
-            
-            if elapsed >= 4:  # After 3,2,1,GO (1s each)
-                self.state = self.next_state_after_countdown
-                self.score = 0  # Reset score for new game session
-                if self.next_state_after_countdown == "transmit_game":
-                    self.initialize_transmit_game()
-                elif self.next_state_after_countdown == "receive_game":
-                    self.initialize_receive_game()
-        
-        # Results state check
-        elif self.state in ["result", "receive_result"]:
-            if current_time_ms - self.result_display_time >= 2000:  # Show result for 2 seconds
-                if self.exiting_to == "menu":
-                    self.state = "menu"
-                    self.exiting_to = None
-                elif self.exiting_to == "quit":
-                    self.state = "final_score"
-                else:
-                    # Transition to next round
-                    if self.state == "result":
-                        self.state = "transmit_game"
-                        self.initialize_transmit_game()
-                    elif self.state == "receive_result":
-                        self.state = "receive_game"
-                        self.initialize_receive_game()
-        
-        # Final score display check
-        elif self.state == "final_score":
-            if current_time_ms - self.result_display_time >= 2000:
-                if self.exiting_to == "quit":
-                    # handled by the main game loop
-                    self.state = "quit"
-                else:
-                    self.state = "menu"
-                    self.exiting_to = None
-        
-        # Transmit game input timeout check
-        elif self.state == "transmit_game" and not self.transmit_input_complete:
-            if (self.transmit_last_input_time > 0 and
-                current_time_ms - self.transmit_last_input_time > self.input_timeout_ms and
-                len(self.transmit_input_chars) > 0):
-                self.transmit_input_complete = True
-                self.parse_transmit_input()
-        
-        elif self.state == "receive_game" and self.receive_input_char:
+        """Fire the state timers that are due and act on new receive input."""
+        self.timers.run_due(current_time_ms)
+        if self.state == "receive_game" and self.receive_input_char and not self.state_timer_pending():
             self.validate_receive_input()
     
+    def next_deadline_ms(self, current_time_ms):
+        """Milliseconds until `update` has something to do without new input,
+        or None if the state only changes on input."""
+        if self.state == "receive_game" and self.receive_input_char and not self.state_timer_pending():
+            return 0
+        return self.timers.next_deadline_ms(current_time_ms)
+
+    # State timers: each state has at most one pending transition, and setting
+    # a new one cancels the old one (e.g. ESC during a result display)
+    def set_state_timer(self, delay_ms, callback, name):
+        self.timers.cancel(self.state_timer)
+        self.state_timer = self.timers.schedule(delay_ms, callback, name)
+
+    def cancel_state_timer(self):
+        self.timers.cancel(self.state_timer)
+        self.state_timer = None
+
+    def state_timer_pending(self):
+        return self.state_timer is not None and not self.state_timer.cancelled
+
+    def _countdown_tick(self):
+        """Count down 3, 2, 1, GO one second at a time, then start the game."""
+        # TODO: Should be possible to skip countdown
+        self.countdown_value -= 1
+        if self.countdown_value >= 0:
+            self.set_state_timer(1000, self._countdown_tick, "countdown")
+            return
+
+        self.state = self.next_state_after_countdown
+        self.score = 0  # Reset score for new game session
+        if self.session_store is not None:
+            self.session_id = self.session_store.start_session(self.next_state_after_countdown)
+        if self.next_state_after_countdown == "transmit_game":
+            self.initialize_transmit_game()
+        elif self.next_state_after_countdown == "receive_game":
+            self.initialize_receive_game()
+
+    def _result_shown(self):
+        """Go on to the next round. Ending the session replaces this timer, see end_session."""
+        if self.state == "result":
+            self.state = "transmit_game"
+            self.initialize_transmit_game()
+        elif self.state == "receive_result":
+            self.state = "receive_game"
+            self.initialize_receive_game()
+
+    def _final_score_shown(self):
+        if self.exiting_to == "quit":
+            # handled by the main game loop
+            self.state = "quit"
+        else:
+            self.state = "menu"
+            self.exiting_to = None
+
+    def _transmit_input_timed_out(self):
+        if self.state == "transmit_game" and self.transmit_input_chars and not self.transmit_input_complete:
+            self.transmit_input_complete = True
+            self.parse_transmit_input()
+
+    def show_result(self, state):
+        """Show the result of a round for 2 seconds."""
+        self.state = state
+        self.result_display_time = self.clock.now_ms()
+        self.set_state_timer(2000, self._result_shown, state)
+
+    def character_gap_ms(self):
+        """Silence that ends the transmit input: derived from the operator's speed,
+        never longer than the configured input timeout."""
+        return self.keying_classifier.character_gap_ms(self.input_timeout_ms)
+
+    # State transitions triggered by input
+    def start_countdown(self, next_state):
+        """Start the 3, 2, 1, GO countdown before `next_state`."""
+        self.state = "countdown"
+        self.exiting_to = None
+        self.countdown_value = 3
+        self.countdown_start_time = self.clock.now_ms()
+        self.next_state_after_countdown = next_state
+        self.set_state_timer(1000, self._countdown_tick, "countdown")
+
+    def cancel_countdown(self):
+        """Go back to the menu before the game starts."""
+        self.cancel_state_timer()
+        self.state = "menu"
+
+    def end_session(self, exiting_to):
+        """Show the final score, then go to `exiting_to` ("menu" or "quit")."""
+        self.exiting_to = exiting_to
+        self.state = "final_score"
+        self.result_display_time = self.clock.now_ms()
+        self.set_state_timer(2000, self._final_score_shown, "final_score")
+
     # State initialization methods
     def initialize_transmit_game(self):
         """Reinitialize the transmit game state for a new round."""
         self.transmit_input_chars = []
-        valid_chars = list(ALL_MORSE_CHARACTERS.values())
-        self.char_to_be_guessed = random.choice(valid_chars)
+        self.transmit_key_times = []
+        self.transmit_node = MORSE_COMMON_TREE
+        self.char_to_be_guessed = self.character_samplers["transmit_game"].sample()
         self.transmit_start_time = None
+        self.key_down_ns = None
         self.transmit_last_input_time = 0
         self.transmit_input_complete = False
+        self.round_start_ns = self.clock.now_ns()
     
     def initialize_receive_game(self):
         """Initialize the receive game state for a new round."""
         self.receive_input_char = ""
-        valid_receive_chars = list(ALL_MORSE_CHARACTERS.values())
-        self.char_to_receive = random.choice(valid_receive_chars)
+        self.char_to_receive = self.character_samplers["receive_game"].sample()
+        self.round_start_ns = self.clock.now_ns()
         self.sound_manager.play_morse_character(self.char_to_receive)
     
     # Input parsing methods
+    def begin_key_press(self, press_ns):
+        """Start timing a straight-key press; the input timeout waits for the release."""
+        self.transmit_start_time = press_ns
+        self.key_down_ns = press_ns
+        self.transmit_last_input_time = 0
+        self.cancel_state_timer()
+
+    def complete_key_press(self, press_ns, release_ns):
+        """Classify a straight-key press as a dot or dash and add it to the transmit input."""
+        symbol = self.keying_classifier.classify((release_ns - press_ns) / 1e9)
+        self.key_down_ns = None
+        self.transmit_last_input_time = self.clock.now_ms()
+        self.add_transmit_element(symbol, (press_ns, release_ns))
+        if self.state == "transmit_game" and not self.transmit_input_complete:
+            self.set_state_timer(self.character_gap_ms() + 1, self._transmit_input_timed_out, "input_timeout")
+
+    def add_keyer_element(self, symbol, start_ns, end_ns, unit_ns):
+        """Add an element from the paddle keyer as soon as it starts. Keyer timing is exact,
+        so the character gap follows from its speed instead of the adaptive classifier."""
+        self.transmit_last_input_time = end_ns // 1_000_000
+        self.add_transmit_element(symbol, (start_ns, end_ns))
+        if self.state == "transmit_game" and not self.transmit_input_complete:
+            gap_ms = min(max(CHARACTER_GAP_UNITS * unit_ns / 1e6, MIN_CHARACTER_GAP_MS), self.input_timeout_ms)
+            key_up_ms = max(end_ns - self.clock.now_ns(), 0) / 1e6
+            self.set_state_timer(int(key_up_ms + gap_ms) + 1, self._transmit_input_timed_out, "input_timeout")
+
+    def add_transmit_element(self, symbol, key_times=None):
+        """Add one keyed element ('.' or '-') to the transmit input, with its
+        (press_ns, release_ns) key times if known.
+
+        The round ends right away once the input is a dead end or can only
+        spell one character, instead of waiting for the input timeout.
+        """
+        self.transmit_input_chars.append(symbol)
+        self.transmit_key_times.append(key_times)
+        if self.transmit_node is not None:
+            self.transmit_node = self.transmit_node.next(symbol)
+
+        if self.transmit_node is None or self.transmit_node.is_leaf():
+            self.transmit_input_complete = True
+            self.parse_transmit_input()
+
+    @property
+    def transmit_candidates(self):
+        """Characters the current transmit input can still turn into."""
+        return self.transmit_node.candidates if self.transmit_node is not None else frozenset()
+
     def parse_transmit_input(self):
         """Parse the user's transmit input and check if it matches."""
-        user_transmit_input = "".join(self.transmit_input_chars)
-    
-        target_morse_char = ALL_CHARS_TO_MORSE.get(self.char_to_be_guessed, None)
+        node = self.transmit_node
+        sent_char = node.character if node is not None else None
 
-        if user_transmit_input == target_morse_char:
+        if sent_char is not None and sent_char == self.char_to_be_guessed:
             self.result_message = "CORRECT!"
             self.result_color = "GREEN"
             self.score += 1
 
         else:
             # Check if the input is at least a valid morse sequence
-            if user_transmit_input in ALL_MORSE_CHARACTERS:
+            if sent_char is not None:
                 self.result_message = "WRONG!"
                 self.result_color = "RED"
             else:
                 self.result_message = "INVALID MORSE!"
                 self.result_color = "ORANGE"
-        
-        self.state = "result"
-        self.result_display_time = pygame.time.get_ticks()
+
+        first_press = next((times for times in self.transmit_key_times if times is not None), None)
+        reaction_ns = first_press[0] - self.round_start_ns if first_press else None
+        self.record_round("transmit_game", self.char_to_be_guessed, sent_char, reaction_ns,
+                          self.transmit_key_times, "".join(self.transmit_input_chars))
+        self.show_result("result")
         self.transmit_input_complete = False
 
     def validate_receive_input(self):
+        """Score the typed character; the result is shown after RECEIVE_FEEDBACK_MS."""
         if self.receive_input_char == self.char_to_receive:
             self.result_message = "CORRECT!"
             self.result_color = "GREEN"
@@ -153,6 +287,17 @@ class StateManager:
             else:
                 self.result_message = "INVALID MORSE!"
                 self.result_color = "ORANGE"
-        time.sleep(0.2)
-        self.state = "receive_result"
-        self.result_display_time = pygame.time.get_ticks()
+        self.record_round("receive_game", self.char_to_receive, self.receive_input_char,
+                          self.clock.now_ns() - self.round_start_ns)
+        # Keep the typed character on screen for a moment before the result
+        self.set_state_timer(RECEIVE_FEEDBACK_MS, lambda: self.show_result("receive_result"), "receive_feedback")
+
+    def record_round(self, mode, target, answer, reaction_ns, key_times=(), morse=None):
+        """Reweight the character for the next draws and queue the finished round for the
+        session history; the store writes it in the background."""
+        reaction_ms = reaction_ns / 1e6 if reaction_ns is not None else None
+        self.character_samplers[mode].record(target, self.result_message == "CORRECT!", reaction_ms)
+        if self.session_store is None:
+            return
+        self.session_store.record_round(self.session_id, mode, target, answer, self.result_message,
+                                        reaction_ms, key_times, morse)
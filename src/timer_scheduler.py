@@ -0,0 +1,94 @@
+import heapq
+from collections import deque
+
+LATENESS_WINDOW = 256  # Firings kept per timer name for the lateness report
+
+
+class Timer:
+    """Handle of a scheduled callback, returned by `TimerScheduler.schedule`."""
+
+    __slots__ = ("deadline_ms", "name", "callback", "cancelled")
+
+    def __init__(self, deadline_ms, name, callback):
+        self.deadline_ms = deadline_ms
+        self.name = name
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerScheduler:
+    """One-shot timers in a min-heap, fired from the game loop.
+
+    Nothing here sleeps: the loop calls `run_due` every iteration and uses
+    `next_deadline_ms` to decide how long it may wait for input. Cancelled timers
+    stay in the heap until they reach the top, so cancelling is O(1). How late
+    each timer fired compared with its deadline is kept per timer name.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.heap = []  # (deadline_ms, sequence, timer); the sequence keeps equal deadlines in order
+        self.sequence = 0
+        self.lateness_ms = {}  # Timer name -> deque of recent lateness values
+
+    def schedule(self, delay_ms, callback, name="timer"):
+        """Call `callback()` once `delay_ms` has passed and return the timer."""
+        timer = Timer(self.clock.now_ms() + delay_ms, name, callback)
+        heapq.heappush(self.heap, (timer.deadline_ms, self.sequence, timer))
+        self.sequence += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None:
+            timer.cancelled = True
+
+    def cancel_all(self):
+        for _, _, timer in self.heap:
+            timer.cancelled = True
+        self.heap.clear()
+
+    def _drop_cancelled(self):
+        heap = self.heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+
+    def run_due(self, current_time_ms):
+        """Fire every timer whose deadline has passed, earliest first. Timers
+        scheduled by the callbacks fire in the same call if they are already due."""
+        fired = 0
+        heap = self.heap
+        while True:
+            self._drop_cancelled()
+            if not heap or heap[0][0] > current_time_ms:
+                return fired
+            _, _, timer = heapq.heappop(heap)
+            timer.cancelled = True  # Fired timers count as done for their owners
+            self._record_lateness(timer.name, current_time_ms - timer.deadline_ms)
+            timer.callback()
+            fired += 1
+
+    def next_deadline_ms(self, current_time_ms):
+        """Milliseconds until the next timer is due, or None if none is pending."""
+        self._drop_cancelled()
+        if not self.heap:
+            return None
+        return max(0, self.heap[0][0] - current_time_ms)
+
+    def _record_lateness(self, name, lateness_ms):
+        samples = self.lateness_ms.get(name)
+        if samples is None:
+            samples = self.lateness_ms[name] = deque(maxlen=LATENESS_WINDOW)
+        samples.append(lateness_ms)
+
+    def lateness_report(self):
+        """How late recent timers fired after their deadline, per timer name, in milliseconds."""
+        report = {}
+        for name, samples in self.lateness_ms.items():
+            ordered = sorted(samples)
+            report[name] = {
+                "fired": len(ordered),
+                "mean_ms": sum(ordered) / len(ordered),
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max_ms": ordered[-1],
+            }
+        return report
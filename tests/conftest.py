@@ -0,0 +1,42 @@
+# tests/conftest.py
+import json
+import os
+import pytest
+
+# Run pygame headless so tests need no display or audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from src.config_manager import ConfigManager  # noqa: E402
+
+
+@pytest.fixture
+def make_config_manager():
+    """Build ConfigManagers that are closed after the test, so their writer and
+    watcher threads do not outlive it."""
+    managers = []
+
+    def make(*args, **kwargs):
+        manager = ConfigManager(*args, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def edit_config_file():
+    """Change sections of a config file like a user editing it outside the game would,
+    with a distinct modification time so a reload check notices it."""
+    def edit(path, **sections):
+        with open(path) as f:
+            config = json.load(f)
+        config.update(sections)
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    return edit
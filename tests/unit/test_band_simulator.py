@@ -0,0 +1,53 @@
+# tests/unit/test_band_simulator.py
+import numpy as np
+from src.band_simulator import BandSimulator, CHUNK_SAMPLES
+from src.morse_decoder import MorseDecoder
+from src.morse_synth import render_text
+
+def test_clean_difficulty_has_no_simulator():
+    """Test that difficulty 0 keeps the clean tone."""
+    assert BandSimulator.for_difficulty(0) is None
+    assert BandSimulator.for_difficulty(9).station_pitches.size == 12  # Clamped to the hardest level
+
+def test_mix_keeps_length_and_format():
+    """Test that mixing returns int16 audio of the target's length, across chunk boundaries."""
+    band = BandSimulator(8000, stations=2, seed=1)
+    target = render_text("cq", 20, sample_rate=8000)
+    mixed = band.mix(target)
+
+    assert mixed.dtype == np.int16
+    assert len(mixed) == len(target) > CHUNK_SAMPLES
+    assert band.position == len(target)
+    assert len(band.mix(np.zeros(0, dtype=np.int16))) == 0
+
+def test_interfering_stations_at_their_pitches():
+    """Test that the band contains the interfering stations and band-limited noise."""
+    band = BandSimulator(8000, pitch=800, stations=3, snr_db=30, fading_depth=0, crash_rate_hz=0, seed=2)
+    mixed = band.mix(np.zeros(8000 * 60, dtype=np.int16)).astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(mixed))
+    frequencies = np.fft.rfftfreq(len(mixed), 1 / 8000)
+
+    def power(center, width=5):
+        return spectrum[np.abs(frequencies - center) < width].mean()
+
+    for pitch in band.station_pitches:
+        assert power(pitch) > 10 * power(800)
+    assert power(3500, 200) < power(1500, 200) / 10  # Noise stays inside the passband
+
+def test_target_can_be_copied_through_the_band():
+    """Test that a light band still lets the decoder copy the target."""
+    text = "paris paris"
+    band = BandSimulator.for_difficulty(1, 8000, pitch=800, seed=3)
+    mixed = band.mix(render_text(text, 20, 800, 8000))
+
+    decoder = MorseDecoder(8000, pitch=800, wpm=20)
+    decoded = decoder.feed(mixed) + decoder.flush()
+    assert decoded.strip() == text.upper()
+
+def test_band_rendered_ahead_matches_mix():
+    """Test that keying a target into a band rendered ahead gives the same samples as mixing it."""
+    target = render_text("c", 20)
+    mixed = BandSimulator.for_difficulty(4, seed=5).mix(target)
+    band = BandSimulator.for_difficulty(4, seed=5)
+    start, background = band.render_band(len(target) + 10_000)
+    assert np.array_equal(band.add_target(background, start, target), mixed)
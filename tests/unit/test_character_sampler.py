@@ -0,0 +1,49 @@
+# tests/unit/test_character_sampler.py
+import random
+from collections import Counter
+import pytest
+from src.character_sampler import WeightedSampler, AdaptiveCharacterSampler
+
+def test_draws_follow_weights():
+    """Test that items are drawn in proportion to their weights, after updates too."""
+    sampler = WeightedSampler("ABCDE", [1, 2, 3, 4, 0], random.Random(0))
+    sampler.set_weight("A", 0)
+    sampler.set_weight("E", 5)
+    assert sampler.total() == pytest.approx(14)
+
+    counts = Counter(sampler.sample() for _ in range(14000))
+    assert "A" not in counts
+    for item, weight in zip("BCDE", (2, 3, 4, 5)):
+        assert counts[item] == pytest.approx(weight * 1000, rel=0.1)
+
+def test_every_item_is_reachable():
+    """Test the tree descent at every position for sizes that are not powers of two."""
+    for size in (1, 2, 3, 7, 12, 33):
+        sampler = WeightedSampler(range(size), [0] * size)
+        for item in range(size):
+            sampler.set_weight(item, 1)
+            assert sampler.sample() == item
+            sampler.set_weight(item, 0)
+
+def test_all_zero_weights():
+    with pytest.raises(ValueError):
+        WeightedSampler("AB", [0, 0]).sample()
+
+def test_weak_characters_come_up_more():
+    """Test that missed and slow characters get more weight than mastered ones."""
+    sampler = AdaptiveCharacterSampler("ABC", random.Random(1))
+    for _ in range(10):
+        sampler.record("A", True, 500)
+        sampler.record("B", False, 500)
+        sampler.record("C", True, 1500)
+    weights = {character: sampler.sampler.weight(character) for character in "ABC"}
+    assert weights["B"] > weights["C"] > weights["A"]
+
+    counts = Counter(sampler.sample() for _ in range(3000))
+    assert counts["B"] > counts["C"] > counts["A"]
+
+def test_load_saved_stats():
+    sampler = AdaptiveCharacterSampler("AB")
+    sampler.load({"A": {"rounds": 10, "accuracy": 1.0, "mean_reaction_ms": 400, "mean_send_ms": None},
+                  "Z": {"rounds": 1, "accuracy": 0.0, "mean_reaction_ms": None, "mean_send_ms": None}})
+    assert sampler.sampler.weight("A") < sampler.sampler.weight("B")
@@ -0,0 +1,30 @@
+# tests/unit/test_commons.py
+from src.commons import MORSE_ALL, MORSE_COMMON, MORSE_COMMON_TREE, build_morse_tree
+
+def walk(tree, morse):
+    node = tree
+    for symbol in morse:
+        node = node.next(symbol)
+        if node is None:
+            return None
+    return node
+
+def test_tree_spells_every_character():
+    """Test that every table entry can be reached in the tree."""
+    tree = build_morse_tree(MORSE_ALL)
+    for morse, character in MORSE_ALL.items():
+        assert walk(tree, morse).character == character
+
+def test_candidates_narrow_down():
+    """Test the set of characters still possible after each element."""
+    assert MORSE_COMMON_TREE.candidates == frozenset(MORSE_COMMON.values())
+    assert walk(MORSE_COMMON_TREE, '.-').candidates == {'A', 'R', 'W', 'L', 'P', 'J', '1'}
+    assert walk(MORSE_COMMON_TREE, '-----').candidates == {'0'}
+
+def test_dead_ends_and_leaves():
+    """Test that invalid input is detected as soon as it leaves the tree."""
+    assert walk(MORSE_COMMON_TREE, '---.-') is None
+    assert walk(MORSE_COMMON_TREE, '-----').is_leaf()
+    assert not walk(MORSE_COMMON_TREE, '.').is_leaf()
+    # '..--' is not a character but leads to '2'
+    assert walk(MORSE_COMMON_TREE, '..--').character is None
@@ -3,7 +3,7 @@ import pytest
 import json
 import os
 import tempfile
-from src.config_manager import ConfigManager
+import time
 
 @pytest.fixture
 def temp_config_file():
@@ -38,34 +38,35 @@ def config_with_custom_data(temp_config_file):
     
     return temp_config_file
 
-def test_init_with_default_config(temp_config_file):
+def test_init_with_default_config(temp_config_file, make_config_manager):
     """Test that ConfigManager initializes with default config when file is empty."""
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     
     assert config_manager.get_config_value('general.input_timeout_ms') == 1000
     assert config_manager.get_config_value('receive_game.character_count_placeholder') == 3
 
-def test_load_existing_config(config_with_custom_data):
+def test_load_existing_config(config_with_custom_data, make_config_manager):
     """Test loading an existing config file."""
-    config_manager = ConfigManager(config_with_custom_data)
+    config_manager = make_config_manager(config_with_custom_data)
     
     assert config_manager.get_config_value('general.input_timeout_ms') == 2000
     assert config_manager.get_config_value('receive_game.character_count_placeholder') == 5
     assert config_manager.get_config_value('custom_section.test_value') == "hello"
 
-def test_save_config(temp_config_file):
+def test_save_config(temp_config_file, make_config_manager):
     """Test saving changes to the config file."""
     # Create and modify config
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     config_manager.set_config_value('new_section.new_value', 42)
+    config_manager.flush()
     
     # Load config again from file and verify changes were saved
-    new_config_manager = ConfigManager(temp_config_file)
+    new_config_manager = make_config_manager(temp_config_file)
     assert new_config_manager.get_config_value('new_section.new_value') == 42
 
-def test_get_nonexistent_value(temp_config_file):
+def test_get_nonexistent_value(temp_config_file, make_config_manager):
     """Test getting a value that doesn't exist."""
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     
     # Should return the default value
     assert config_manager.get_config_value('nonexistent.path', 'default') == 'default'
@@ -73,23 +74,24 @@ def test_get_nonexistent_value(temp_config_file):
     # Should return None if no default specified
     assert config_manager.get_config_value('nonexistent.path') is None
 
-def test_set_nested_value(temp_config_file):
+def test_set_nested_value(temp_config_file, make_config_manager):
     """Test setting a deeply nested value."""
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     
     # Set a deeply nested value
     config_manager.set_config_value('a.b.c.d.e', 'nested')
     
     # Verify it was set correctly
     assert config_manager.get_config_value('a.b.c.d.e') == 'nested'
+    config_manager.flush()
     
     # Load config again to verify it was saved
-    new_config_manager = ConfigManager(temp_config_file)
+    new_config_manager = make_config_manager(temp_config_file)
     assert new_config_manager.get_config_value('a.b.c.d.e') == 'nested'
 
-def test_convenience_methods(temp_config_file):
+def test_convenience_methods(temp_config_file, make_config_manager):
     """Test the convenience methods for common settings."""
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     
     # Test getter
     assert config_manager.get_input_timeout() == 1000
@@ -105,9 +107,9 @@ def test_convenience_methods(temp_config_file):
     config_manager.set_input_timeout(50)  # Should be increased to 100
     assert config_manager.get_input_timeout() == 100
 
-def test_reset_to_default_section(config_with_custom_data):
+def test_reset_to_default_section(config_with_custom_data, make_config_manager):
     """Test resetting a specific section to default."""
-    config_manager = ConfigManager(config_with_custom_data)
+    config_manager = make_config_manager(config_with_custom_data)
     
     # Verify custom values are loaded
     assert config_manager.get_config_value('general.input_timeout_ms') == 2000
@@ -120,9 +122,9 @@ def test_reset_to_default_section(config_with_custom_data):
     assert config_manager.get_config_value('receive_game.character_count_placeholder') == 5
     assert config_manager.get_config_value('custom_section.test_value') == "hello"
 
-def test_reset_to_default_all(config_with_custom_data):
+def test_reset_to_default_all(config_with_custom_data, make_config_manager):
     """Test resetting the entire config to default."""
-    config_manager = ConfigManager(config_with_custom_data)
+    config_manager = make_config_manager(config_with_custom_data)
     
     # Reset entire config
     config_manager.reset_to_default()
@@ -132,17 +134,17 @@ def test_reset_to_default_all(config_with_custom_data):
     assert config_manager.get_config_value('receive_game.character_count_placeholder') == 3
     assert config_manager.get_config_value('custom_section.test_value') is None
 
-def test_reset_nonexistent_section(temp_config_file):
+def test_reset_nonexistent_section(temp_config_file, make_config_manager):
     """Test resetting a section that doesn't exist in defaults."""
-    config_manager = ConfigManager(temp_config_file)
+    config_manager = make_config_manager(temp_config_file)
     
     # Should raise ValueError
     with pytest.raises(ValueError):
         config_manager.reset_to_default('nonexistent_section')
 
-def test_merge_with_defaults():
+def test_merge_with_defaults(tmp_path, make_config_manager):
     """Test the merge_with_defaults method."""
-    config_manager = ConfigManager()
+    config_manager = make_config_manager(str(tmp_path / "config.json"))
     
     user_config = {
         "general": {
@@ -162,3 +164,88 @@ def test_merge_with_defaults():
     # Verify user values are merged
     assert merged['general']['new_setting'] == "value"
     assert merged['new_section']['key'] == "value"
+
+def test_burst_of_changes_is_written_once(temp_config_file, make_config_manager):
+    """Test that rapid changes are collapsed into a single background write."""
+    config_manager = make_config_manager(temp_config_file, save_delay=0.05)
+    writes = []
+    original_write = config_manager._write_atomic
+    config_manager._write_atomic = lambda text: (writes.append(text), original_write(text))
+
+    for timeout in range(100, 2000, 20):
+        config_manager.set_input_timeout(timeout)
+    assert writes == []  # Nothing written synchronously
+
+    deadline = time.monotonic() + 2
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    assert len(writes) == 1
+    assert make_config_manager(temp_config_file).get_input_timeout() == 1980
+
+def test_atomic_write_leaves_no_temp_files(tmp_path, make_config_manager):
+    """Test that saving goes through a temp file that is renamed over the config."""
+    config_path = tmp_path / "nested" / "config.json"
+    config_manager = make_config_manager(str(config_path))
+    config_manager.set_config_value('general.input_timeout_ms', 1234)
+    config_manager.close()
+
+    assert os.listdir(tmp_path / "nested") == ["config.json"]
+    assert json.loads(config_path.read_text())['general']['input_timeout_ms'] == 1234
+
+def test_external_edit_is_reloaded_and_dispatched(temp_config_file, make_config_manager, edit_config_file):
+    """Test that an outside change is picked up and published to subscribers."""
+    config_manager = make_config_manager(temp_config_file)
+    notifications = []
+    config_manager.subscribe(notifications.append)
+
+    assert config_manager.check_for_changes() is False
+    edit_config_file(temp_config_file, general={"input_timeout_ms": 1500}, sound={"wpm": 20})
+    assert config_manager.check_for_changes() is True
+    assert config_manager.get_input_timeout() == 1000  # Not applied until dispatched
+
+    assert config_manager.dispatch_changes() == {'general.input_timeout_ms', 'sound.wpm'}
+    assert notifications == [{'general.input_timeout_ms', 'sound.wpm'}]
+    assert config_manager.get_input_timeout() == 1500
+    assert config_manager.get_config_value('sound.pitch_hz') == 800
+    assert config_manager.dispatch_changes() == set()
+
+def test_reloaded_values_are_validated(temp_config_file, make_config_manager, edit_config_file):
+    """Test that out-of-range values are clamped and invalid files are ignored."""
+    config_manager = make_config_manager(temp_config_file)
+    edit_config_file(temp_config_file, general={"input_timeout_ms": 50}, sound={"wpm": "fast", "pitch_hz": 9000})
+    config_manager.check_for_changes()
+    config_manager.dispatch_changes()
+
+    assert config_manager.get_input_timeout() == 100
+    assert config_manager.get_config_value('sound.wpm') == 12
+    assert config_manager.get_config_value('sound.pitch_hz') == 1500
+
+    with open(temp_config_file, 'w') as f:
+        f.write('{"general": ')
+    assert config_manager.check_for_changes() is False
+    assert config_manager.get_input_timeout() == 100
+
+def test_own_writes_are_not_reloaded(temp_config_file, make_config_manager):
+    """Test that saving the config does not trigger a reload of it."""
+    config_manager = make_config_manager(temp_config_file)
+    config_manager.set_input_timeout(2500)
+    config_manager.flush()
+    assert config_manager.check_for_changes() is False
+
+def test_unsaved_change_survives_reload(temp_config_file, make_config_manager, edit_config_file):
+    """Test that an in-game change not yet written is kept when an outside edit is reloaded."""
+    config_manager = make_config_manager(temp_config_file, save_delay=60)
+    config_manager.set_config_value('sound.wpm', 25)
+    edit_config_file(temp_config_file, sound={"pitch_hz": 600})
+
+    assert config_manager.check_for_changes() is True
+    assert config_manager.dispatch_changes() == {'sound.pitch_hz'}
+    assert config_manager.get_config_value('sound.wpm') == 25
+    assert config_manager.get_config_value('sound.pitch_hz') == 600
+
+    config_manager.flush()
+    with open(temp_config_file) as f:
+        saved = json.load(f)
+    assert (saved['sound']['wpm'], saved['sound']['pitch_hz']) == (25, 600)
@@ -0,0 +1,105 @@
+# tests/unit/test_display_manager.py
+import pytest
+import pygame
+from src.clock import FakeClock
+from src.display_manager import DisplayManager, SCREEN_WIDTH, SCREEN_HEIGHT, TEXT_CACHE_SIZE, KEYING_SCOPE_RECT
+
+class FakeStateManager:
+    def __init__(self):
+        self.state = "transmit_game"
+        self.score = 0
+        self.char_to_be_guessed = "A"
+        self.transmit_input_chars = []
+        self.transmit_key_times = []
+        self.key_down_ns = None
+        self.menu_selection = 0
+        self.clock = FakeClock()
+
+@pytest.fixture
+def display_manager():
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    yield DisplayManager(screen)
+    pygame.quit()
+
+def test_first_frame_is_full_redraw(display_manager):
+    display_manager.display_current_state(FakeStateManager())
+    assert display_manager.frame_pixels_pushed == SCREEN_WIDTH * SCREEN_HEIGHT
+
+def test_unchanged_frame_pushes_nothing(display_manager):
+    """Test that a frame without changes sends no pixels to the display."""
+    state_manager = FakeStateManager()
+    display_manager.display_current_state(state_manager)
+    display_manager.display_current_state(state_manager)
+    assert display_manager.frame_pixels_pushed == 0
+
+def test_changed_input_pushes_only_dirty_region(display_manager):
+    """Test that new input only updates the input line."""
+    state_manager = FakeStateManager()
+    display_manager.display_current_state(state_manager)
+    state_manager.transmit_input_chars.append("-")
+    display_manager.display_current_state(state_manager)
+
+    assert 0 < display_manager.frame_pixels_pushed < SCREEN_WIDTH * SCREEN_HEIGHT // 20
+
+def test_state_change_and_invalidate_redraw_everything(display_manager):
+    state_manager = FakeStateManager()
+    display_manager.display_current_state(state_manager)
+    state_manager.state = "menu"
+    display_manager.display_current_state(state_manager)
+    assert display_manager.frame_pixels_pushed == SCREEN_WIDTH * SCREEN_HEIGHT
+
+    display_manager.invalidate()
+    display_manager.display_current_state(state_manager)
+    assert display_manager.frame_pixels_pushed == SCREEN_WIDTH * SCREEN_HEIGHT
+
+def test_text_cache_reuses_surfaces(display_manager):
+    """Test that rendering the same text twice hits the cache."""
+    first = display_manager.render_text("Score: 1", display_manager.font, (255, 255, 0))
+    second = display_manager.render_text("Score: 1", display_manager.font, (255, 255, 0))
+    other_color = display_manager.render_text("Score: 1", display_manager.font, (255, 255, 255))
+
+    assert first is second
+    assert other_color is not first
+    assert display_manager.text_cache_hits == 1
+    assert display_manager.text_cache_hit_rate() == pytest.approx(1 / 3)
+
+def test_text_cache_is_bounded(display_manager):
+    for i in range(TEXT_CACHE_SIZE + 10):
+        display_manager.render_text(str(i), display_manager.font, (255, 255, 255))
+
+    assert len(display_manager.text_cache) == TEXT_CACHE_SIZE
+    assert ("0", display_manager.font, (255, 255, 255), True) not in display_manager.text_cache
+
+def test_keying_scope_scrolls_key_presses(display_manager):
+    """Test that a key press scrolls across the strip and only the strip is updated."""
+    state_manager = FakeStateManager()
+    display_manager.display_current_state(state_manager)
+    start_ns = state_manager.clock.now_ns()
+    state_manager.transmit_key_times.append((start_ns + 100_000_000, start_ns + 400_000_000))
+    state_manager.clock.advance(500)
+    display_manager.display_current_state(state_manager)
+
+    x, y, width, height = KEYING_SCOPE_RECT
+    assert display_manager.frame_pixels_pushed == width * height
+    assert display_manager.animating
+
+    def trace_is_high(ms_ago):
+        column = x + width - 1 - ms_ago // 5
+        return display_manager.screen.get_at((column, y + 4))[:3] == (0, 255, 0)
+    assert trace_is_high(250)
+    assert not trace_is_high(50)
+    assert not trace_is_high(450)
+
+    # Held key: high up to now, until nothing is in view and the scope stops scrolling
+    state_manager.key_down_ns = state_manager.clock.now_ns() - 20_000_000
+    state_manager.clock.advance(20)
+    display_manager.display_current_state(state_manager)
+    assert trace_is_high(0)
+    state_manager.key_down_ns = None
+    state_manager.transmit_key_times.clear()
+    state_manager.clock.advance(5000)
+    display_manager.display_current_state(state_manager)
+    assert not trace_is_high(0)
+    assert not display_manager.animating
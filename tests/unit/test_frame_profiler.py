@@ -0,0 +1,55 @@
+# tests/unit/test_frame_profiler.py
+import json
+from src.frame_profiler import FrameProfiler, HISTORY_SIZE
+
+def record(profiler, state, phase, duration_ns):
+    profiler.begin_frame(state)
+    profiler.last_mark_ns -= duration_ns
+    profiler.mark(phase)
+    profiler.end_frame()
+
+def test_percentiles_per_state():
+    profiler = FrameProfiler(enabled=True)
+    for ms in range(1, 101):
+        record(profiler, "menu", "display", ms * 1_000_000)
+    record(profiler, "transmit_game", "display", 50_000_000)
+
+    p50, p95, p99 = profiler.percentiles("menu", "display")
+    assert 49 <= p50 <= 51
+    assert 94 <= p95 <= 96
+    assert 98 <= p99 <= 100
+    assert profiler.percentiles("transmit_game", "display")[0] >= 50
+    assert profiler.percentiles("menu", "update") is None
+
+def test_history_is_rolling():
+    profiler = FrameProfiler(enabled=True)
+    for _ in range(HISTORY_SIZE + 100):
+        record(profiler, "menu", "update", 1000)
+    assert len(profiler.samples[("menu", "update")]) == HISTORY_SIZE
+
+def test_dump_trace(tmp_path):
+    """Test that the trace file is in the Chrome trace event format."""
+    profiler = FrameProfiler(enabled=True)
+    record(profiler, "menu", "update", 2_000_000)
+    path = tmp_path / "trace.json"
+
+    assert profiler.dump_trace(str(path)) == 1
+    event = json.loads(path.read_text())["traceEvents"][0]
+    assert event["ph"] == "X" and event["name"] == "update" and event["cat"] == "menu"
+    assert event["dur"] >= 2000
+
+def test_repeated_phase_is_summed_per_frame():
+    """Test that a phase marked several times in a frame counts as one sample."""
+    profiler = FrameProfiler(enabled=True)
+    profiler.begin_frame("menu")
+    for _ in range(3):
+        profiler.last_mark_ns -= 2_000_000
+        profiler.mark("wait")
+        profiler.last_mark_ns -= 1_000_000
+        profiler.mark("events")
+    profiler.end_frame()
+
+    assert len(profiler.samples[("menu", "wait")]) == 1
+    assert profiler.percentiles("menu", "wait")[0] >= 6
+    assert 3 <= profiler.percentiles("menu", "events")[0] < 6
+    assert len(profiler.trace_events) == 6
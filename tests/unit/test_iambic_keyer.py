@@ -0,0 +1,63 @@
+# tests/unit/test_iambic_keyer.py
+import pytest
+from src.iambic_keyer import IambicKeyer
+
+UNIT = 60_000_000  # 20 WPM in ns
+
+def run(keyer, until_ns):
+    """Step the keyer edge by edge and return the elements as (symbol, start unit)."""
+    elements = []
+    while True:
+        next_ns = keyer.next_event_ns()
+        if next_ns is None or next_ns > until_ns:
+            break
+        elements += [(symbol, start // UNIT) for symbol, start, _ in keyer.step(next_ns)]
+    elements += [(symbol, start // UNIT) for symbol, start, _ in keyer.step(until_ns)]
+    return elements
+
+def test_held_paddle_repeats_with_exact_timing():
+    """Test that a held paddle sends evenly spaced elements at the keyer speed."""
+    edges = []
+    keyer = IambicKeyer(20, on_key=lambda down: edges.append(down))
+    keyer.set_paddles(True, False, 0)
+    assert run(keyer, 7 * UNIT) == [('.', 0), ('.', 2), ('.', 4), ('.', 6)]
+
+    keyer.set_paddles(False, False, 7 * UNIT)
+    assert run(keyer, 20 * UNIT) == []
+    assert edges == [True, False] * 4
+    assert keyer.next_event_ns() is None
+
+def test_squeeze_alternates():
+    """Test that squeezing both paddles alternates dots and dashes, starting with the first pressed."""
+    keyer = IambicKeyer(20)
+    keyer.set_paddles(False, True, 0)
+    keyer.set_paddles(True, True, 0)
+    assert run(keyer, 11 * UNIT) == [('-', 0), ('.', 4), ('-', 6), ('.', 10)]
+
+@pytest.mark.parametrize("mode, expected", [
+    ("A", [('.', 0), ('-', 2), ('.', 6)]),
+    ("B", [('.', 0), ('-', 2), ('.', 6), ('-', 8)]),
+])
+def test_squeeze_release_mode_a_and_b(mode, expected):
+    """Test that releasing a squeeze stops in Mode A and sends one more element in Mode B."""
+    keyer = IambicKeyer(20, mode=mode)
+    keyer.set_paddles(True, False, 0)
+    keyer.set_paddles(True, True, 0)
+    elements = run(keyer, 6 * UNIT + UNIT // 2)
+    keyer.set_paddles(False, False, 6 * UNIT + UNIT // 2)  # During the second dot
+    assert elements + run(keyer, 20 * UNIT) == expected
+
+def test_dot_memory():
+    """Test that a dot tapped during a dash is sent after it, in either mode."""
+    for mode in ("A", "B"):
+        keyer = IambicKeyer(20, mode=mode)
+        keyer.set_paddles(False, True, 0)
+        elements = run(keyer, 0)
+        keyer.set_paddles(True, True, UNIT)
+        keyer.set_paddles(False, True, UNIT + 1)
+        keyer.set_paddles(False, False, 2 * UNIT)
+        assert elements + run(keyer, 20 * UNIT) == [('-', 0), ('.', 4)]
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        IambicKeyer(20, mode="C")
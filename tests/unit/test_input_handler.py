@@ -0,0 +1,107 @@
+# tests/unit/test_input_handler.py
+import pytest
+import pygame
+from src.input_handler import InputHandler, KEYER_ELEMENT_EVENT, KEYER_KEY_EVENT, REMOTE_KEY_EVENT
+from src.state_manager import StateManager
+
+class FakeSoundManager:
+    def __init__(self):
+        self.sound_playing = False
+        self.remote_keys = []
+
+    def start_tone(self):
+        self.sound_playing = True
+
+    def stop_tone(self):
+        self.sound_playing = False
+
+    def play_morse_character(self, character):
+        pass
+
+    def is_character_playing(self):
+        return False
+
+    def set_remote_key(self, operator_id, down):
+        self.remote_keys.append((operator_id, down))
+
+@pytest.fixture
+def input_handler(tmp_path, make_config_manager):
+    """Create an InputHandler in a fresh transmit round."""
+    state_manager = StateManager(FakeSoundManager(), make_config_manager(str(tmp_path / "config.json")))
+    state_manager.state = "transmit_game"
+    state_manager.initialize_transmit_game()
+    state_manager.char_to_be_guessed = "0"
+    return InputHandler(state_manager, None, state_manager.sound_manager)
+
+def key(input_handler, event_type, timestamp_ns):
+    input_handler.handle_event(pygame.event.Event(event_type, key=pygame.K_SPACE, unicode=" "), timestamp_ns)
+
+def press(input_handler, start_ms, length_ms):
+    key(input_handler, pygame.KEYDOWN, start_ms * 1_000_000)
+    key(input_handler, pygame.KEYUP, (start_ms + length_ms) * 1_000_000)
+
+def test_elements_use_event_timestamps(input_handler):
+    """Test that dot/dash is decided from the capture timestamps, not from when events are handled."""
+    press(input_handler, 0, 60)
+    press(input_handler, 100, 250)
+
+    state_manager = input_handler.state_manager
+    assert state_manager.transmit_input_chars == [".", "-"]
+    assert state_manager.transmit_key_times == [(0, 60_000_000), (100_000_000, 350_000_000)]
+
+class FakeKeyer:
+    def __init__(self):
+        self.changes = []
+
+    def set_paddles(self, dot, dash, timestamp_ns):
+        self.changes.append((dot, dash, timestamp_ns))
+
+def test_paddles_go_to_keyer(input_handler):
+    """Test that paddle keys are passed to the keyer and its elements are added to the input."""
+    input_handler.keyer = keyer = FakeKeyer()
+    input_handler.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_LCTRL, unicode=""), 1000)
+    input_handler.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RCTRL, unicode=""), 2000)
+    input_handler.handle_event(pygame.event.Event(pygame.KEYUP, key=pygame.K_LCTRL, unicode=""), 3000)
+    assert keyer.changes == [(True, False, 1000), (True, True, 2000), (False, True, 3000)]
+
+    input_handler.handle_event(pygame.event.Event(KEYER_ELEMENT_EVENT, symbol='-', start_ns=0,
+                                                  end_ns=180_000_000, unit_ns=60_000_000))
+    assert input_handler.state_manager.transmit_input_chars == ['-']
+    assert not input_handler.sound_manager.sound_playing  # The keyer keys the tone itself
+
+def keyer_key(input_handler, down, timestamp_ns=0):
+    input_handler.handle_event(pygame.event.Event(KEYER_KEY_EVENT, down=down, timestamp_ns=timestamp_ns))
+
+def test_keyer_sidetone_only_in_transmit_game(input_handler):
+    """Test that keyer edges key the tone in the transmit game but not in the menus."""
+    keyer_key(input_handler, True)
+    assert input_handler.sound_manager.sound_playing
+    keyer_key(input_handler, False)
+    assert not input_handler.sound_manager.sound_playing
+
+    input_handler.state_manager.state = "menu"
+    keyer_key(input_handler, True)
+    assert not input_handler.sound_manager.sound_playing
+
+def test_straight_key_does_not_depend_on_keyer_tone(input_handler):
+    """Test that Space works while a keyer element sounds, and a press from before
+    the round began is released without being added to the new round."""
+    keyer_key(input_handler, True)
+    press(input_handler, 0, 60)
+    assert input_handler.state_manager.transmit_input_chars == ["."]
+    assert input_handler.sound_manager.sound_playing  # The keyer is still down
+    keyer_key(input_handler, False)
+
+    key(input_handler, pygame.KEYDOWN, 100_000_000)
+    input_handler.state_manager.initialize_transmit_game()
+    key(input_handler, pygame.KEYUP, 200_000_000)
+    assert input_handler.state_manager.transmit_input_chars == []
+    assert not input_handler.sound_manager.sound_playing
+
+def test_remote_keying_is_played_from_events(input_handler):
+    """Test that remote key edges posted by the relay thread key the remote tone when handled, in any state."""
+    input_handler.state_manager.state = "menu"
+    input_handler.handle_event(pygame.event.Event(REMOTE_KEY_EVENT, operator_id=3, down=True))
+    input_handler.handle_event(pygame.event.Event(REMOTE_KEY_EVENT, operator_id=3, down=False))
+    assert input_handler.sound_manager.remote_keys == [(3, True), (3, False)]
+    assert not input_handler.sound_manager.sound_playing
@@ -0,0 +1,148 @@
+# tests/unit/test_key_recorder.py
+import pygame
+from src.clock import FakeClock
+from src.input_handler import InputHandler
+from src.key_recorder import (KeyEventLog, KeyEventReplayer, record_targets, record_playback, KEY_DOWN, KEY_UP,
+                              TARGET, CONFIG, PLAYING)
+from src.simulation import NullSoundManager, StaticConfig
+from src.state_manager import StateManager
+
+# (ms, event type, key, unicode): menu -> play -> transmit, then key a dot, a dash and quit
+SESSION = [(100, pygame.KEYDOWN, pygame.K_RETURN, "\r"), (300, pygame.KEYDOWN, pygame.K_DOWN, ""),
+           (500, pygame.KEYDOWN, pygame.K_RETURN, "\r"),
+           (5000, pygame.KEYDOWN, pygame.K_SPACE, " "), (5060, pygame.KEYUP, pygame.K_SPACE, " "),
+           (8500, pygame.KEYDOWN, pygame.K_SPACE, " "), (8800, pygame.KEYUP, pygame.K_SPACE, " "),
+           (11000, pygame.KEYDOWN, pygame.K_ESCAPE, "\x1b")]
+
+class TimedSoundManager(NullSoundManager):
+    """Plays every receive character for `length_ms` of clock time."""
+
+    def __init__(self, clock, length_ms):
+        super().__init__()
+        self.clock = clock
+        self.length_ms = length_ms
+        self.end_ms = 0
+
+    def play_morse_character(self, character):
+        self.end_ms = self.clock.now_ms() + self.length_ms
+
+    def is_character_playing(self):
+        return self.clock.now_ms() < self.end_ms
+
+def play_live(log, clock, session=SESSION, sound_manager=None):
+    """Play `session` as the game loop would, recording it into `log`. A unicode
+    given as a function is called with the state manager when the key is pressed."""
+    sound_manager = sound_manager if sound_manager is not None else NullSoundManager()
+    state_manager = StateManager(sound_manager, StaticConfig(log.input_timeout_ms), clock)
+    record_targets(state_manager, log)
+    input_handler = InputHandler(state_manager, None, state_manager.sound_manager)
+    record_playback(input_handler, log)
+    results = []
+
+    def run_until(time_ns):
+        while True:
+            deadline_ms = state_manager.next_deadline_ms(clock.now_ms())
+            if deadline_ms is None or (clock.now_ms() + deadline_ms) * 1_000_000 > time_ns:
+                break
+            clock.time_ns = max(clock.time_ns, (clock.now_ms() + deadline_ms) * 1_000_000)
+            state_manager.update(clock.now_ms())
+            if state_manager.state in ("result", "receive_result"):
+                results.append(state_manager.result_message)
+        clock.time_ns = time_ns
+
+    for at_ms, event_type, key, unicode in session:
+        run_until(log.start_ns + at_ms * 1_000_000)
+        if callable(unicode):
+            unicode = unicode(state_manager)
+        event = pygame.event.Event(event_type, key=key, unicode=unicode)
+        log.record_event(event, clock.now_ns())
+        input_handler.handle_event(event, clock.now_ns())
+        state_manager.update(clock.now_ms())
+    run_until(log.start_ns + 60_000 * 1_000_000)
+    return results, state_manager.state
+
+def test_log_round_trip(tmp_path):
+    """Test that a saved log is read back from the mapped file unchanged."""
+    log = KeyEventLog(start_ns=123_456_789, input_timeout_ms=800, keyer_mode="iambic_b", keyer_wpm=25)
+    log.record_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, unicode="a"), 123_456_790)
+    log.record_target("receive_game", "Q", 123_456_791)
+    log.record_event(pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0)), 123_456_792)
+    path = tmp_path / "keys.bin"
+    log.save(path)
+
+    loaded = KeyEventLog.load(path)
+    assert (loaded.start_ns, loaded.input_timeout_ms, loaded.keyer_mode, loaded.keyer_wpm) == \
+        (123_456_789, 800, "iambic_b", 25)
+    assert list(loaded) == [(123_456_790, KEY_DOWN, pygame.K_a, ord("a")), (123_456_791, TARGET, 1, ord("Q"))]
+    assert path.stat().st_size == 24 + 2 * 4 * 8
+    loaded.close()
+
+def test_replay_matches_live_session(tmp_path):
+    """Test that replaying a recorded session gives the live results, every time."""
+    clock = FakeClock(start_ms=1000)
+    log = KeyEventLog(start_ns=clock.now_ns(), input_timeout_ms=1000)
+    live_results, live_state = play_live(log, clock)
+    assert len(live_results) == 2
+    path = tmp_path / "keys.bin"
+    log.save(path)
+
+    replays = []
+    for seed in (1, 2):
+        loaded = KeyEventLog.load(path)
+        replays.append(KeyEventReplayer(loaded, seed=seed).run())  # The recorded characters are used, not new draws
+        loaded.close()
+
+    first, second = replays
+    assert first["transitions"] == second["transitions"]
+    assert first["events"] == len(SESSION)
+    assert first["extra_draws"] == 0
+    assert [message for _, state, message in first["transitions"] if state == "result"] == live_results
+    assert first["final_state"] == live_state
+
+def test_reloaded_settings_are_replayed(tmp_path):
+    """Test that settings reloaded mid-session are logged and applied at the same point of the replay."""
+    log = KeyEventLog(start_ns=0, input_timeout_ms=1000)
+    log.record_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, unicode="\r"), 100)
+    log.record_config("general.input_timeout_ms", 2500, 200)
+    log.record_config("transmit_game.keyer_mode", "iambic_a", 300)
+    log.record_config("sound.wpm", 30, 400)  # Does not affect a replay
+    log.record_event(pygame.event.Event(pygame.KEYUP, key=pygame.K_RETURN, unicode="\r"), 500)
+    assert log.key_event_count() == 2
+    assert len(log) == 4
+    path = tmp_path / "keys.bin"
+    log.save(path)
+
+    loaded = KeyEventLog.load(path)
+    assert [record[1] for record in loaded] == [KEY_DOWN, CONFIG, CONFIG, KEY_UP]
+    replayer = KeyEventReplayer(loaded)
+    stats = replayer.run()
+    loaded.close()
+    assert stats["events"] == 2
+    assert replayer.state_manager.input_timeout_ms == 2500
+    assert (replayer.keyer.mode, replayer.input_handler.keyer) == ("A", replayer.keyer)
+
+def other_character(state_manager):
+    return "E" if state_manager.char_to_receive != "E" else "T"
+
+# Menu -> play -> receive; the right answer while the character still plays, then a wrong one
+RECEIVE_SESSION = [(100, pygame.KEYDOWN, pygame.K_RETURN, "\r"), (300, pygame.KEYDOWN, pygame.K_RETURN, "\r"),
+                   (4400, pygame.KEYDOWN, pygame.K_a, lambda state_manager: state_manager.char_to_receive),
+                   (5500, pygame.KEYDOWN, pygame.K_a, other_character),
+                   (9000, pygame.KEYDOWN, pygame.K_ESCAPE, "\x1b")]
+
+def test_replay_ignores_answers_typed_during_playback(tmp_path):
+    """Test that a receive answer the live game ignored while the character played is ignored in the replay too."""
+    clock = FakeClock(start_ms=1000)
+    log = KeyEventLog(start_ns=clock.now_ns(), input_timeout_ms=1000)
+    sound_manager = TimedSoundManager(clock, length_ms=800)
+    live_results, live_state = play_live(log, clock, RECEIVE_SESSION, sound_manager)
+    assert [kind for _, kind, _, _ in log if kind in (KEY_DOWN, PLAYING)][2:4] == [KEY_DOWN, PLAYING]
+    path = tmp_path / "keys.bin"
+    log.save(path)
+
+    loaded = KeyEventLog.load(path)
+    stats = KeyEventReplayer(loaded).run()
+    loaded.close()
+    assert live_results == ["WRONG!"]
+    assert [message for _, state, message in stats["transitions"] if state == "receive_result"] == live_results
+    assert stats["final_state"] == live_state
@@ -0,0 +1,41 @@
+# tests/unit/test_keying_classifier.py
+import random
+import pytest
+from src.keying_classifier import AdaptiveKeyingClassifier, MIN_CHARACTER_GAP_MS
+
+def key_elements(classifier, morse, dot_seconds, spread=0.0, rng=None):
+    rng = rng or random.Random(0)
+    symbols = []
+    for symbol in morse:
+        length = dot_seconds * (1 if symbol == '.' else 3)
+        symbols.append(classifier.classify(length * (1 + rng.uniform(-spread, spread))))
+    return "".join(symbols)
+
+def test_default_matches_old_threshold():
+    classifier = AdaptiveKeyingClassifier()
+    assert classifier.threshold == pytest.approx(0.2)
+
+@pytest.mark.parametrize("wpm", [5, 12, 25, 40])
+def test_learns_operator_speed(wpm):
+    """Test that after a short warm-up elements are classified correctly at any speed."""
+    classifier = AdaptiveKeyingClassifier()
+    dot = 1.2 / wpm
+    key_elements(classifier, "-.-.--.-" * 5, dot, spread=0.2)
+
+    assert key_elements(classifier, "-.-..-.-...--", dot, spread=0.2) == "-.-..-.-...--"
+    assert classifier.wpm() == pytest.approx(wpm, rel=0.2)
+
+def test_follows_speed_change():
+    classifier = AdaptiveKeyingClassifier()
+    key_elements(classifier, "-.-." * 10, 1.2 / 10)
+    key_elements(classifier, "-.-." * 10, 1.2 / 25)
+    assert classifier.wpm() == pytest.approx(25, rel=0.1)
+
+def test_character_gap_derived_from_speed():
+    """Test that the character gap shrinks with speed but never exceeds the configured timeout."""
+    classifier = AdaptiveKeyingClassifier()
+    assert classifier.character_gap_ms(1000) == 1000  # Nothing learned yet
+
+    key_elements(classifier, "-.-.--" * 5, 1.2 / 30)
+    assert MIN_CHARACTER_GAP_MS <= classifier.character_gap_ms(1000) < 300
+    assert classifier.character_gap_ms(100) == 100
@@ -0,0 +1,14 @@
+# tests/unit/test_latency_probe.py
+import pytest
+from src.latency_probe import measure_key_latency
+
+def test_loopback_measures_key_latency():
+    """Test that every probe press is heard and timed, and the report adds up."""
+    report = measure_key_latency(256, channels=1, sidetone=True, presses=5, seed=1)
+
+    assert report["presses"] == 5
+    assert report["tones_heard"] == 5
+    assert report["buffer_ms"] == pytest.approx(256 / 44100 * 1000)
+    assert 0 < report["mix_mean_ms"] <= report["mix_max_ms"]
+    assert report["mix_p95_ms"] <= report["mix_max_ms"]
+    assert report["estimated_ms"] == pytest.approx(report["mix_mean_ms"] + report["buffer_ms"])
@@ -0,0 +1,43 @@
+# tests/unit/test_morse_decoder.py
+import numpy as np
+import pytest
+from src.morse_synth import iter_text_samples, dot_samples
+from src.morse_decoder import MorseDecoder
+
+TEXT = "CQ DE OH2ABC 5NN 73"
+
+def render(text, wpm, sample_rate=44100):
+    return np.concatenate(list(iter_text_samples([text], wpm=wpm, sample_rate=sample_rate)))
+
+def decode(audio, decoder, chunk_size=1024):
+    chunks = [audio[i:i + chunk_size] for i in range(0, len(audio), chunk_size)]
+    return "".join(decoder.feed(chunk) for chunk in chunks) + decoder.flush()
+
+@pytest.mark.parametrize("wpm", [8, 12, 25, 40])
+def test_decodes_clean_audio(wpm):
+    """Test decoding the game's own synthesized audio at different speeds."""
+    decoder = MorseDecoder(wpm=wpm)
+    assert decode(render(TEXT, wpm), decoder).strip() == TEXT
+    assert decoder.wpm == pytest.approx(wpm, rel=0.15)
+
+def test_decodes_noisy_float_audio():
+    """Test decoding float PCM with added noise."""
+    rng = np.random.default_rng(1)
+    audio = render(TEXT, 20) / 32768 * 0.5
+    audio = audio + rng.normal(0, 0.05, len(audio))
+    assert decode(audio, MorseDecoder(wpm=20)).strip() == TEXT
+
+def test_result_does_not_depend_on_chunk_size():
+    """Test that the streaming decoder gives the same text for any chunking."""
+    audio = render(TEXT, 20)
+    assert decode(audio, MorseDecoder(wpm=20), 37) == decode(audio, MorseDecoder(wpm=20), 8192)
+
+def test_character_emitted_within_one_character_gap():
+    """Test that a character is emitted before the next one starts, without flushing."""
+    audio = render("K", 20)  # Ends with a three-unit letter gap
+    decoder = MorseDecoder(wpm=20)
+    assert decoder.feed(audio) == "K"
+
+def test_unknown_detector():
+    with pytest.raises(ValueError):
+        MorseDecoder(detector="fft")
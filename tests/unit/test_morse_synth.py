@@ -0,0 +1,68 @@
+# tests/unit/test_morse_synth.py
+import numpy as np
+from src.morse_synth import (render_morse, dot_samples, iter_text_samples, chunk_samples,
+                              morse_timeline, sample_edges, render_text, timing_report)
+
+def test_render_morse_is_sample_exact():
+    """Test that a rendered character has exactly the expected number of samples."""
+    unit = dot_samples(12, 44100)
+    # '.-' = dot + gap + dash + letter gap = 1 + 1 + 3 + 3 units
+    wave = render_morse('.-', wpm=12, sample_rate=44100)
+    assert len(wave) == 8 * unit
+
+    # Symbol gap and trailing gap are silent
+    assert not wave[unit:2 * unit].any()
+    assert not wave[5 * unit:].any()
+
+def test_iter_text_samples_spacing():
+    """Test word gaps, collapsed whitespace and skipped unknown characters."""
+    unit = dot_samples(20, 8000)
+    buffers = list(iter_text_samples(["e  e", "\n#e"], wpm=20, sample_rate=8000))
+
+    # E, word gap, E, word gap, E - the unknown '#' produces nothing
+    assert [len(b) for b in buffers] == [4 * unit, 4 * unit, 4 * unit, 4 * unit, 4 * unit]
+    assert not buffers[1].any()
+
+def test_iter_text_samples_reuses_buffers():
+    """Test that repeated characters share one rendered buffer."""
+    buffers = list(iter_text_samples(["aaa"]))
+    assert buffers[0] is buffers[1] is buffers[2]
+
+def test_chunk_samples_preserves_stream():
+    """Test that rechunking keeps every sample in order."""
+    buffers = [np.arange(n, dtype=np.int16) for n in (5, 17, 3, 40)]
+    chunks = list(chunk_samples(buffers, chunk_size=16))
+
+    assert all(len(chunk) == 16 for chunk in chunks[:-1])
+    assert np.array_equal(np.concatenate(chunks), np.concatenate(buffers))
+
+def test_render_text_places_every_element_on_its_sample():
+    """Test that a continuous text buffer is keyed exactly on the computed edges."""
+    marks, total = morse_timeline("cq de", wpm=37)
+    edges = sample_edges(marks, 8000)
+    wave = render_text("cq de", wpm=37, sample_rate=8000)
+
+    assert len(wave) == round(total * 8000)
+    keyed = np.zeros(len(wave), dtype=bool)
+    for start, end in edges:
+        keyed[start:end] = True
+        assert wave[start + 10:end - 10].any()
+    assert not wave[~keyed].any()
+
+def test_farnsworth_spacing_sets_overall_speed():
+    """Test that Farnsworth gaps give the overall speed while elements keep the character speed."""
+    # PARIS plus a word gap is one standard word: 6 s at 10 WPM
+    marks, total = morse_timeline("paris paris", wpm=20, farnsworth_wpm=10)
+    second_word = marks[len(marks) // 2][0]
+    assert abs(second_word - 6.0) < 1e-9
+    assert marks[0][1] == 1.2 / 20
+
+    # Without Farnsworth, or with a higher overall speed, spacing is standard
+    assert morse_timeline("paris", 20, 25) == morse_timeline("paris", 20)
+
+def test_timing_error_stays_within_half_a_sample():
+    """Test that edge errors do not accumulate at any speed."""
+    for wpm in (5, 13, 27.5, 40, 60):
+        report = timing_report("the quick brown fox " * 20, wpm, 44100, farnsworth_wpm=wpm / 2)
+        assert report["max_error_us"] <= 0.5e6 / 44100 + 1e-6
+    assert timing_report("##", 20) is None
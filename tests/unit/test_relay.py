@@ -0,0 +1,131 @@
+# tests/unit/test_relay.py
+import asyncio
+import threading
+import time
+from src.relay import (RelayServer, RelayConnection, RelayClient, FRAME, KEY_DOWN, KEY_UP, WELCOME, LEFT,
+                       parse_address, DEFAULT_RELAY_PORT)
+
+async def read_frame(reader):
+    return FRAME.unpack(await reader.readexactly(FRAME.size))
+
+def test_frames_are_broadcast_with_sender_id():
+    """Test that key frames reach every connection stamped with the sender's id, and a leaving sender is released."""
+    async def scenario():
+        server = RelayServer(flush_interval=0.001)
+        host, port = await server.start("127.0.0.1", 0)
+        reader_a, writer_a = await asyncio.open_connection(host, port)
+        reader_b, writer_b = await asyncio.open_connection(host, port)
+        welcome_a = await read_frame(reader_a)
+        welcome_b = await read_frame(reader_b)
+        assert welcome_a[0] == welcome_b[0] == WELCOME and welcome_a[1] != welcome_b[1]
+
+        writer_a.write(FRAME.pack(KEY_DOWN, 999, 1234) + FRAME.pack(KEY_UP, 999, 5678)[:5])
+        writer_a.write(FRAME.pack(KEY_UP, 999, 5678)[5:])
+        assert await read_frame(reader_b) == (KEY_DOWN, welcome_a[1], 1234)
+        assert await read_frame(reader_b) == (KEY_UP, welcome_a[1], 5678)
+        assert await read_frame(reader_a) == (KEY_DOWN, welcome_a[1], 1234)
+
+        writer_a.close()
+        assert (await read_frame(reader_b))[:2] == (LEFT, welcome_a[1])
+        writer_b.close()
+        server.close()
+        return server.stats
+    stats = asyncio.run(scenario())
+    assert stats["frames_in"] == 2
+
+class FakeTransport:
+    def __init__(self):
+        self.written = bytearray()
+        self.aborted = False
+        self.reading = True
+
+    def set_write_buffer_limits(self, high):
+        pass
+
+    def write(self, data):
+        self.written += data
+
+    def abort(self):
+        self.aborted = True
+
+    def pause_reading(self):
+        self.reading = False
+
+    def resume_reading(self):
+        self.reading = True
+
+def test_backpressure():
+    """Test that a paused connection is caught up on resume or dropped when too far behind,
+    and that a flooding sender is not read until the next flush."""
+    server = RelayServer(max_pending=FRAME.size * 4)
+    slow, flooder = RelayConnection(server), RelayConnection(server)
+    slow.connection_made(FakeTransport())
+    flooder.connection_made(FakeTransport())
+
+    slow.pause_writing()
+    server.broadcast(FRAME.pack(KEY_DOWN, 0, 1) * 3, 3)
+    server.flush()
+    assert len(slow.transport.written) == FRAME.size  # Only the welcome
+    slow.resume_writing()
+    assert len(slow.transport.written) == FRAME.size * 4
+
+    slow.pause_writing()
+    server.broadcast(FRAME.pack(KEY_DOWN, 0, 1) * 5, 5)
+    server.flush()
+    assert slow.transport.aborted and server.stats["dropped_slow"] == 1
+
+    flooder.data_received(FRAME.pack(KEY_DOWN, 0, 1) * 100)
+    assert not flooder.transport.reading
+    server.flush()
+    assert flooder.transport.reading
+
+def test_remote_keying_keeps_its_timing():
+    """Test that a remote operator's key edges are played with their original spacing
+    however they arrive, after the playback delay."""
+    loop = asyncio.new_event_loop()
+    server = RelayServer()
+    address = loop.run_until_complete(server.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    played = []
+    listener = RelayClient(*address, on_remote_key=lambda operator, down: played.append((down, time.perf_counter_ns())),
+                           playback_delay_ms=100).start()
+    sender = RelayClient(*address).start()
+    sent_ns = time.perf_counter_ns()
+    sender.send_key(True, sent_ns)
+    sender.send_key(False, sent_ns + 60_000_000)  # Both edges arrive at once
+    time.sleep(0.4)
+    sender.stop()
+    listener.stop()
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+    assert [down for down, _ in played] == [True, False]
+    assert 55 <= (played[1][1] - played[0][1]) / 1e6 <= 75
+    assert played[0][1] - sent_ns >= 100_000_000
+
+def test_leaving_operator_is_not_keyed_again():
+    """Test that an operator who leaves mid-press stays released, even though
+    the key-down is still waiting for its playback time."""
+    played = []
+    client = RelayClient("127.0.0.1", on_remote_key=lambda operator, down: played.append((operator, down)),
+                         playback_delay_ms=20)
+    client.loop = asyncio.new_event_loop()
+
+    async def scenario():
+        client.frame_received(WELCOME, 1, 0)
+        client.frame_received(KEY_DOWN, 2, time.perf_counter_ns())
+        client.frame_received(LEFT, 2, 0)
+        await asyncio.sleep(0.1)
+    client.loop.run_until_complete(scenario())
+    client.loop.close()
+
+    assert client.keys_down == set()
+    assert played == []
+    assert client.scheduled == {}
+
+def test_parse_address():
+    assert parse_address("club.local") == ("club.local", DEFAULT_RELAY_PORT)
+    assert parse_address("10.0.0.5:9000") == ("10.0.0.5", 9000)
@@ -0,0 +1,89 @@
+# tests/unit/test_session_store.py
+import sqlite3
+import threading
+import pytest
+from src.session_store import SessionStore
+from src.state_manager import StateManager
+from src.clock import FakeClock
+
+class FakeSoundManager:
+    def play_morse_character(self, character):
+        pass
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def test_rounds_are_written_in_batches(store):
+    """Test that queued rounds reach the database and the per-character queries."""
+    session = store.start_session("transmit_game")
+    store.record_round(session, "transmit_game", "A", "A", "CORRECT!", 400, [(0, 60_000_000), (120_000_000, 300_000_000)], ".-")
+    store.record_round(session, "transmit_game", "A", "N", "WRONG!", 600, [(0, 180_000_000), (240_000_000, 300_000_000)], "-.")
+    store.record_round(session, "receive_game", "E", "E", "CORRECT!", 900)
+    store.flush()
+
+    stats = store.character_stats("transmit_game")
+    assert stats["A"]["rounds"] == 2
+    assert stats["A"]["accuracy"] == 0.5
+    assert stats["A"]["mean_reaction_ms"] == 500
+    assert stats["A"]["mean_send_ms"] == 300
+    assert store.character_stats("receive_game") == {
+        "E": {"rounds": 1, "accuracy": 1.0, "mean_reaction_ms": 900, "mean_send_ms": None}}
+    assert store.character_stats("transmit_game", since=0) == stats
+    assert store.element_stats("transmit_game", "A")[:2] == [(0, '-', 1, 180.0, None), (0, '.', 1, 60.0, None)]
+    assert len(store.character_trend("transmit_game", "A")) == 1
+
+def test_ids_continue_after_reopen(tmp_path):
+    """Test that a reopened store appends after the rounds already saved."""
+    path = str(tmp_path / "history.db")
+    first = SessionStore(path)
+    first.record_round(first.start_session("receive_game"), "receive_game", "E", "E", "CORRECT!")
+    first.close()
+
+    second = SessionStore(path)
+    assert second.record_round(second.start_session("receive_game"), "receive_game", "T", "T", "CORRECT!") == 2
+    second.close()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2
+
+def test_ids_are_unique_across_threads(store):
+    """Test that rounds recorded from several threads at once get distinct ids."""
+    session = store.start_session("receive_game")
+    ids = []
+
+    def record():
+        ids.extend(store.record_round(session, "receive_game", "E", "E", "CORRECT!") for _ in range(500))
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+    assert sorted(ids) == list(range(1, 2001))
+    assert store.connection.execute("SELECT COUNT(*) FROM rounds").fetchone()[0] == 2000
+
+def test_queries_use_the_index(store):
+    """Test that the per-character queries are answered from the covering index."""
+    plan = store.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT target, COUNT(*), AVG(correct), AVG(reaction_ms), AVG(send_ms) "
+        "FROM rounds WHERE mode = ? AND played_at >= 0 GROUP BY target", ("receive_game",)).fetchall()
+    assert any("COVERING INDEX rounds_by_target" in row[-1] for row in plan)
+
+def test_state_manager_records_rounds(tmp_path, store, make_config_manager):
+    """Test that a played receive round is recorded with its reaction time."""
+    clock = FakeClock()
+    state_manager = StateManager(FakeSoundManager(), make_config_manager(str(tmp_path / "config.json")), clock, store)
+    state_manager.start_countdown("receive_game")
+    for _ in range(4):
+        clock.advance(1000)
+        state_manager.update(clock.now_ms())
+    assert state_manager.state == "receive_game"
+
+    clock.advance(750)
+    state_manager.receive_input_char = state_manager.char_to_receive
+    state_manager.update(clock.now_ms())
+    store.flush()
+    assert store.character_stats("receive_game") == {
+        state_manager.char_to_receive: {"rounds": 1, "accuracy": 1.0, "mean_reaction_ms": 750, "mean_send_ms": None}}
@@ -0,0 +1,34 @@
+# tests/unit/test_simulation.py
+import src.state_manager
+from src.simulation import HeadlessEngine, RandomBot, ScriptedBot
+
+def test_state_manager_runs_without_pygame():
+    """Test that the game logic does not depend on pygame."""
+    assert not hasattr(src.state_manager, "pygame")
+
+def test_scripted_transmit_results():
+    """Test that scripted answers produce the expected round results."""
+    engine = HeadlessEngine(ScriptedBot(["0", "---.-"]), "transmit_game", seed=1)
+    stats = engine.run(4)
+
+    assert stats["rounds"] == 4
+    assert stats["results"]["INVALID MORSE!"] == 2
+    assert engine.state_manager.state == "quit"
+
+def test_random_bot_accuracy_and_fast_forward():
+    """Test a long simulated session with a randomized player."""
+    engine = HeadlessEngine(RandomBot(accuracy=0.8, wpm=20, seed=2), "receive_game", seed=2)
+    stats = engine.run(5000)
+
+    correct_ratio = stats["results"]["CORRECT!"] / stats["rounds"]
+    assert 0.75 < correct_ratio < 0.9
+    # Every round shows its result for 2 s, so game time runs far ahead of wall time
+    assert stats["simulated_seconds"] > 5000 * 2
+    assert stats["simulated_seconds"] > 100 * stats["wall_seconds"]
+
+def test_transmit_keying_is_learned():
+    """Test that a fast operator is keyed correctly once the classifier has learned the speed."""
+    engine = HeadlessEngine(RandomBot(accuracy=1.0, wpm=25, seed=3), "transmit_game", seed=3)
+    engine.run(50)
+    stats = engine.run(500)
+    assert stats["results"]["CORRECT!"] == 500
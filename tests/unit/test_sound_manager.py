@@ -0,0 +1,208 @@
+# tests/unit/test_sound_manager.py
+import threading
+import time
+import pytest
+import pygame
+from src.sound_manager import SoundManager, GainRamp, CHARACTER_CACHE_SIZE, KEY_FADE_MS
+from src.morse_synth import render_text
+
+@pytest.fixture
+def sound_manager():
+    """Create a SoundManager on top of the dummy audio driver."""
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    manager = SoundManager()
+    yield manager
+    manager.cleanup()
+    pygame.mixer.quit()
+
+def test_character_cache_hits_and_misses(sound_manager):
+    """Test that repeated characters are served from the cache."""
+    first = sound_manager.get_character_sound('A')
+    second = sound_manager.get_character_sound('A')
+
+    assert first is second
+    assert sound_manager.cache_misses == 1
+    assert sound_manager.cache_hits == 1
+
+def test_character_cache_key_includes_speed(sound_manager):
+    """Test that changing the speed synthesizes a new buffer."""
+    slow = sound_manager.get_character_sound('A')
+    sound_manager.wpm = 25
+    fast = sound_manager.get_character_sound('A')
+
+    assert slow is not fast
+    assert fast.get_length() < slow.get_length()
+
+def test_character_cache_is_bounded(sound_manager):
+    """Test that least recently used buffers are evicted."""
+    for wpm in range(5, 5 + CHARACTER_CACHE_SIZE + 10):
+        sound_manager.wpm = wpm
+        sound_manager.get_character_sound('E')
+
+    assert len(sound_manager.character_cache) == CHARACTER_CACHE_SIZE
+
+def test_play_morse_text_uses_one_buffer(sound_manager):
+    """Test that a whole text plays as one sound on the character channel."""
+    sound_manager.farnsworth_wpm = 8
+    sound_manager.play_morse_text("cq cq")
+
+    assert sound_manager.is_character_playing()
+    sound = sound_manager.character_channel.get_sound()
+    assert sound.get_length() > 4 * sound_manager.get_character_sound('C').get_length()
+
+def test_pitch_change_waits_for_key_release(tmp_path, make_config_manager, edit_config_file):
+    """Test that a reloaded pitch swaps the key tone only while it is silent."""
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    config_manager = make_config_manager(str(tmp_path / "config.json"))
+    manager = SoundManager(config_manager=config_manager)
+    original_tone = manager.tone
+
+    manager.start_tone()
+    config_manager.flush()
+    edit_config_file(config_manager.config_path, sound={"wpm": 20, "pitch_hz": 600})
+    assert config_manager.check_for_changes()
+    config_manager.dispatch_changes()
+    assert (manager.wpm, manager.pitch) == (20, 600)
+    assert manager.tone is original_tone
+
+    manager.stop_tone()
+    assert manager.tone is not original_tone
+    manager.cleanup()
+    pygame.mixer.quit()
+
+def test_reload_before_audio_is_ready_is_deferred(tmp_path, make_config_manager, edit_config_file):
+    """Test that a reload while the audio device is still opening does not wait for it."""
+    config_manager = make_config_manager(str(tmp_path / "config.json"))
+    manager = SoundManager(config_manager=config_manager, defer=True)
+    config_manager.flush()
+    edit_config_file(config_manager.config_path, sound={"wpm": 20, "pitch_hz": 600})
+    assert config_manager.check_for_changes()
+    config_manager.dispatch_changes()  # Would block forever if it waited for prepare
+    assert manager.pitch == 800
+
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    manager.prepare()
+    manager.apply_deferred_changes()
+    assert (manager.wpm, manager.pitch) == (20, 600)
+    assert manager.deferred_changes == set()
+    manager.cleanup()
+    pygame.mixer.quit()
+
+def test_difficulty_plays_character_through_band(sound_manager):
+    """Test that a receive difficulty mixes the character into band noise with a lead-in."""
+    sound_manager.difficulty = 3
+    sound_manager.play_morse_character('E')
+
+    sound = sound_manager.character_channel.get_sound()
+    assert sound is not sound_manager.get_character_sound('E')
+    assert sound.get_length() > sound_manager.get_character_sound('E').get_length() + 0.3
+    assert sound_manager.band is not None
+
+def wait_for_volume(channel, volume):
+    for _ in range(100):
+        if channel.get_volume() == volume:
+            return True
+        time.sleep(0.005)
+    return False
+
+def test_sidetone_ramps_a_silent_loop():
+    """Test that the sidetone loops muted on a reserved channel and key presses only ramp its volume."""
+    pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=256)
+    manager = SoundManager(sidetone=True)
+    channel = manager.sidetone_channel
+    assert channel.get_busy() and channel.get_volume() == 0  # Started muted, before any key press
+
+    manager.start_tone()
+    assert wait_for_volume(channel, 1.0)
+    assert channel.get_sound() is manager.tone
+    manager.play_morse_character('E')
+    assert manager.character_channel != channel
+    manager.stop_tone()
+    assert not manager.sound_playing
+    assert wait_for_volume(channel, 0.0)
+    assert channel.get_busy()  # Still looping, only muted
+
+    manager.cleanup()
+    pygame.mixer.quit()
+
+def test_gain_ramp_steps_the_volume():
+    """Test that a ramp passes through intermediate volumes instead of jumping."""
+    class RecordingChannel:
+        def __init__(self):
+            self.volumes = []
+
+        def set_volume(self, volume):
+            self.volumes.append(volume)
+
+    channel = RecordingChannel()
+    ramp = GainRamp(channel, fade_ms=KEY_FADE_MS, steps=4)
+    ramp.set(1.0)
+    for _ in range(100):
+        if channel.volumes[-1:] == [1.0]:
+            break
+        time.sleep(0.005)
+    ramp.close()
+    assert channel.volumes == [0.25, 0.5, 0.75, 1.0]
+
+def test_deferred_setup_on_another_thread():
+    """Test that a deferred sound manager opens nothing until prepared, and playing waits for it."""
+    manager = SoundManager(defer=True)
+    assert manager.tone is None and not pygame.mixer.get_init()
+
+    def prepare():
+        pygame.mixer.init(frequency=22050, size=-16, channels=1)
+        manager.prepare()
+    thread = threading.Thread(target=prepare)
+    thread.start()
+    manager.start_tone()
+    assert manager.sample_rate == 22050 and manager.sound_playing
+    manager.stop_tone()
+
+    thread.join()
+    manager.cleanup()
+    pygame.mixer.quit()
+
+def test_remote_tone_sounds_while_any_operator_keys(sound_manager):
+    """Test that the remote tone follows the keys of all remote operators together."""
+    sound_manager.set_remote_key(1, True)
+    sound_manager.set_remote_key(2, True)
+    sound_manager.set_remote_key(1, False)
+    assert sound_manager.remote_tone.get_num_channels() == 1
+    sound_manager.set_remote_key(2, False)
+    assert sound_manager.remote_tone.get_num_channels() == 0
+    assert not sound_manager.sound_playing  # The own key tone is separate
+
+def test_band_for_next_round_is_rendered_ahead(sound_manager):
+    """Test that after a band round the next round's band is rendered in the background,
+    and that a difficulty change does not use a band rendered for the old one."""
+    sound_manager.difficulty = 4
+    sound_manager.get_band_sound('E')
+    task, key = sound_manager.band_prefetch
+    assert key == (4, sound_manager.pitch, sound_manager.sample_rate)
+    task.wait()
+
+    band = sound_manager.band
+    render_threads = []
+    render_band = band.render_band
+    def record_thread(count):
+        render_threads.append(threading.current_thread())
+        return render_band(count)
+    band.render_band = record_thread
+    sound = sound_manager.get_band_sound('0')
+    sound_manager.band_prefetch[0].wait()
+    assert sound.get_length() > 0.4 + 0.8
+    assert render_threads and threading.main_thread() not in render_threads
+
+    sound_manager.difficulty = 2
+    sound_manager.get_band_sound('E')
+    assert sound_manager.band_key[0] == 2
+
+def test_receive_characters_use_text_rendering(sound_manager):
+    """Test that receive characters are rendered like texts, with the Farnsworth letter gap."""
+    sound_manager.wpm = 35
+    plain = sound_manager.get_character_sound('K')
+    sound_manager.farnsworth_wpm = 10
+    spaced = sound_manager.get_character_sound('K')
+
+    assert len(sound_manager.render_character('K')) == len(render_text('K', 35, sound_manager.pitch, 44100, 10))
+    assert spaced.get_length() > plain.get_length() + 0.2
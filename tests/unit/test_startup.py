@@ -0,0 +1,29 @@
+# tests/unit/test_startup.py
+import time
+import pytest
+from src.startup import StartupProfiler, BackgroundTask
+
+def test_background_task_result_and_error():
+    """Test that wait() returns the result, or raises the error, from the task thread."""
+    profiler = StartupProfiler(enabled=True)
+    woken = []
+    task = BackgroundTask("answer", lambda: 42, profiler, on_done=lambda: woken.append(True)).start()
+    assert task.wait() == 42
+    assert task.done() and woken == [True]
+
+    failing = BackgroundTask("failing", lambda: 1 / 0).start()
+    with pytest.raises(ZeroDivisionError):
+        failing.wait()
+
+def test_report_orders_phases_by_start():
+    """Test that background phases are listed among the main thread phases by start time."""
+    profiler = StartupProfiler(enabled=True)
+    time.sleep(0.002)
+    profiler.mark("imports")
+    profiler.record("audio", profiler.origin_ns + 1_000_000, profiler.origin_ns + 21_000_000)
+    profiler.mark("first menu frame")
+
+    lines = profiler.report_lines()
+    assert [line.split()[0] for line in lines[1:]] == ["imports", "audio", "first"]
+    assert lines[2].startswith("audio (background)")
+    assert lines[2].split()[-2:] == ["1.0", "20.0"]
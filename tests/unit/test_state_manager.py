@@ -0,0 +1,154 @@
+# tests/unit/test_state_manager.py
+import pytest
+from src.state_manager import StateManager
+from src.clock import FakeClock
+
+class FakeSoundManager:
+    def __init__(self):
+        self.played = []
+
+    def play_morse_character(self, character):
+        self.played.append(character)
+
+@pytest.fixture
+def state_manager(tmp_path, make_config_manager):
+    """Create a StateManager in a fresh transmit round."""
+    manager = StateManager(FakeSoundManager(), make_config_manager(str(tmp_path / "config.json")), FakeClock())
+    manager.state = "transmit_game"
+    manager.initialize_transmit_game()
+    return manager
+
+def send(state_manager, morse):
+    for symbol in morse:
+        state_manager.add_transmit_element(symbol)
+
+def test_unambiguous_input_ends_round_early(state_manager):
+    """Test that a leaf of the tree ends the round without waiting for the timeout."""
+    state_manager.char_to_be_guessed = '0'
+    send(state_manager, '-----')
+
+    assert state_manager.state == "result"
+    assert state_manager.result_message == "CORRECT!"
+    assert state_manager.score == 1
+
+def test_dead_end_ends_round_early(state_manager):
+    """Test that input no character starts with is rejected at once."""
+    state_manager.char_to_be_guessed = 'A'
+    send(state_manager, '---.-')
+
+    assert state_manager.state == "result"
+    assert state_manager.result_message == "INVALID MORSE!"
+
+def key(state_manager, duration_ms):
+    clock = state_manager.clock
+    press_ns = clock.now_ns()
+    state_manager.begin_key_press(press_ns)
+    clock.advance(duration_ms)
+    state_manager.complete_key_press(press_ns, clock.now_ns())
+
+def test_ambiguous_input_waits_for_timeout(state_manager):
+    """Test that a prefix of other characters waits for the input timeout."""
+    state_manager.char_to_be_guessed = 'E'
+    key(state_manager, 60)
+
+    assert state_manager.state == "transmit_game"
+    assert 'E' in state_manager.transmit_candidates and 'S' in state_manager.transmit_candidates
+
+    state_manager.clock.advance(state_manager.input_timeout_ms)
+    state_manager.update(state_manager.clock.now_ms())
+    assert state_manager.state == "transmit_game"  # Timed out only after the full gap
+
+    state_manager.clock.advance(1)
+    state_manager.update(state_manager.clock.now_ms())
+    assert state_manager.result_message == "CORRECT!"
+
+def test_next_deadline(state_manager):
+    """Test the time until update has work to do without input."""
+    clock = state_manager.clock
+    assert state_manager.next_deadline_ms(clock.now_ms()) is None  # Waiting for the first key press
+
+    key(state_manager, 60)
+    clock.advance(100)
+    assert state_manager.next_deadline_ms(clock.now_ms()) == state_manager.input_timeout_ms - 99
+
+    state_manager.clock.advance(state_manager.input_timeout_ms)
+    state_manager.update(clock.now_ms())
+    assert state_manager.state == "result"
+    clock.advance(1500)
+    assert state_manager.next_deadline_ms(clock.now_ms()) == 500
+    assert state_manager.next_deadline_ms(clock.now_ms() + 1000) == 0
+
+    state_manager.end_session("menu")
+    clock.advance(2000)
+    state_manager.update(clock.now_ms())
+    assert state_manager.state == "menu"
+    assert state_manager.next_deadline_ms(clock.now_ms()) is None
+
+def test_key_press_cancels_input_timeout(state_manager):
+    """Test that holding the key down keeps the round open past the timeout."""
+    key(state_manager, 60)
+    state_manager.clock.advance(100)
+    state_manager.begin_key_press(state_manager.clock.now_ns())
+    state_manager.clock.advance(5000)
+    state_manager.update(state_manager.clock.now_ms())
+    assert state_manager.state == "transmit_game"
+
+def test_keyer_element_gap_follows_keyer_speed(state_manager):
+    """Test that keyer elements arrive at their start and time out a character gap after key up."""
+    state_manager.char_to_be_guessed = 'E'
+    clock = state_manager.clock
+    unit_ns = 60_000_000  # 20 WPM
+    start_ns = clock.now_ns()
+    state_manager.add_keyer_element('.', start_ns, start_ns + unit_ns, unit_ns)
+    assert state_manager.transmit_input_chars == ['.']
+
+    clock.advance(60 + 300)  # Key up and five units
+    state_manager.update(clock.now_ms())
+    assert state_manager.state == "transmit_game"
+
+    clock.advance(1)
+    state_manager.update(clock.now_ms())
+    assert state_manager.result_message == "CORRECT!"
+
+def test_session_end_cancels_next_round(state_manager):
+    """Test that ending the session during a result display cancels the next round."""
+    send(state_manager, '-----')
+    assert state_manager.state == "result"
+    state_manager.end_session("menu")
+
+    state_manager.clock.advance(2000)
+    state_manager.update(state_manager.clock.now_ms())
+    assert state_manager.state == "menu"
+    assert state_manager.timers.lateness_report()["final_score"]["fired"] == 1
+    assert "result" not in state_manager.timers.lateness_report()
+
+def test_countdown_and_receive_feedback(state_manager):
+    """Test the countdown ticks and the short pause before a receive result."""
+    clock = state_manager.clock
+    state_manager.start_countdown("receive_game")
+    for value in (2, 1, 0):
+        clock.advance(1000)
+        state_manager.update(clock.now_ms())
+        assert (state_manager.state, state_manager.countdown_value) == ("countdown", value)
+    clock.advance(1000)
+    state_manager.update(clock.now_ms())
+    assert state_manager.state == "receive_game"
+
+    state_manager.receive_input_char = state_manager.char_to_receive
+    assert state_manager.next_deadline_ms(clock.now_ms()) == 0
+    state_manager.update(clock.now_ms())
+    assert state_manager.state == "receive_game"  # No sleep: the result follows a timer
+    assert state_manager.next_deadline_ms(clock.now_ms()) == 200
+
+    clock.advance(200)
+    state_manager.update(clock.now_ms())
+    assert (state_manager.state, state_manager.result_message) == ("receive_result", "CORRECT!")
+
+def test_input_timeout_follows_config_reload(state_manager, edit_config_file):
+    """Test that a reloaded input timeout reaches the state manager."""
+    config_manager = state_manager.config_manager
+    config_manager.flush()
+    edit_config_file(config_manager.config_path, general={"input_timeout_ms": 2500})
+    assert config_manager.check_for_changes()
+    config_manager.dispatch_changes()
+    assert state_manager.input_timeout_ms == 2500
@@ -0,0 +1,59 @@
+# tests/unit/test_timer_scheduler.py
+import pytest
+from src.clock import FakeClock
+from src.timer_scheduler import TimerScheduler
+
+@pytest.fixture
+def scheduler():
+    """Create a scheduler on a manually advanced clock."""
+    return TimerScheduler(FakeClock(start_ms=0))
+
+def test_timers_fire_in_deadline_order(scheduler):
+    """Test that due timers fire earliest first and later ones wait."""
+    fired = []
+    scheduler.schedule(300, lambda: fired.append("c"))
+    scheduler.schedule(100, lambda: fired.append("a"))
+    scheduler.schedule(200, lambda: fired.append("b"))
+
+    assert scheduler.run_due(99) == 0
+    assert scheduler.next_deadline_ms(0) == 100
+    assert scheduler.run_due(250) == 2
+    assert fired == ["a", "b"]
+    assert scheduler.next_deadline_ms(250) == 50
+
+def test_cancelled_timers_do_not_fire(scheduler):
+    """Test cancelling single timers and all timers."""
+    fired = []
+    timer = scheduler.schedule(100, lambda: fired.append("cancelled"))
+    scheduler.schedule(200, lambda: fired.append("kept"))
+    scheduler.cancel(timer)
+
+    assert scheduler.next_deadline_ms(0) == 200
+    scheduler.run_due(1000)
+    assert fired == ["kept"]
+
+    scheduler.schedule(100, lambda: fired.append("cleared"))
+    scheduler.cancel_all()
+    assert scheduler.next_deadline_ms(0) is None
+    assert scheduler.run_due(10_000) == 0
+
+def test_callbacks_can_schedule_timers(scheduler):
+    """Test that a timer scheduled from a callback fires in the same pass when due."""
+    fired = []
+    scheduler.schedule(0, lambda: scheduler.schedule(0, lambda: fired.append("chained")))
+    scheduler.run_due(0)
+    assert fired == ["chained"]
+
+def test_lateness_report(scheduler):
+    """Test that lateness is reported per timer name."""
+    scheduler.schedule(100, lambda: None, "round")
+    scheduler.schedule(100, lambda: None, "round")
+    scheduler.schedule(50, lambda: None, "tick")
+    scheduler.run_due(100)
+    scheduler.schedule(100, lambda: None, "round")
+    scheduler.run_due(230)
+
+    report = scheduler.lateness_report()
+    assert report["tick"] == {"fired": 1, "mean_ms": 50, "p95_ms": 50, "max_ms": 50}
+    assert report["round"]["fired"] == 3
+    assert report["round"]["max_ms"] == 130
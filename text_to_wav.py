@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+import wave
+from src.morse_synth import iter_text_samples, chunk_samples, DEFAULT_WPM, DEFAULT_PITCH, DEFAULT_SAMPLE_RATE
+
+READ_SIZE = 64 * 1024  # Characters read from the input per step
+MAX_WAV_SAMPLES = (2**32 - 1 - 36) // 2  # RIFF size field limits a 16-bit mono WAV to ~4 GiB
+
+def read_chunks(file):
+    """Yield the contents of a text file in fixed-size pieces."""
+    while True:
+        text = file.read(READ_SIZE)
+        if not text:
+            return
+        yield text
+
+def open_wav(path, sample_rate):
+    wav_file = wave.open(path, "wb")
+    wav_file.setnchannels(1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(sample_rate)
+    return wav_file
+
+def part_path(path, part):
+    """Output path for a continuation file once a WAV file is full, e.g. book.002.wav."""
+    if part == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{part:03d}{ext or '.wav'}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a text file as Morse code practice audio (WAV).")
+    parser.add_argument("input", help="text file to encode, or - for stdin")
+    parser.add_argument("output", help="WAV file to write; continues in numbered files past the 4 GiB WAV limit")
+    parser.add_argument("--wpm", type=float, default=DEFAULT_WPM, help="sending speed in words per minute")
+    parser.add_argument("--pitch", type=float, default=DEFAULT_PITCH, help="tone frequency in Hz")
+    parser.add_argument("--sample-rate", type=int, default=DEFAULT_SAMPLE_RATE, help="output sample rate in Hz")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", errors="replace")
+    start = time.perf_counter()
+    total_samples = 0
+    part = 1
+    part_samples = 0
+
+    with source:
+        wav_file = open_wav(part_path(args.output, part), args.sample_rate)
+        try:
+            buffers = iter_text_samples(read_chunks(source), args.wpm, args.pitch, args.sample_rate)
+            for chunk in chunk_samples(buffers):
+                if part_samples + len(chunk) > MAX_WAV_SAMPLES:
+                    wav_file.close()
+                    part += 1
+                    part_samples = 0
+                    wav_file = open_wav(part_path(args.output, part), args.sample_rate)
+                wav_file.writeframesraw(chunk.tobytes())
+                part_samples += len(chunk)
+                total_samples += len(chunk)
+        finally:
+            wav_file.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    audio_seconds = total_samples / args.sample_rate
+    print(f"Rendered {total_samples} samples ({audio_seconds:.1f} s of audio, {part} file(s)) in {elapsed:.2f} s: "
+          f"{total_samples / elapsed:,.0f} samples/s ({audio_seconds / elapsed:,.0f}x real time)")
+
+if __name__ == "__main__":
+    main()